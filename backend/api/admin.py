@@ -3,7 +3,7 @@ Admin configuration untuk aplikasi API ChiliGuard.
 """
 
 from django.contrib import admin
-from .models import Penyakit, RiwayatDeteksi, ProfilPengguna
+from .models import Penyakit, RiwayatDeteksi, BlobGambar, StatistikHarian, ProfilPengguna
 
 
 @admin.register(Penyakit)
@@ -26,9 +26,9 @@ class PenyakitAdmin(admin.ModelAdmin):
 
 @admin.register(RiwayatDeteksi)
 class RiwayatDeteksiAdmin(admin.ModelAdmin):
-    list_display = ['user', 'nama_kelas', 'kepercayaan', 'status_sehat', 'created_at']
+    list_display = ['user', 'nama_kelas', 'kepercayaan', 'status_sehat', 'versi_model', 'created_at']
     search_fields = ['user__username', 'nama_kelas']
-    list_filter = ['status_sehat', 'nama_kelas', 'created_at']
+    list_filter = ['status_sehat', 'nama_kelas', 'versi_model', 'created_at']
     ordering = ['-created_at']
     readonly_fields = ['created_at']
     
@@ -36,6 +36,23 @@ class RiwayatDeteksiAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('user', 'penyakit')
 
 
+@admin.register(BlobGambar)
+class BlobGambarAdmin(admin.ModelAdmin):
+    list_display = ['nama', 'ukuran', 'jumlah_referensi', 'created_at']
+    search_fields = ['nama']
+    ordering = ['-created_at']
+    readonly_fields = ['nama', 'ukuran', 'jumlah_referensi', 'created_at']
+
+
+@admin.register(StatistikHarian)
+class StatistikHarianAdmin(admin.ModelAdmin):
+    list_display = ['user', 'tanggal', 'nama_kelas', 'jumlah', 'jumlah_sehat']
+    search_fields = ['user__username', 'nama_kelas']
+    list_filter = ['nama_kelas', 'tanggal']
+    ordering = ['-tanggal']
+    readonly_fields = ['user', 'tanggal', 'nama_kelas', 'jumlah', 'jumlah_sehat', 'total_kepercayaan']
+
+
 @admin.register(ProfilPengguna)
 class ProfilPenggunaAdmin(admin.ModelAdmin):
     list_display = ['user', 'nomor_telepon', 'created_at']
@@ -0,0 +1,242 @@
+"""
+Admission control dan rate limit untuk endpoint prediksi.
+
+Inferensi adalah satu-satunya bagian API yang mahal. Tanpa batas, lonjakan
+upload membuat semua worker tertahan di model dan endpoint murah (login,
+/api/health/, katalog) ikut macet. KontrolMasuk membatasi jumlah inferensi
+yang berjalan bersamaan (ADMISI_MAKS_BERJALAN); request berikutnya
+menunggu di antrean terbatas (ADMISI_MAKS_ANTRE, paling lama
+ADMISI_BATAS_TUNGGU detik) dan sisanya langsung ditolak dengan 503 +
+Retry-After, sehingga worker cepat bebas kembali.
+
+Rate limit per user/IP memakai throttle DRF dengan scope terpisah untuk
+pengguna anonim dan pengguna login (DEFAULT_THROTTLE_RATES). Throttle
+menyimpan hitungan di cache Django 'default'; pakai cache bersama agar
+batasnya berlaku di semua worker.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+
+class AntreanPenuh(Exception):
+    """Request inferensi ditolak karena server sedang penuh."""
+
+    def __init__(self, retryAfter):
+        super().__init__('Server sedang sibuk memproses prediksi lain.')
+        self.retryAfter = retryAfter
+
+
+class KontrolMasuk:
+    """
+    Pembatas inferensi bersamaan dengan antrean tunggu terbatas.
+
+    Dapat dipakai dari thread (masuk) maupun event loop (amasuk) pada
+    proses yang sama; keduanya berbagi slot yang sama.
+
+    Args:
+        maksBerjalan: Jumlah inferensi maksimal yang berjalan bersamaan.
+        maksAntre: Jumlah request maksimal yang menunggu slot.
+        batasTunggu: Waktu tunggu maksimal (detik) sebelum ditolak.
+        retryAfter: Nilai header Retry-After (detik) saat ditolak.
+    """
+
+    def __init__(self, maksBerjalan=4, maksAntre=16, batasTunggu=5.0, retryAfter=5):
+        self.maksBerjalan = max(1, int(maksBerjalan))
+        self.maksAntre = max(0, int(maksAntre))
+        self.batasTunggu = batasTunggu
+        self.retryAfter = retryAfter
+        self._kondisi = threading.Condition()
+        self._pelayanAsync = deque()
+        self._berjalan = 0
+        self._menunggu = 0
+        self.jumlahDiterima = 0
+        self.jumlahDitolak = 0
+
+    def _cobaAmbil(self):
+        # Dipanggil dengan self._kondisi terkunci
+        if self._berjalan < self.maksBerjalan:
+            self._berjalan += 1
+            self.jumlahDiterima += 1
+            return True
+        return False
+
+    def _tolak(self):
+        # Dipanggil dengan self._kondisi terkunci
+        self.jumlahDitolak += 1
+        return AntreanPenuh(self.retryAfter)
+
+    def _bangunkanPenunggu(self):
+        # Dipanggil dengan self._kondisi terkunci. Membangunkan satu penunggu
+        # thread dan satu penunggu async; yang kalah cepat menunggu lagi.
+        self._kondisi.notify()
+        if self._pelayanAsync:
+            loop, futur = self._pelayanAsync.popleft()
+            loop.call_soon_threadsafe(_bangunkan, futur)
+
+    def _tolakSetelahTunggu(self):
+        # Dipanggil dengan self._kondisi terkunci. Penunggu yang habis waktu
+        # mungkin baru saja dibangunkan; teruskan ke penunggu lain agar slot
+        # kosong tidak terlewat.
+        if self._berjalan < self.maksBerjalan:
+            self._bangunkanPenunggu()
+        return self._tolak()
+
+    def _lepas(self):
+        with self._kondisi:
+            self._berjalan -= 1
+            self._bangunkanPenunggu()
+
+    @contextmanager
+    def masuk(self):
+        """
+        Menunggu slot inferensi (blocking).
+
+        Raises:
+            AntreanPenuh: Jika antrean penuh atau waktu tunggu habis.
+        """
+        with self._kondisi:
+            if not self._cobaAmbil():
+                if self._menunggu >= self.maksAntre:
+                    raise self._tolak()
+                self._menunggu += 1
+                try:
+                    batasWaktu = time.monotonic() + self.batasTunggu
+                    while not self._cobaAmbil():
+                        sisaWaktu = batasWaktu - time.monotonic()
+                        if sisaWaktu <= 0:
+                            raise self._tolakSetelahTunggu()
+                        self._kondisi.wait(sisaWaktu)
+                finally:
+                    self._menunggu -= 1
+        try:
+            yield
+        finally:
+            self._lepas()
+
+    @asynccontextmanager
+    async def amasuk(self):
+        """Versi async dari masuk(); menunggu tanpa memblokir event loop."""
+        loop = asyncio.get_running_loop()
+        with self._kondisi:
+            diterima = self._cobaAmbil()
+            if not diterima:
+                if self._menunggu >= self.maksAntre:
+                    raise self._tolak()
+                self._menunggu += 1
+
+        if not diterima:
+            try:
+                batasWaktu = time.monotonic() + self.batasTunggu
+                while True:
+                    with self._kondisi:
+                        if self._cobaAmbil():
+                            diterima = True
+                            break
+                        sisaWaktu = batasWaktu - time.monotonic()
+                        if sisaWaktu <= 0:
+                            raise self._tolakSetelahTunggu()
+                        futur = loop.create_future()
+                        self._pelayanAsync.append((loop, futur))
+                    try:
+                        await asyncio.wait_for(futur, sisaWaktu)
+                    except asyncio.TimeoutError:
+                        pass
+                    finally:
+                        with self._kondisi:
+                            try:
+                                self._pelayanAsync.remove((loop, futur))
+                            except ValueError:
+                                pass
+            finally:
+                with self._kondisi:
+                    self._menunggu -= 1
+                    # Dibatalkan (mis. klien putus) setelah dibangunkan
+                    if not diterima and self._berjalan < self.maksBerjalan:
+                        self._bangunkanPenunggu()
+        try:
+            yield
+        finally:
+            self._lepas()
+
+    def statistik(self):
+        """
+        Returns:
+            dict: Jumlah berjalan, menunggu, diterima, ditolak, dan batasnya.
+        """
+        with self._kondisi:
+            return {
+                'berjalan': self._berjalan,
+                'menunggu': self._menunggu,
+                'diterima': self.jumlahDiterima,
+                'ditolak': self.jumlahDitolak,
+                'maksBerjalan': self.maksBerjalan,
+                'maksAntre': self.maksAntre,
+            }
+
+
+def _bangunkan(futur):
+    if not futur.done():
+        futur.set_result(None)
+
+
+_kontrolMasuk = None
+
+
+def dapatkanKontrolMasuk():
+    """
+    Mendapatkan pembatas inferensi proses ini (dibuat sekali).
+
+    Returns:
+        KontrolMasuk
+    """
+    global _kontrolMasuk
+
+    if _kontrolMasuk is None:
+        _kontrolMasuk = KontrolMasuk(
+            maksBerjalan=settings.ADMISI_MAKS_BERJALAN,
+            maksAntre=settings.ADMISI_MAKS_ANTRE,
+            batasTunggu=settings.ADMISI_BATAS_TUNGGU,
+            retryAfter=settings.ADMISI_RETRY_AFTER,
+        )
+    return _kontrolMasuk
+
+
+class _RateDariSettings:
+    # DRF menyalin DEFAULT_THROTTLE_RATES ke atribut kelas saat impor, jadi
+    # override_settings (test, benchmark) tidak berpengaruh. Rate dibaca
+    # ulang per request; rate None berarti tanpa batas.
+    def get_rate(self):
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(f"Rate throttle untuk scope '{self.scope}' belum diatur.")
+
+
+class ThrottlePrediksiAnon(_RateDariSettings, AnonRateThrottle):
+    """Rate limit prediksi per IP untuk pengguna anonim."""
+
+    scope = 'prediksi_anon'
+
+
+class ThrottlePrediksiUser(_RateDariSettings, UserRateThrottle):
+    """Rate limit prediksi per user untuk pengguna login."""
+
+    scope = 'prediksi_user'
+
+    def get_cache_key(self, request, view):
+        # Pengguna anonim sudah dibatasi ThrottlePrediksiAnon
+        if not (request.user and request.user.is_authenticated):
+            return None
+        return super().get_cache_key(request, view)
+
+
+THROTTLE_PREDIKSI = [ThrottlePrediksiAnon, ThrottlePrediksiUser]
@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        # Muat dan panaskan model saat proses start (opt-in), agar perintah
+        # seperti migrate dan seed_diseases tetap cepat.
+        if settings.MODEL_MUAT_SAAT_START:
+            from .utils import panaskanModel
+            panaskanModel()
@@ -0,0 +1,148 @@
+"""
+Autentikasi token DRF dengan cache token -> user.
+
+TokenAuthentication bawaan DRF melakukan join Token + User ke database di
+setiap request, lalu UserSerializer mengambil profil dengan query
+terpisah. TokenAuthenticationCache mengambil token, user, dan profil
+dalam satu query, dan jika AUTH_TOKEN_CACHE_ALIAS diisi, menyimpan
+hasilnya di cache bersama tersebut selama AUTH_TOKEN_CACHE_TTL detik.
+
+Entri dikosongkan seketika lewat sinyal (lihat signals.py) saat token
+dihapus (logout), saat User disimpan (termasuk dinonaktifkan), dan saat
+ProfilPengguna diubah. Karena pengosongan harus terlihat oleh semua
+worker, cache hanya dipakai dengan alias CACHES yang dipakai bersama
+(mis. Redis/Memcached); tanpa alias, setiap request membaca database.
+"""
+
+import hashlib
+import threading
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+
+def _kunciCache(kunciToken):
+    # Token mentah tidak ikut tersimpan di backend cache
+    return 'authToken:' + hashlib.blake2b(kunciToken.encode(), digest_size=16).hexdigest()
+
+
+class CacheToken:
+    """
+    Cache TTL untuk pasangan (user, token) di cache Django bersama.
+
+    Args:
+        ttl: Masa berlaku entri (detik).
+        aliasCacheDjango: Alias di settings.CACHES yang dipakai bersama
+            semua worker (kosong = cache tidak dipakai).
+    """
+
+    def __init__(self, ttl=60, aliasCacheDjango=None):
+        self.ttl = ttl
+        self.aliasCacheDjango = aliasCacheDjango
+        self._kunci = threading.Lock()
+        self.jumlahHit = 0
+        self.jumlahMiss = 0
+
+    @property
+    def aktif(self):
+        return bool(self.aliasCacheDjango)
+
+    def _cacheDjango(self):
+        from django.core.cache import caches
+        return caches[self.aliasCacheDjango]
+
+    def ambil(self, kunciToken):
+        """
+        Mengambil (user, token) yang tersimpan.
+
+        Returns:
+            tuple: (user, token) milik request ini, atau None jika miss.
+        """
+        if not self.aktif:
+            return None
+        nilai = self._cacheDjango().get(_kunciCache(kunciToken))
+        with self._kunci:
+            if nilai is None:
+                self.jumlahMiss += 1
+            else:
+                self.jumlahHit += 1
+        return nilai
+
+    def simpan(self, kunciToken, user, token):
+        """Menyimpan user dan token untuk kunci token tertentu."""
+        if self.aktif:
+            self._cacheDjango().set(_kunciCache(kunciToken), (user, token), self.ttl)
+
+    def hapus(self, daftarKunciToken):
+        """
+        Mengosongkan entri untuk token-token tertentu.
+
+        Args:
+            daftarKunciToken: Iterable kunci token.
+        """
+        daftarKunci = [_kunciCache(kunciToken) for kunciToken in daftarKunciToken]
+        if self.aktif and daftarKunci:
+            self._cacheDjango().delete_many(daftarKunci)
+
+    def statistik(self):
+        """
+        Returns:
+            dict: Status aktif, jumlah hit, miss, dan rasio hit.
+        """
+        with self._kunci:
+            total = self.jumlahHit + self.jumlahMiss
+            return {
+                'aktif': self.aktif,
+                'hit': self.jumlahHit,
+                'miss': self.jumlahMiss,
+                'rasioHit': round(self.jumlahHit / total, 4) if total else 0.0,
+            }
+
+
+_cacheToken = None
+
+
+def dapatkanCacheToken():
+    """
+    Mendapatkan cache token proses ini (dibuat sekali).
+
+    Returns:
+        CacheToken
+    """
+    global _cacheToken
+
+    if _cacheToken is None:
+        _cacheToken = CacheToken(
+            ttl=settings.AUTH_TOKEN_CACHE_TTL,
+            aliasCacheDjango=settings.AUTH_TOKEN_CACHE_ALIAS,
+        )
+    return _cacheToken
+
+
+class TokenAuthenticationCache(TokenAuthentication):
+    """
+    TokenAuthentication dengan lookup token -> user yang di-cache.
+
+    Saat miss (atau cache tidak aktif), token, user, dan profil diambil
+    dalam satu query.
+    """
+
+    def authenticate_credentials(self, key):
+        cacheToken = dapatkanCacheToken()
+        nilai = cacheToken.ambil(key)
+        if nilai is not None:
+            return nilai
+
+        model = self.get_model()
+        try:
+            token = model.objects.select_related('user', 'user__profil').get(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        cacheToken.simpan(key, token.user, token)
+        return (token.user, token)
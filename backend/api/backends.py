@@ -0,0 +1,164 @@
+"""
+Backend inferensi untuk model ChiliGuard.
+
+Setiap backend membungkus satu runtime (Keras, TFLite, ONNX Runtime)
+dengan antarmuka yang sama, sehingga runtime dapat dipilih lewat
+settings.MODEL_BACKEND tanpa mengubah kode.
+"""
+
+import threading
+
+import numpy as np
+
+
+class BackendInferensi:
+    """
+    Antarmuka dasar backend inferensi.
+
+    Args:
+        jalurModel: Path ke file model untuk runtime ini.
+        jumlahThread: Jumlah thread CPU untuk runtime (None = default runtime).
+    """
+
+    nama = None
+    ekstensi = None
+
+    def __init__(self, jalurModel, jumlahThread=None):
+        self.jalurModel = jalurModel
+        self.jumlahThread = jumlahThread
+
+    def prediksi(self, arrayBatch):
+        """
+        Menjalankan satu forward pass.
+
+        Args:
+            arrayBatch: Array gambar float32 (N, H, W, 3).
+
+        Returns:
+            numpy.ndarray: Probabilitas setiap kelas (N, jumlah_kelas).
+        """
+        raise NotImplementedError
+
+
+class BackendKeras(BackendInferensi):
+    """Model .keras asli, dipanggil langsung tanpa overhead model.predict."""
+
+    nama = 'keras'
+    ekstensi = '.keras'
+
+    def __init__(self, jalurModel, jumlahThread=None):
+        super().__init__(jalurModel, jumlahThread)
+        import tensorflow as tf
+        if jumlahThread:
+            try:
+                tf.config.threading.set_intra_op_parallelism_threads(jumlahThread)
+            except RuntimeError:
+                # Runtime TensorFlow sudah diinisialisasi di proses ini
+                pass
+        self.model = tf.keras.models.load_model(jalurModel)
+
+    def prediksi(self, arrayBatch):
+        return np.asarray(self.model(arrayBatch, training=False))
+
+
+class BackendTFLite(BackendInferensi):
+    """Interpreter TFLite (memakai tflite_runtime jika terpasang)."""
+
+    nama = 'tflite'
+    ekstensi = '.tflite'
+
+    def __init__(self, jalurModel, jumlahThread=None):
+        super().__init__(jalurModel, jumlahThread)
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+        self.interpreter = Interpreter(model_path=jalurModel, num_threads=jumlahThread)
+        self.interpreter.allocate_tensors()
+        detailInput = self.interpreter.get_input_details()[0]
+        detailOutput = self.interpreter.get_output_details()[0]
+        self._indeksInput = detailInput['index']
+        self._indeksOutput = detailOutput['index']
+        # Model int8 penuh bisa memakai input/output terkuantisasi
+        self._tipeInput = detailInput['dtype']
+        self._kuantisasiInput = detailInput['quantization']
+        self._kuantisasiOutput = detailOutput['quantization']
+        self._ukuranBatch = None
+        # Interpreter TFLite tidak thread-safe
+        self._kunci = threading.Lock()
+
+    def prediksi(self, arrayBatch):
+        if self._tipeInput == np.float32:
+            arrayBatch = np.ascontiguousarray(arrayBatch, dtype=np.float32)
+        else:
+            skala, titikNol = self._kuantisasiInput
+            arrayBatch = np.clip(
+                np.round(arrayBatch / skala + titikNol),
+                np.iinfo(self._tipeInput).min, np.iinfo(self._tipeInput).max
+            ).astype(self._tipeInput)
+
+        with self._kunci:
+            if arrayBatch.shape[0] != self._ukuranBatch:
+                self.interpreter.resize_tensor_input(self._indeksInput, arrayBatch.shape)
+                self.interpreter.allocate_tensors()
+                self._ukuranBatch = arrayBatch.shape[0]
+            self.interpreter.set_tensor(self._indeksInput, arrayBatch)
+            self.interpreter.invoke()
+            hasil = self.interpreter.get_tensor(self._indeksOutput).copy()
+
+        if hasil.dtype != np.float32:
+            skala, titikNol = self._kuantisasiOutput
+            hasil = (hasil.astype(np.float32) - titikNol) * skala
+        return hasil
+
+
+class BackendONNX(BackendInferensi):
+    """ONNX Runtime dengan CPUExecutionProvider."""
+
+    nama = 'onnx'
+    ekstensi = '.onnx'
+
+    def __init__(self, jalurModel, jumlahThread=None):
+        super().__init__(jalurModel, jumlahThread)
+        import onnxruntime as ort
+
+        opsiSesi = ort.SessionOptions()
+        opsiSesi.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if jumlahThread:
+            opsiSesi.intra_op_num_threads = jumlahThread
+        self.sesi = ort.InferenceSession(
+            jalurModel, sess_options=opsiSesi, providers=['CPUExecutionProvider']
+        )
+        self._namaInput = self.sesi.get_inputs()[0].name
+
+    def prediksi(self, arrayBatch):
+        arrayBatch = np.ascontiguousarray(arrayBatch, dtype=np.float32)
+        return self.sesi.run(None, {self._namaInput: arrayBatch})[0]
+
+
+DAFTAR_BACKEND = {
+    BackendKeras.nama: BackendKeras,
+    BackendTFLite.nama: BackendTFLite,
+    BackendONNX.nama: BackendONNX,
+}
+
+
+def dapatkanKelasBackend(namaBackend):
+    """
+    Mendapatkan kelas backend berdasarkan namanya.
+
+    Args:
+        namaBackend: 'keras', 'tflite', atau 'onnx'.
+
+    Returns:
+        Kelas turunan BackendInferensi.
+    """
+    try:
+        return DAFTAR_BACKEND[namaBackend]
+    except KeyError:
+        raise ValueError(
+            f'Backend "{namaBackend}" tidak dikenal. '
+            f'Gunakan: {", ".join(DAFTAR_BACKEND)}'
+        )
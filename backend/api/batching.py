@@ -0,0 +1,130 @@
+"""
+Penjadwal micro-batching untuk inferensi model ChiliGuard.
+
+Permintaan prediksi yang datang bersamaan dikumpulkan dalam jendela waktu
+singkat, lalu dijalankan sebagai satu forward pass. Setiap pemanggil
+menerima kembali baris probabilitasnya sendiri. Permintaan untuk model
+yang berbeda (mis. saat versi model berganti) tidak digabung.
+"""
+
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+
+class _PermintaanPrediksi:
+    """Satu gambar yang menunggu giliran masuk batch."""
+
+    __slots__ = ('arrayGambar', 'model', 'hasil', 'kesalahan', 'selesai')
+
+    def __init__(self, arrayGambar, model):
+        self.arrayGambar = arrayGambar
+        self.model = model
+        self.hasil = None
+        self.kesalahan = None
+        self.selesai = threading.Event()
+
+
+class PenjadwalBatch:
+    """
+    Mengumpulkan permintaan prediksi bersamaan menjadi satu batch.
+
+    Args:
+        fungsiPrediksi: Callable yang menerima array (N, H, W, 3) dan model
+            (argumen model dari prediksi()), lalu mengembalikan array
+            probabilitas (N, jumlah_kelas).
+        ukuranBatchMaks: Jumlah gambar maksimal dalam satu forward pass.
+        waktuTungguMaks: Waktu tunggu maksimal (detik) sejak permintaan
+            pertama masuk sebelum batch dijalankan.
+    """
+
+    def __init__(self, fungsiPrediksi, ukuranBatchMaks=16, waktuTungguMaks=0.005):
+        self.fungsiPrediksi = fungsiPrediksi
+        self.ukuranBatchMaks = max(1, int(ukuranBatchMaks))
+        self.waktuTungguMaks = max(0.0, float(waktuTungguMaks))
+        self._antrean = queue.Queue()
+        self._kunci = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def prediksi(self, arrayGambar, model=None):
+        """
+        Mengirim satu gambar ke antrean dan menunggu hasilnya.
+
+        Args:
+            arrayGambar: Array gambar (1, H, W, 3) atau (H, W, 3).
+            model: Model yang harus menjawab; hanya permintaan dengan
+                model yang sama digabung dalam satu forward pass.
+
+        Returns:
+            numpy.ndarray: Probabilitas untuk gambar tersebut (jumlah_kelas,).
+        """
+        if arrayGambar.ndim == 4:
+            arrayGambar = arrayGambar[0]
+
+        permintaan = _PermintaanPrediksi(arrayGambar, model)
+        self._pastikanBerjalan()
+        self._antrean.put(permintaan)
+        permintaan.selesai.wait()
+
+        if permintaan.kesalahan is not None:
+            raise permintaan.kesalahan
+        return permintaan.hasil
+
+    def _pastikanBerjalan(self):
+        # Thread tidak ikut ter-copy saat proses di-fork (mis. gunicorn --preload),
+        # jadi setiap proses memulai thread pengumpulnya sendiri.
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._kunci:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._antrean = queue.Queue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._loop, name='chiliguard-batch', daemon=True
+            )
+            self._thread.start()
+
+    def _kumpulkanBatch(self):
+        batch = [self._antrean.get()]
+        batasWaktu = time.monotonic() + self.waktuTungguMaks
+
+        while len(batch) < self.ukuranBatchMaks:
+            sisaWaktu = batasWaktu - time.monotonic()
+            try:
+                if sisaWaktu <= 0:
+                    # Jendela habis: ambil saja yang sudah mengantre
+                    batch.append(self._antrean.get_nowait())
+                else:
+                    batch.append(self._antrean.get(timeout=sisaWaktu))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _loop(self):
+        while True:
+            # Satu forward pass per model
+            kelompok = {}
+            for permintaan in self._kumpulkanBatch():
+                kelompok.setdefault(id(permintaan.model), []).append(permintaan)
+            for batch in kelompok.values():
+                self._jalankanBatch(batch)
+
+    def _jalankanBatch(self, batch):
+        try:
+            arrayBatch = np.stack([p.arrayGambar for p in batch])
+            hasilBatch = self.fungsiPrediksi(arrayBatch, batch[0].model)
+            for indeks, permintaan in enumerate(batch):
+                permintaan.hasil = hasilBatch[indeks]
+        except Exception as kesalahan:
+            for permintaan in batch:
+                permintaan.kesalahan = kesalahan
+        finally:
+            for permintaan in batch:
+                permintaan.selesai.set()
@@ -0,0 +1,222 @@
+"""
+Kaskade dua tahap: model cepat dulu, model penuh hanya jika perlu.
+
+Sebagian besar upload adalah kasus jelas (mis. Healthy Leaf) yang sudah
+dapat dijawab model kecil. Model cepat (MODEL_CEPAT_PATH) dijalankan
+untuk setiap gambar; model penuh (MODEL_PATH, lewat batching/pool seperti
+biasa) hanya dipanggil jika kepercayaan top-1 model cepat di bawah
+KASKADE_AMBANG_KEPERCAYAAN atau kelasnya ada di KASKADE_KELAS_PANTAU.
+
+Model cepat harus memakai daftar kelas dan ukuran input yang sama dengan
+model penuh, sehingga array hasil praproses dapat dipakai keduanya (jumlah
+kelas output diperiksa saat dimuat; jika berbeda kaskade dilewati). Model
+cepat selalu dijalankan di proses ini (bukan di pool inferensi), karena
+biayanya kecil.
+
+Tingkat eskalasi dan kesesuaian kedua model pada gambar riwayat dapat
+diukur dengan: python manage.py evaluate_cascade
+"""
+
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+
+TAHAP_CEPAT = 'cepat'
+TAHAP_PENUH = 'penuh'
+
+_modelCepat = None
+_kunciModelCepat = threading.Lock()
+_gagalMuat = False
+
+
+class StatistikKaskade:
+    """Jumlah gambar yang dijawab setiap tahap di proses ini."""
+
+    def __init__(self):
+        self._kunci = threading.Lock()
+        self.jumlah = {TAHAP_CEPAT: 0, TAHAP_PENUH: 0}
+
+    def catat(self, tahap, jumlah=1):
+        with self._kunci:
+            self.jumlah[tahap] += jumlah
+
+    def statistik(self):
+        """
+        Returns:
+            dict: Jumlah per tahap dan rasio eskalasi ke model penuh.
+        """
+        with self._kunci:
+            cepat = self.jumlah[TAHAP_CEPAT]
+            penuh = self.jumlah[TAHAP_PENUH]
+        total = cepat + penuh
+        return {
+            'aktif': settings.KASKADE_AKTIF,
+            'cepat': cepat,
+            'penuh': penuh,
+            'rasioEskalasi': round(penuh / total, 4) if total else 0.0,
+        }
+
+
+statistikKaskade = StatistikKaskade()
+
+
+def muatModelCepat():
+    """
+    Memuat model cepat (sekali per proses).
+
+    Returns:
+        BackendInferensi, atau None jika file tidak ada atau gagal dimuat
+        (kaskade lalu dilewati dan semua gambar memakai model penuh).
+    """
+    global _modelCepat, _gagalMuat
+
+    if _modelCepat is not None or _gagalMuat:
+        return _modelCepat
+
+    with _kunciModelCepat:
+        if _modelCepat is not None or _gagalMuat:
+            return _modelCepat
+
+        jalurModel = settings.MODEL_CEPAT_PATH
+        if not os.path.exists(jalurModel):
+            print(f"[PERINGATAN] Model cepat tidak ditemukan di: {jalurModel}; "
+                  f"kaskade dilewati")
+            _gagalMuat = True
+            return None
+
+        try:
+            from .backends import dapatkanKelasBackend
+            waktuMulai = time.perf_counter()
+            kelasBackend = dapatkanKelasBackend(settings.MODEL_CEPAT_BACKEND)
+            modelCepat = kelasBackend(jalurModel, settings.MODEL_JUMLAH_THREAD)
+            _periksaKeluaranModelCepat(modelCepat)
+            _modelCepat = modelCepat
+            print(f"[SUKSES] Model cepat dimuat dari: {jalurModel} "
+                  f"(backend {kelasBackend.nama}, {time.perf_counter() - waktuMulai:.2f} detik)")
+        except Exception as kesalahan:
+            print(f"[ERROR] Gagal memuat model cepat: {kesalahan}; kaskade dilewati")
+            _gagalMuat = True
+        return _modelCepat
+
+
+def _periksaKeluaranModelCepat(modelCepat):
+    """
+    Menjalankan satu forward pass dummy dan memeriksa bentuk output.
+
+    Probabilitas model cepat ditulis langsung ke baris hasil model penuh,
+    jadi jumlah kolomnya harus sama dengan DAFTAR_KELAS_PENYAKIT.
+
+    Args:
+        modelCepat: Backend model cepat yang baru dimuat.
+
+    Raises:
+        ValueError: Jika bentuk output tidak (1, jumlah_kelas).
+    """
+    lebar, tinggi = settings.UKURAN_GAMBAR_INPUT
+    arrayDummy = np.zeros((1, tinggi, lebar, 3), dtype=np.float32)
+    bentuk = np.shape(modelCepat.prediksi(arrayDummy))
+    jumlahKelas = len(settings.DAFTAR_KELAS_PENYAKIT)
+    if bentuk != (1, jumlahKelas):
+        raise ValueError(
+            f'output model cepat berbentuk {bentuk}, seharusnya (1, {jumlahKelas}) '
+            f'sesuai DAFTAR_KELAS_PENYAKIT'
+        )
+
+
+def kaskadeAktif():
+    """
+    Returns:
+        bool: True jika kaskade diaktifkan dan model cepat siap.
+    """
+    return settings.KASKADE_AKTIF and muatModelCepat() is not None
+
+
+def perluEskalasi(probabilitas, ambang=None, kelasPantau=None):
+    """
+    Menentukan baris mana yang harus diteruskan ke model penuh.
+
+    Args:
+        probabilitas: Output model cepat (N, jumlah_kelas).
+        ambang: Batas kepercayaan top-1. Default: KASKADE_AMBANG_KEPERCAYAAN.
+        kelasPantau: Nama kelas yang selalu dieskalasi.
+            Default: KASKADE_KELAS_PANTAU.
+
+    Returns:
+        numpy.ndarray: Array bool (N,), True = pakai model penuh.
+    """
+    if ambang is None:
+        ambang = settings.KASKADE_AMBANG_KEPERCAYAAN
+    if kelasPantau is None:
+        kelasPantau = settings.KASKADE_KELAS_PANTAU
+
+    indeksTertinggi = np.argmax(probabilitas, axis=1)
+    kepercayaan = probabilitas[np.arange(len(probabilitas)), indeksTertinggi]
+    eskalasi = kepercayaan < ambang
+    if kelasPantau:
+        indeksPantau = [
+            indeks for indeks, kelas in enumerate(settings.DAFTAR_KELAS_PENYAKIT)
+            if kelas in kelasPantau
+        ]
+        eskalasi |= np.isin(indeksTertinggi, indeksPantau)
+    return eskalasi
+
+
+def prediksiKaskade(arrayBatch, prediksiPenuh):
+    """
+    Menjalankan kaskade untuk sekumpulan gambar.
+
+    Args:
+        arrayBatch: Array gambar yang sudah diproses (N, H, W, 3).
+        prediksiPenuh: Fungsi model penuh, menerima array (M, H, W, 3)
+            dan mengembalikan probabilitas (M, jumlah_kelas).
+
+    Returns:
+        tuple: (probabilitas (N, jumlah_kelas), list tahap per gambar)
+    """
+    probabilitas = np.asarray(muatModelCepat().prediksi(arrayBatch), dtype=np.float32)
+    eskalasi = perluEskalasi(probabilitas)
+    indeksEskalasi = np.flatnonzero(eskalasi)
+    if len(indeksEskalasi):
+        probabilitas[indeksEskalasi] = prediksiPenuh(arrayBatch[indeksEskalasi])
+
+    daftarTahap = [TAHAP_PENUH if nilai else TAHAP_CEPAT for nilai in eskalasi]
+    statistikKaskade.catat(TAHAP_PENUH, len(indeksEskalasi))
+    statistikKaskade.catat(TAHAP_CEPAT, len(daftarTahap) - len(indeksEskalasi))
+    return probabilitas, daftarTahap
+
+
+def versiModelCepat():
+    """
+    Returns:
+        str: Versi model cepat untuk dicatat di riwayat (mis. 'cepat-3fa4c2d1').
+    """
+    from .prediction_cache import dapatkanVersiModel
+
+    return 'cepat-' + dapatkanVersiModel(settings.MODEL_CEPAT_PATH)[:8]
+
+
+def penandaKonfigurasi():
+    """
+    Penanda konfigurasi kaskade untuk kunci cache prediksi.
+
+    Hasil kaskade bergantung pada model cepat, ambang, dan daftar kelas
+    pantau; mengubah salah satunya tidak boleh memakai hasil cache lama.
+
+    Returns:
+        str: Penanda singkat, atau '' jika kaskade tidak aktif.
+    """
+    if not kaskadeAktif():
+        return ''
+    from .prediction_cache import dapatkanVersiModel
+
+    sumber = '|'.join((
+        dapatkanVersiModel(settings.MODEL_CEPAT_PATH),
+        repr(settings.KASKADE_AMBANG_KEPERCAYAAN),
+        ','.join(sorted(settings.KASKADE_KELAS_PANTAU)),
+    ))
+    return hashlib.blake2b(sumber.encode(), digest_size=4).hexdigest()
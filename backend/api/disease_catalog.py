@@ -0,0 +1,256 @@
+"""
+Cache katalog penyakit dalam proses.
+
+Tabel Penyakit hanya berisi sembilan baris dan hampir tidak pernah
+berubah, jadi katalog dibangun sekali dari database (dengan data di
+utils.dapatkanInfoPenyakit sebagai fallback) dan jalur prediksi tidak
+perlu query katalog sama sekali.
+
+Katalog yang sama menyimpan payload JSON endpoint katalog yang sudah
+dirender (beserta versi gzip dan ETag-nya), sehingga /api/classes/ dan
+/api/diseases/ tidak query maupun serialisasi ulang di setiap request.
+
+Katalog dikosongkan oleh sinyal post_save/post_delete Penyakit (lihat
+signals.py). Untuk deployment multi-worker, setiap invalidasi juga
+menaikkan kunci versi di cache Django bersama (KATALOG_CACHE_ALIAS),
+yang diperiksa worker lain paling sering sekali per
+KATALOG_INTERVAL_CEK_VERSI detik.
+
+Last-Modified katalog tidak boleh mundur, termasuk saat baris Penyakit
+terbaru dihapus. Karena itu nilai kunci versi bersama adalah waktu
+perubahan terakhir (milidetik epoch) yang dinaikkan secara atomik dan
+monoton di setiap invalidasi, lalu dipakai bersama updated_at sebagai
+Last-Modified.
+"""
+
+import gzip
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+
+KUNCI_VERSI_KATALOG = 'katalogPenyakit:versi'
+
+
+def _milidetikSekarang():
+    return int(time.time() * 1000)
+
+
+def _waktuDariMilidetik(milidetik):
+    return datetime.fromtimestamp(milidetik / 1000, tz=timezone.utc)
+
+
+def infoDariPenyakit(penyakitDB):
+    """Mengubah objek Penyakit menjadi dict info penyakit."""
+    return {
+        'namaIndonesia': penyakitDB.nama_indonesia,
+        'deskripsi': penyakitDB.deskripsi,
+        'gejala': penyakitDB.gejala,
+        'penangananOrganik': penyakitDB.penanganan_organik,
+        'penangananKimia': penyakitDB.penanganan_kimia,
+        'pencegahan': penyakitDB.pencegahan,
+    }
+
+
+class PayloadJSON:
+    """
+    Body JSON yang sudah dirender, beserta versi gzip dan validatornya.
+
+    Args:
+        data: Data response (dict).
+        terakhirDiubah: datetime perubahan terakhir katalog, atau None.
+    """
+
+    __slots__ = ('isi', 'isiGzip', 'etag', 'terakhirDiubah')
+
+    def __init__(self, data, terakhirDiubah):
+        # Renderer yang sama dengan Response DRF, agar body identik
+        self.isi = JSONRenderer().render(data)
+        self.isiGzip = gzip.compress(self.isi, compresslevel=9, mtime=0)
+        self.etag = '"{}"'.format(hashlib.blake2b(self.isi, digest_size=16).hexdigest())
+        self.terakhirDiubah = terakhirDiubah
+
+
+class _SnapshotKatalog:
+    def __init__(self, info, daftarPenyakit, terakhirDiubah, versi):
+        self.info = info
+        self.daftarPenyakit = daftarPenyakit
+        self.terakhirDiubah = terakhirDiubah
+        self.versi = versi
+        self.payload = {}
+
+
+class KatalogPenyakit:
+    """
+    Peta nama kelas -> (infoPenyakit, id Penyakit atau None), plus payload
+    endpoint katalog yang sudah dirender.
+
+    Args:
+        aliasCacheDjango: Alias di settings.CACHES untuk kunci versi
+            bersama antar-worker (kosong = hanya invalidasi lokal).
+        intervalCekVersi: Jeda minimal (detik) antar pemeriksaan kunci versi.
+    """
+
+    def __init__(self, aliasCacheDjango=None, intervalCekVersi=5.0):
+        self.aliasCacheDjango = aliasCacheDjango
+        self.intervalCekVersi = intervalCekVersi
+        self._snapshot = None
+        self._cekTerakhir = 0.0
+        # Waktu invalidasi terakhir di proses ini (milidetik epoch)
+        self._waktuUbahLokal = None
+        self._kunci = threading.Lock()
+
+    def _cacheDjango(self):
+        if not self.aliasCacheDjango:
+            return None
+        from django.core.cache import caches
+        return caches[self.aliasCacheDjango]
+
+    def _versiBersama(self):
+        cacheDjango = self._cacheDjango()
+        if cacheDjango is None:
+            return None
+        return cacheDjango.get(KUNCI_VERSI_KATALOG, 0)
+
+    def _perluDimuatUlang(self, snapshot):
+        if snapshot is None:
+            return True
+        if not self.aliasCacheDjango:
+            return False
+
+        sekarang = time.monotonic()
+        if sekarang - self._cekTerakhir < self.intervalCekVersi:
+            return False
+        self._cekTerakhir = sekarang
+        return self._versiBersama() != snapshot.versi
+
+    def _muat(self):
+        from .models import Penyakit
+        from .utils import dapatkanInfoPenyakit
+
+        with self._kunci:
+            versi = self._versiBersama()
+            # Thread lain sudah memuat katalog selagi menunggu kunci
+            if self._snapshot is not None and versi == self._snapshot.versi:
+                return self._snapshot
+
+            info = {
+                namaKelas: (dapatkanInfoPenyakit(namaKelas), None)
+                for namaKelas in settings.DAFTAR_KELAS_PENYAKIT
+            }
+            daftarPenyakit = list(Penyakit.objects.all())
+            for penyakitDB in daftarPenyakit:
+                info[penyakitDB.nama] = (infoDariPenyakit(penyakitDB), penyakitDB.pk)
+
+            # Waktu invalidasi ikut dihitung agar penghapusan baris terbaru
+            # tidak memundurkan Last-Modified
+            daftarWaktu = [penyakitDB.updated_at for penyakitDB in daftarPenyakit]
+            for milidetik in (versi, self._waktuUbahLokal):
+                if milidetik:
+                    daftarWaktu.append(_waktuDariMilidetik(milidetik))
+            terakhirDiubah = max(daftarWaktu, default=None)
+            self._snapshot = _SnapshotKatalog(info, daftarPenyakit, terakhirDiubah, versi)
+            self._cekTerakhir = time.monotonic()
+            return self._snapshot
+
+    def _dapatkanSnapshot(self):
+        snapshot = self._snapshot
+        if self._perluDimuatUlang(snapshot):
+            snapshot = self._muat()
+        return snapshot
+
+    def ambil(self, namaKelas):
+        """
+        Mengambil informasi penyakit untuk satu kelas.
+
+        Args:
+            namaKelas: Nama kelas hasil prediksi.
+
+        Returns:
+            tuple: (infoPenyakit dict, id Penyakit atau None)
+        """
+        entri = self._dapatkanSnapshot().info.get(namaKelas)
+        if entri is None:
+            from .utils import dapatkanInfoPenyakit
+            return dapatkanInfoPenyakit(namaKelas), None
+        return entri
+
+    async def aambil(self, namaKelas):
+        """Versi async dari ambil(); query hanya saat katalog dimuat ulang."""
+        if self._perluDimuatUlang(self._snapshot):
+            await sync_to_async(self._muat)()
+        return self.ambil(namaKelas)
+
+    def payload(self, kunci, buatData):
+        """
+        Mengambil payload JSON yang sudah dirender untuk katalog saat ini.
+
+        Args:
+            kunci: Kunci payload (mis. 'penyakit' atau 'penyakit:3').
+            buatData: Fungsi (daftarPenyakit) -> dict data response, atau
+                None jika tidak ada (mis. id tidak ditemukan). Hanya
+                dipanggil sekali per versi katalog untuk data yang ada.
+
+        Returns:
+            PayloadJSON, atau None jika buatData mengembalikan None.
+        """
+        snapshot = self._dapatkanSnapshot()
+        try:
+            return snapshot.payload[kunci]
+        except KeyError:
+            pass
+
+        data = buatData(snapshot.daftarPenyakit)
+        if data is None:
+            # Tidak disimpan, agar id acak tidak memenuhi cache
+            return None
+        payload = snapshot.payload[kunci] = PayloadJSON(data, snapshot.terakhirDiubah)
+        return payload
+
+    def invalidasi(self, bersama=True):
+        """
+        Mengosongkan katalog proses ini.
+
+        Args:
+            bersama: Naikkan juga kunci versi bersama agar worker lain
+                memuat ulang katalognya.
+        """
+        sekarang = _milidetikSekarang()
+        with self._kunci:
+            self._snapshot = None
+            self._waktuUbahLokal = max(sekarang, (self._waktuUbahLokal or 0) + 1)
+
+        cacheDjango = self._cacheDjango() if bersama else None
+        if cacheDjango is not None and not cacheDjango.add(KUNCI_VERSI_KATALOG, sekarang, None):
+            # incr atomik: hasilnya selalu > nilai sebelumnya dan >= sekarang,
+            # walaupun beberapa worker menginvalidasi bersamaan
+            try:
+                nilaiLama = cacheDjango.get(KUNCI_VERSI_KATALOG, 0)
+                cacheDjango.incr(KUNCI_VERSI_KATALOG, max(1, sekarang - nilaiLama))
+            except ValueError:
+                cacheDjango.set(KUNCI_VERSI_KATALOG, sekarang, None)
+
+
+_katalogPenyakit = None
+
+
+def dapatkanKatalogPenyakit():
+    """
+    Mendapatkan katalog penyakit proses ini (dibuat sekali).
+
+    Returns:
+        KatalogPenyakit
+    """
+    global _katalogPenyakit
+
+    if _katalogPenyakit is None:
+        _katalogPenyakit = KatalogPenyakit(
+            aliasCacheDjango=settings.KATALOG_CACHE_ALIAS,
+            intervalCekVersi=settings.KATALOG_INTERVAL_CEK_VERSI,
+        )
+    return _katalogPenyakit
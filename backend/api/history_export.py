@@ -0,0 +1,121 @@
+"""
+Ekspor riwayat deteksi sebagai stream CSV atau NDJSON.
+
+Riwayat dibaca dengan QuerySet.iterator() per potongan (server-side
+cursor di PostgreSQL) dan ditulis ke response sedikit demi sedikit, jadi
+memori tetap konstan berapa pun jumlah riwayatnya. Output dapat
+dikompres gzip secara streaming.
+"""
+
+import csv
+import io
+import json
+import zlib
+from urllib.parse import urljoin
+
+from django.utils import timezone
+from django.utils.encoding import filepath_to_uri
+
+
+KOLOM_EKSPOR = (
+    'id', 'waktu', 'nama_kelas', 'nama_indonesia', 'kepercayaan', 'status_sehat', 'gambar',
+    'versi_model',
+)
+
+# Jumlah baris per fetch database
+UKURAN_POTONGAN_QUERY = 2000
+
+# Ukuran potongan output (byte) sebelum dikirim ke klien
+UKURAN_POTONGAN_OUTPUT = 64 * 1024
+
+
+def _iterasiBaris(riwayat, awalUrl):
+    from .models import RiwayatDeteksi
+
+    # values_list (join ke penyakit, tanpa membuat objek model dan tanpa
+    # decode field JSON Penyakit) jauh lebih cepat per baris
+    storage = RiwayatDeteksi._meta.get_field('gambar').storage
+    awalUrlMedia = urljoin(awalUrl, storage.base_url)
+    daftarBaris = riwayat.values_list(
+        'id', 'created_at', 'nama_kelas', 'penyakit__nama_indonesia',
+        'kepercayaan', 'status_sehat', 'gambar', 'versi_model',
+    ).iterator(chunk_size=UKURAN_POTONGAN_QUERY)
+    for idRiwayat, waktu, namaKelas, namaIndonesia, kepercayaan, statusSehat, gambar, versiModel \
+            in daftarBaris:
+        yield (
+            idRiwayat,
+            timezone.localtime(waktu).isoformat(),
+            namaKelas,
+            namaIndonesia or '',
+            kepercayaan,
+            statusSehat,
+            awalUrlMedia + filepath_to_uri(gambar) if gambar else '',
+            versiModel,
+        )
+
+
+def streamCSV(riwayat, awalUrl):
+    """
+    Menghasilkan isi CSV (dengan header) per potongan byte.
+
+    Args:
+        riwayat: QuerySet RiwayatDeteksi yang sudah difilter dan diurutkan.
+        awalUrl: URL absolut situs, untuk membentuk URL gambar.
+
+    Yields:
+        bytes: Potongan CSV UTF-8.
+    """
+    buffer = io.StringIO()
+    penulis = csv.writer(buffer)
+    penulis.writerow(KOLOM_EKSPOR)
+    for baris in _iterasiBaris(riwayat, awalUrl):
+        penulis.writerow(baris)
+        if buffer.tell() >= UKURAN_POTONGAN_OUTPUT:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def streamNDJSON(riwayat, awalUrl):
+    """
+    Menghasilkan isi NDJSON (satu objek JSON per baris) per potongan byte.
+
+    Args:
+        riwayat: QuerySet RiwayatDeteksi yang sudah difilter dan diurutkan.
+        awalUrl: URL absolut situs, untuk membentuk URL gambar.
+
+    Yields:
+        bytes: Potongan NDJSON UTF-8.
+    """
+    potongan = []
+    ukuran = 0
+    for baris in _iterasiBaris(riwayat, awalUrl):
+        teks = json.dumps(dict(zip(KOLOM_EKSPOR, baris)), ensure_ascii=False)
+        potongan.append(teks)
+        ukuran += len(teks) + 1
+        if ukuran >= UKURAN_POTONGAN_OUTPUT:
+            yield ('\n'.join(potongan) + '\n').encode('utf-8')
+            potongan = []
+            ukuran = 0
+    if potongan:
+        yield ('\n'.join(potongan) + '\n').encode('utf-8')
+
+
+def kompresGzip(daftarPotongan, level=6):
+    """
+    Mengompres stream byte menjadi stream gzip tanpa menampung semuanya.
+
+    Args:
+        daftarPotongan: Iterable bytes.
+        level: Level kompresi zlib (1-9).
+
+    Yields:
+        bytes: Potongan data gzip.
+    """
+    kompresor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for potongan in daftarPotongan:
+        hasil = kompresor.compress(potongan)
+        if hasil:
+            yield hasil
+    yield kompresor.flush()
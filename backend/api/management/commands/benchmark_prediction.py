@@ -0,0 +1,375 @@
+"""
+Management command benchmark end-to-end jalur prediksi.
+
+Mengukur waktu setiap tahap (decode, resize, normalisasi, prediksi, tulis
+DB, serialisasi), klasifikasiGambar utuh, serta throughput PrediksiView
+lewat Django test client pada beberapa tingkat konkurensi, memakai gambar
+sintetis JPEG/PNG/WebP. Hasil disimpan sebagai JSON agar bisa dibandingkan
+antar-commit.
+
+Benchmark berjalan di database test sementara. Jika file model tidak ada
+(atau --stub dipakai), model diganti stub dengan waktu forward pass tetap,
+sehingga benchmark tetap bisa dijalankan offline.
+
+Jalankan dengan: python manage.py benchmark_prediction [--output hasil.json]
+"""
+
+import json
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from io import StringIO
+
+import numpy as np
+import PIL
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.renderers import JSONRenderer
+
+from api import admission, utils
+from api.backends import BackendInferensi
+from api.management.commands.benchmark_preprocessing import buatGambarSintetis
+from api.models import RiwayatDeteksi
+from api.views import KELAS_SEHAT, ambilInfoPenyakit, susunResponsPrediksi
+
+
+class BackendStub(BackendInferensi):
+    """
+    Pengganti model untuk benchmark offline.
+
+    Probabilitas dihitung dari proyeksi acak tetap atas rata-rata piksel,
+    dan setiap forward pass menunggu waktuDasar + waktuPerGambar * N detik.
+    """
+
+    nama = 'stub'
+
+    def __init__(self, waktuDasar=0.015, waktuPerGambar=0.005):
+        super().__init__(jalurModel=None)
+        self.waktuDasar = waktuDasar
+        self.waktuPerGambar = waktuPerGambar
+        jumlahKelas = len(settings.DAFTAR_KELAS_PENYAKIT)
+        self._bobot = np.random.default_rng(0).normal(size=(3, jumlahKelas)).astype(np.float32)
+
+    def prediksi(self, arrayBatch):
+        time.sleep(self.waktuDasar + self.waktuPerGambar * len(arrayBatch))
+        logit = arrayBatch.mean(axis=(1, 2)) @ self._bobot * 10
+        logit -= logit.max(axis=1, keepdims=True)
+        eksponen = np.exp(logit)
+        return eksponen / eksponen.sum(axis=1, keepdims=True)
+
+
+def ringkasWaktu(daftarWaktu):
+    """Ringkasan statistik (milidetik) dari daftar durasi dalam detik."""
+    arrayMs = np.array(daftarWaktu) * 1000
+    return {
+        'rataRata': round(float(arrayMs.mean()), 3),
+        'p50': round(float(np.percentile(arrayMs, 50)), 3),
+        'p95': round(float(np.percentile(arrayMs, 95)), 3),
+        'p99': round(float(np.percentile(arrayMs, 99)), 3),
+    }
+
+
+def rssPuncakMB():
+    """Resident set size puncak proses ini (MB)."""
+    rssPuncak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux melaporkan KB, macOS melaporkan byte
+    return round(rssPuncak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def commitGit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Benchmark end-to-end jalur prediksi (per tahap, throughput, RSS) ke JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--resolusi', nargs='+', default=['640x480', '1920x1080', '4032x3024'],
+            help='Resolusi input LEBARxTINGGI (default: 640x480 1920x1080 4032x3024)'
+        )
+        parser.add_argument(
+            '--format', nargs='+', default=['JPEG', 'PNG', 'WEBP'],
+            help='Format gambar sintetis (default: JPEG PNG WEBP)'
+        )
+        parser.add_argument(
+            '--ulangan', type=int, default=20,
+            help='Jumlah pengulangan per kasus untuk waktu per tahap (default: 20)'
+        )
+        parser.add_argument(
+            '--konkurensi', nargs='+', type=int, default=[1, 2, 4, 8],
+            help='Tingkat konkurensi untuk uji throughput (default: 1 2 4 8)'
+        )
+        parser.add_argument(
+            '--request-per-thread', type=int, default=20,
+            help='Jumlah request per thread pada uji throughput (default: 20)'
+        )
+        parser.add_argument(
+            '--stub', action='store_true',
+            help='Selalu pakai model stub, walaupun file model tersedia'
+        )
+        parser.add_argument(
+            '--stub-ms', type=float, default=15.0,
+            help='Waktu dasar forward pass model stub dalam ms (default: 15)'
+        )
+        parser.add_argument(
+            '--output', default=None,
+            help='Path file JSON hasil (default: benchmark_<commit>_<waktu>.json)'
+        )
+        parser.add_argument(
+            '--bandingkan', default=None,
+            help='File JSON hasil sebelumnya untuk dibandingkan'
+        )
+
+    def handle(self, *args, **options):
+        pakaiStub = options['stub'] or not utils.modelTersedia()
+        hasil = {
+            'meta': {
+                'waktu': datetime.now().isoformat(timespec='seconds'),
+                'commit': commitGit(),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'pillow': PIL.__version__,
+                'platform': platform.platform(),
+                'modelStub': pakaiStub,
+                'backend': 'stub' if pakaiStub else settings.MODEL_BACKEND,
+                'resampler': settings.PRAPROSES_RESAMPLER,
+                'batchingAktif': settings.INFERENSI_BATCH_AKTIF,
+            },
+        }
+
+        modelSebelumnya = utils._modelTerlatih
+        if pakaiStub:
+            self.stdout.write(self.style.WARNING('Memakai model stub (file model tidak dipakai).'))
+            utils._modelTerlatih = BackendStub(waktuDasar=options['stub_ms'] / 1000)
+
+        # Model stub hanya ada di proses ini, jadi pool worker dan registri
+        # model (yang memuat modelnya sendiri) dimatikan. Rate limit dan
+        # admission control dilonggarkan agar throughput tidak tercampur
+        # respons 429/503 yang cepat.
+        direktoriMedia = tempfile.mkdtemp(prefix='chiliguard-benchmark-')
+        konkurensiMaks = max(options['konkurensi'])
+        overrideSettings = override_settings(
+            MEDIA_ROOT=direktoriMedia,
+            CACHE_PREDIKSI_AKTIF=False,
+            INFERENSI_POOL_AKTIF=settings.INFERENSI_POOL_AKTIF and not pakaiStub,
+            MODEL_REGISTRI_AKTIF=settings.MODEL_REGISTRI_AKTIF and not pakaiStub,
+            REST_FRAMEWORK={
+                **settings.REST_FRAMEWORK,
+                'DEFAULT_THROTTLE_RATES': {'prediksi_anon': None, 'prediksi_user': None},
+            },
+            ADMISI_MAKS_BERJALAN=max(settings.ADMISI_MAKS_BERJALAN, konkurensiMaks),
+            ADMISI_MAKS_ANTRE=max(settings.ADMISI_MAKS_ANTRE, konkurensiMaks),
+            ADMISI_BATAS_TUNGGU=max(settings.ADMISI_BATAS_TUNGGU, 300),
+        )
+        kontrolMasukSebelumnya = admission._kontrolMasuk
+
+        setup_test_environment()
+        namaDatabaseLama = connection.creation.create_test_db(verbosity=0)
+        try:
+            with overrideSettings:
+                # Dibuat ulang dengan batas dari override di atas
+                admission._kontrolMasuk = None
+                call_command('seed_diseases', stdout=StringIO())
+                hasil['tahap'] = self._benchmarkTahap(options)
+                hasil['throughput'] = self._benchmarkThroughput(options)
+        finally:
+            connection.creation.destroy_test_db(namaDatabaseLama, verbosity=0)
+            teardown_test_environment()
+            utils._modelTerlatih = modelSebelumnya
+            admission._kontrolMasuk = kontrolMasukSebelumnya
+            shutil.rmtree(direktoriMedia, ignore_errors=True)
+
+        hasil['rssPuncakMB'] = rssPuncakMB()
+        self.stdout.write(f'\nRSS puncak: {hasil["rssPuncakMB"]} MB')
+
+        jalurOutput = options['output'] or (
+            f'benchmark_{hasil["meta"]["commit"] or "lokal"}_'
+            f'{datetime.now().strftime("%Y%m%d%H%M%S")}.json'
+        )
+        with open(jalurOutput, 'w') as berkas:
+            json.dump(hasil, berkas, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Hasil disimpan ke {jalurOutput}'))
+
+        if options['bandingkan']:
+            self._bandingkan(options['bandingkan'], hasil)
+
+    def _benchmarkTahap(self, options):
+        user = User.objects.create_user(username='benchmark', password=None)
+        renderer = JSONRenderer()
+        hasilTahap = {}
+
+        self.stdout.write(
+            f'\n{"Input":<18}{"decode":>9}{"resize":>9}{"normal":>9}{"predict":>9}'
+            f'{"db":>9}{"serial":>9}{"total":>9}  (ms, rata-rata)'
+        )
+
+        for resolusi in options['resolusi']:
+            lebar, tinggi = (int(nilai) for nilai in resolusi.lower().split('x'))
+            for formatGambar in options['format']:
+                fileGambar = buatGambarSintetis(lebar, tinggi, formatGambar.upper())
+                waktu = {nama: [] for nama in (
+                    'decode', 'resize', 'normalisasi', 'prediksi', 'tulisDB', 'serialisasi',
+                    'klasifikasiGambar',
+                )}
+
+                for _ in range(options['ulangan']):
+                    mulai = time.perf_counter()
+                    gambar = utils.bukaGambar(fileGambar)
+                    waktu['decode'].append(time.perf_counter() - mulai)
+
+                    mulai = time.perf_counter()
+                    gambar = utils.ubahUkuranGambar(gambar)
+                    waktu['resize'].append(time.perf_counter() - mulai)
+
+                    mulai = time.perf_counter()
+                    arrayGambar = utils.normalisasiGambar(gambar)
+                    waktu['normalisasi'].append(time.perf_counter() - mulai)
+
+                    mulai = time.perf_counter()
+                    probabilitas = utils.prediksiBatch(arrayGambar)[0]
+                    waktu['prediksi'].append(time.perf_counter() - mulai)
+
+                    hasilKlasifikasi = utils.susunHasilKlasifikasi(probabilitas)
+                    kelasTedeteksi = hasilKlasifikasi['kelas']
+                    infoPenyakit, idPenyakit = ambilInfoPenyakit(kelasTedeteksi)
+
+                    mulai = time.perf_counter()
+                    fileGambar.seek(0)
+                    RiwayatDeteksi.objects.create(
+                        user=user,
+                        gambar=ContentFile(fileGambar.read(), name=fileGambar.name),
+                        penyakit_id=idPenyakit,
+                        nama_kelas=kelasTedeteksi,
+                        kepercayaan=hasilKlasifikasi['kepercayaan'],
+                        status_sehat=kelasTedeteksi in KELAS_SEHAT
+                    )
+                    waktu['tulisDB'].append(time.perf_counter() - mulai)
+
+                    mulai = time.perf_counter()
+                    renderer.render(susunResponsPrediksi(hasilKlasifikasi, infoPenyakit, True))
+                    waktu['serialisasi'].append(time.perf_counter() - mulai)
+
+                    mulai = time.perf_counter()
+                    utils.klasifikasiGambar(fileGambar)
+                    waktu['klasifikasiGambar'].append(time.perf_counter() - mulai)
+
+                kunci = f'{resolusi}_{formatGambar.upper()}'
+                hasilTahap[kunci] = {nama: ringkasWaktu(nilai) for nama, nilai in waktu.items()}
+                hasilTahap[kunci]['ukuranFileKB'] = round(fileGambar.size / 1024, 1)
+
+                rataRata = {nama: hasilTahap[kunci][nama]['rataRata'] for nama in waktu}
+                total = sum(nilai for nama, nilai in rataRata.items() if nama != 'klasifikasiGambar')
+                self.stdout.write(
+                    f'{resolusi + " " + formatGambar.upper():<18}'
+                    f'{rataRata["decode"]:>9.2f}{rataRata["resize"]:>9.2f}'
+                    f'{rataRata["normalisasi"]:>9.2f}{rataRata["prediksi"]:>9.2f}'
+                    f'{rataRata["tulisDB"]:>9.2f}{rataRata["serialisasi"]:>9.2f}{total:>9.2f}'
+                )
+
+        return hasilTahap
+
+    def _benchmarkThroughput(self, options):
+        # Request anonim: mengukur jalur upload + inferensi tanpa kontensi
+        # tulis database (SQLite test DB tidak cocok untuk tulis paralel).
+        fileGambar = buatGambarSintetis(1920, 1080, 'JPEG')
+        kontenGambar = fileGambar.read()
+        hasilThroughput = {}
+
+        self.stdout.write(
+            f'\n{"Konkurensi":<12}{"req/s":>10}{"p50 (ms)":>10}{"p95 (ms)":>10}'
+            f'{"p99 (ms)":>10}{"gagal":>8}'
+        )
+
+        for konkurensi in options['konkurensi']:
+            daftarLatensi = []
+            jumlahGagal = [0]
+            kunci = threading.Lock()
+
+            def jalankanKlien():
+                klien = Client()
+                latensiLokal = []
+                gagalLokal = 0
+                for _ in range(options['request_per_thread']):
+                    mulai = time.perf_counter()
+                    respons = klien.post('/api/predict/', {
+                        'image': ContentFile(kontenGambar, name='benchmark.jpg'),
+                    })
+                    latensiLokal.append(time.perf_counter() - mulai)
+                    if respons.status_code != 200:
+                        gagalLokal += 1
+                connection.close()
+                with kunci:
+                    daftarLatensi.extend(latensiLokal)
+                    jumlahGagal[0] += gagalLokal
+
+            daftarThread = [threading.Thread(target=jalankanKlien) for _ in range(konkurensi)]
+            mulai = time.perf_counter()
+            for thread in daftarThread:
+                thread.start()
+            for thread in daftarThread:
+                thread.join()
+            durasi = time.perf_counter() - mulai
+
+            # Hanya request yang berhasil dihitung sebagai throughput
+            ringkasan = ringkasWaktu(daftarLatensi)
+            ringkasan['requestPerDetik'] = round((len(daftarLatensi) - jumlahGagal[0]) / durasi, 2)
+            ringkasan['gagal'] = jumlahGagal[0]
+            hasilThroughput[str(konkurensi)] = ringkasan
+
+            self.stdout.write(
+                f'{konkurensi:<12}{ringkasan["requestPerDetik"]:>10.2f}{ringkasan["p50"]:>10.2f}'
+                f'{ringkasan["p95"]:>10.2f}{ringkasan["p99"]:>10.2f}{ringkasan["gagal"]:>8}'
+            )
+
+        return hasilThroughput
+
+    def _bandingkan(self, jalurSebelumnya, hasil):
+        try:
+            with open(jalurSebelumnya) as berkas:
+                sebelumnya = json.load(berkas)
+        except (OSError, ValueError) as kesalahan:
+            raise CommandError(f'Gagal membaca {jalurSebelumnya}: {kesalahan}')
+
+        self.stdout.write(
+            f'\nPerbandingan dengan {jalurSebelumnya} '
+            f'(commit {sebelumnya.get("meta", {}).get("commit")}):'
+        )
+        for kunci, tahap in hasil['tahap'].items():
+            tahapLama = sebelumnya.get('tahap', {}).get(kunci)
+            if not tahapLama:
+                continue
+            lama = tahapLama['klasifikasiGambar']['rataRata']
+            baru = tahap['klasifikasiGambar']['rataRata']
+            self.stdout.write(
+                f'  {kunci:<18} klasifikasiGambar {lama:8.2f} -> {baru:8.2f} ms '
+                f'({(baru - lama) / lama * 100:+.1f}%)'
+            )
+        for konkurensi, ringkasan in hasil['throughput'].items():
+            ringkasanLama = sebelumnya.get('throughput', {}).get(konkurensi)
+            if not ringkasanLama:
+                continue
+            lama = ringkasanLama['requestPerDetik']
+            baru = ringkasan['requestPerDetik']
+            self.stdout.write(
+                f'  konkurensi {konkurensi:<7} throughput {lama:8.2f} -> {baru:8.2f} req/s '
+                f'({(baru - lama) / lama * 100:+.1f}%)'
+            )
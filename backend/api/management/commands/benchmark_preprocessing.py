@@ -0,0 +1,129 @@
+"""
+Management command untuk membandingkan jalur praproses gambar.
+
+Membandingkan prosesGambar (draft decode + resampler dari settings +
+normalisasi in-place) dengan jalur lama (decode penuh + LANCZOS) pada
+beberapa resolusi input. Jika model dan riwayat deteksi tersedia, juga
+mengukur kecocokan kelas top-1 antara kedua jalur.
+
+Jalankan dengan: python manage.py benchmark_preprocessing
+"""
+
+import time
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+
+from api.models import RiwayatDeteksi
+from api.utils import muatModel, prediksiBatch, prosesGambar
+
+
+def prosesGambarLama(fileGambar):
+    """Jalur praproses sebelum optimasi, sebagai acuan perbandingan."""
+    fileGambar.seek(0)
+    gambar = Image.open(BytesIO(fileGambar.read()))
+    if gambar.mode != 'RGB':
+        gambar = gambar.convert('RGB')
+    gambar = gambar.resize(settings.UKURAN_GAMBAR_INPUT, Image.Resampling.LANCZOS)
+    arrayGambar = np.array(gambar, dtype=np.float32)
+    arrayGambar = arrayGambar / 255.0
+    return np.expand_dims(arrayGambar, axis=0)
+
+
+def buatGambarSintetis(lebar, tinggi, formatGambar):
+    """Membuat gambar bertekstur (bukan warna polos) agar decode realistis."""
+    generator = np.random.default_rng(lebar * tinggi)
+    dasar = generator.integers(0, 256, (tinggi // 16 + 1, lebar // 16 + 1, 3), dtype=np.uint8)
+    gambar = Image.fromarray(dasar).resize((lebar, tinggi), Image.Resampling.BILINEAR)
+    buffer = BytesIO()
+    gambar.save(buffer, format=formatGambar, quality=90)
+    return ContentFile(buffer.getvalue(), name=f'sintetis.{formatGambar.lower()}')
+
+
+class Command(BaseCommand):
+    help = 'Membandingkan kecepatan dan akurasi jalur praproses gambar baru vs lama'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--resolusi', nargs='+', default=['640x480', '1920x1080', '4032x3024'],
+            help='Resolusi input LEBARxTINGGI (default: 640x480 1920x1080 4032x3024)'
+        )
+        parser.add_argument(
+            '--format', nargs='+', default=['JPEG', 'PNG'],
+            help='Format gambar sintetis (default: JPEG PNG)'
+        )
+        parser.add_argument(
+            '--ulangan', type=int, default=20,
+            help='Jumlah pengulangan per kasus (default: 20)'
+        )
+        parser.add_argument(
+            '--riwayat', type=int, default=200,
+            help='Jumlah gambar riwayat untuk uji kecocokan top-1 (default: 200)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'Resampler aktif: {settings.PRAPROSES_RESAMPLER} '
+            f'(acuan: lanczos, decode penuh)\n'
+        )
+        self.stdout.write(
+            f'{"Input":<20}{"Lama (ms)":>12}{"Baru (ms)":>12}{"Speedup":>10}{"Selisih piksel":>16}'
+        )
+
+        for resolusi in options['resolusi']:
+            lebar, tinggi = (int(nilai) for nilai in resolusi.lower().split('x'))
+            for formatGambar in options['format']:
+                fileGambar = buatGambarSintetis(lebar, tinggi, formatGambar.upper())
+
+                waktuLama = self._ukurWaktu(prosesGambarLama, fileGambar, options['ulangan'])
+                waktuBaru = self._ukurWaktu(prosesGambar, fileGambar, options['ulangan'])
+                selisih = float(np.mean(np.abs(
+                    prosesGambarLama(fileGambar) - prosesGambar(fileGambar)
+                )))
+
+                self.stdout.write(
+                    f'{resolusi + " " + formatGambar.upper():<20}'
+                    f'{waktuLama * 1000:>12.2f}{waktuBaru * 1000:>12.2f}'
+                    f'{waktuLama / waktuBaru:>9.1f}x{selisih * 255:>16.2f}'
+                )
+
+        self._ukurKecocokan(options['riwayat'])
+
+    def _ukurWaktu(self, fungsiProses, fileGambar, ulangan):
+        fungsiProses(fileGambar)
+        waktuMulai = time.perf_counter()
+        for _ in range(ulangan):
+            fungsiProses(fileGambar)
+        return (time.perf_counter() - waktuMulai) / ulangan
+
+    def _ukurKecocokan(self, batasRiwayat):
+        if muatModel() is None:
+            self.stdout.write('\nModel tidak tersedia, uji kecocokan top-1 dilewati.')
+            return
+
+        daftarRiwayat = RiwayatDeteksi.objects.exclude(gambar='').order_by('-id')[:batasRiwayat]
+        jumlah = 0
+        cocok = 0
+        for riwayat in daftarRiwayat.iterator():
+            try:
+                with riwayat.gambar.open('rb') as fileGambar:
+                    arrayLama = prosesGambarLama(fileGambar)
+                    arrayBaru = prosesGambar(fileGambar)
+            except (OSError, ValueError):
+                continue
+            probabilitas = prediksiBatch(np.concatenate([arrayLama, arrayBaru]))
+            jumlah += 1
+            cocok += int(np.argmax(probabilitas[0]) == np.argmax(probabilitas[1]))
+
+        if jumlah == 0:
+            self.stdout.write('\nTidak ada gambar riwayat untuk uji kecocokan top-1.')
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\nKecocokan top-1 lama vs baru: {cocok}/{jumlah} '
+            f'({cocok / jumlah * 100:.1f}%)'
+        ))
@@ -0,0 +1,106 @@
+"""
+Management command untuk mengonversi model .keras ke TFLite dan ONNX.
+
+Setelah konversi, probabilitas kelas dari setiap format dibandingkan
+dengan model Keras asli agar aman dipilih lewat settings.MODEL_BACKEND.
+
+Jalankan dengan: python manage.py convert_model [--format tflite onnx]
+"""
+
+import os
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.backends import BackendKeras, dapatkanKelasBackend
+from api.utils import dapatkanJalurModel
+
+
+class Command(BaseCommand):
+    help = 'Mengonversi model .keras ke TFLite/ONNX dan memverifikasi probabilitasnya'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', nargs='+', choices=['tflite', 'onnx'],
+            default=['tflite', 'onnx'],
+            help='Format tujuan konversi (default: tflite onnx)'
+        )
+        parser.add_argument(
+            '--toleransi', type=float, default=1e-3,
+            help='Selisih probabilitas absolut maksimal yang diizinkan (default: 1e-3)'
+        )
+        parser.add_argument(
+            '--sampel', type=int, default=8,
+            help='Jumlah gambar acak untuk verifikasi (default: 8)'
+        )
+
+    def handle(self, *args, **options):
+        jalurKeras = settings.MODEL_PATH
+        if not os.path.exists(jalurKeras):
+            raise CommandError(f'File model tidak ditemukan di: {jalurKeras}')
+
+        self.stdout.write(f'Memuat model Keras dari {jalurKeras}...')
+        backendKeras = BackendKeras(jalurKeras)
+
+        lebar, tinggi = settings.UKURAN_GAMBAR_INPUT
+        generator = np.random.default_rng(0)
+        arraySampel = generator.random(
+            (options['sampel'], tinggi, lebar, 3), dtype=np.float32
+        )
+        probabilitasAcuan = backendKeras.prediksi(arraySampel)
+
+        gagal = []
+        for namaFormat in options['format']:
+            jalurTujuan = dapatkanJalurModel(namaFormat)
+            self.stdout.write(f'Mengonversi ke {namaFormat}: {jalurTujuan}')
+
+            if namaFormat == 'tflite':
+                self._konversiTFLite(backendKeras.model, jalurTujuan)
+            else:
+                self._konversiONNX(backendKeras.model, jalurTujuan, tinggi, lebar)
+
+            backend = dapatkanKelasBackend(namaFormat)(jalurTujuan)
+            probabilitas = backend.prediksi(arraySampel)
+
+            selisihMaks = float(np.max(np.abs(probabilitas - probabilitasAcuan)))
+            kecocokanTop1 = float(np.mean(
+                np.argmax(probabilitas, axis=1) == np.argmax(probabilitasAcuan, axis=1)
+            ))
+            ringkasan = (
+                f'  {namaFormat}: selisih maks {selisihMaks:.2e}, '
+                f'kecocokan top-1 {kecocokanTop1 * 100:.1f}%, '
+                f'ukuran {os.path.getsize(jalurTujuan) / 1e6:.1f} MB'
+            )
+
+            if selisihMaks <= options['toleransi']:
+                self.stdout.write(self.style.SUCCESS(ringkasan))
+            else:
+                self.stdout.write(self.style.ERROR(ringkasan))
+                gagal.append(namaFormat)
+
+        if gagal:
+            raise CommandError(
+                f'Probabilitas {", ".join(gagal)} melebihi toleransi {options["toleransi"]}'
+            )
+
+        self.stdout.write(self.style.SUCCESS('Konversi model selesai!'))
+
+    def _konversiTFLite(self, model, jalurTujuan):
+        import tensorflow as tf
+
+        konverter = tf.lite.TFLiteConverter.from_keras_model(model)
+        with open(jalurTujuan, 'wb') as berkas:
+            berkas.write(konverter.convert())
+
+    def _konversiONNX(self, model, jalurTujuan, tinggi, lebar):
+        try:
+            import tf2onnx
+        except ImportError:
+            raise CommandError('Konversi ONNX membutuhkan paket tf2onnx (pip install tf2onnx)')
+        import tensorflow as tf
+
+        signature = [tf.TensorSpec((None, tinggi, lebar, 3), tf.float32, name='input')]
+        tf2onnx.convert.from_keras(
+            model, input_signature=signature, opset=13, output_path=jalurTujuan
+        )
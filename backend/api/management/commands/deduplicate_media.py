@@ -0,0 +1,132 @@
+"""
+Management command untuk memindahkan gambar deteksi lama ke penyimpanan
+berbasis konten dan menghapus duplikatnya.
+
+Setiap file gambar riwayat yang belum berbasis konten di-hash (paralel),
+disalin ke deteksi/konten/<hash> jika blob tersebut belum ada, lalu semua
+riwayat yang merujuk file lama diarahkan ke blob. Thumbnail ikut
+dipindahkan. Terakhir, jumlah referensi BlobGambar dihitung ulang dari
+tabel riwayat.
+
+Jalankan dengan: python manage.py deduplicate_media [--dry-run] [--worker 4]
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from api.models import BlobGambar, RiwayatDeteksi
+from api.prediction_cache import hitungHashGambar
+from api.storage import PREFIKS_KONTEN, namaKonten, penyimpananKonten
+from api.thumbnails import VARIAN_THUMBNAIL, namaTurunan
+
+
+def hashFile(nama):
+    """
+    Menghitung hash dan nama blob untuk satu file gambar lama.
+
+    Returns:
+        tuple: (nama lama, nama blob atau None jika file hilang, ukuran)
+    """
+    try:
+        with penyimpananKonten.open(nama, 'rb') as fileGambar:
+            hashKonten = hitungHashGambar(fileGambar)
+        return nama, namaKonten(hashKonten, os.path.splitext(nama)[1]), penyimpananKonten.size(nama)
+    except FileNotFoundError:
+        return nama, None, 0
+
+
+class Command(BaseCommand):
+    help = 'Memindahkan gambar deteksi ke penyimpanan berbasis konten dan menghapus duplikat'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Hanya laporkan duplikat tanpa memindahkan atau menghapus file'
+        )
+        parser.add_argument(
+            '--worker', type=int, default=4,
+            help='Jumlah thread untuk hashing file (default: 4)'
+        )
+
+    def handle(self, *args, **options):
+        dryRun = options['dry_run']
+        daftarNama = list(
+            RiwayatDeteksi.objects.exclude(gambar='')
+            .exclude(gambar__startswith=PREFIKS_KONTEN + '/')
+            .values_list('gambar', flat=True).distinct()
+        )
+        self.stdout.write(f'Memeriksa {len(daftarNama)} file gambar lama...')
+
+        blobDilihat = set()
+        jumlahDuplikat = 0
+        byteDihemat = 0
+        jumlahHilang = 0
+
+        with ThreadPoolExecutor(max_workers=max(1, options['worker'])) as executor:
+            for namaLama, namaBlob, ukuran in executor.map(hashFile, daftarNama):
+                if namaBlob is None:
+                    jumlahHilang += 1
+                    self.stdout.write(self.style.WARNING(f'  File hilang: {namaLama}'))
+                    continue
+
+                if namaBlob in blobDilihat or penyimpananKonten.exists(namaBlob):
+                    jumlahDuplikat += 1
+                    byteDihemat += ukuran
+                blobDilihat.add(namaBlob)
+
+                if not dryRun:
+                    self._pindahkan(namaLama, namaBlob)
+
+        if not dryRun:
+            self._hitungUlangReferensi()
+
+        awalan = '[DRY RUN] ' if dryRun else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'\n{awalan}Selesai! {len(blobDilihat)} blob unik, {jumlahDuplikat} duplikat '
+            f'({byteDihemat / 1e6:.1f} MB dihemat), {jumlahHilang} file hilang.'
+        ))
+
+    def _pindahkan(self, namaLama, namaBlob):
+        if not penyimpananKonten.exists(namaBlob):
+            with penyimpananKonten.open(namaLama, 'rb') as fileGambar:
+                penyimpananKonten.save(namaBlob, fileGambar)
+
+        # Thumbnail lama ikut dipindahkan (atau dibuang jika blob sudah punya)
+        pembaruan = {'gambar': namaBlob}
+        for namaField, _ in VARIAN_THUMBNAIL:
+            turunanLama = namaTurunan(namaLama, namaField)
+            turunanBaru = namaTurunan(namaBlob, namaField)
+            if penyimpananKonten.exists(turunanLama):
+                if not penyimpananKonten.exists(turunanBaru):
+                    os.replace(penyimpananKonten.path(turunanLama), penyimpananKonten.path(turunanBaru))
+                else:
+                    penyimpananKonten.delete(turunanLama)
+            pembaruan[namaField] = turunanBaru if penyimpananKonten.exists(turunanBaru) else ''
+
+        with transaction.atomic():
+            RiwayatDeteksi.objects.filter(gambar=namaLama).update(**pembaruan)
+        penyimpananKonten.delete(namaLama)
+
+    def _hitungUlangReferensi(self):
+        jumlahPerBlob = (
+            RiwayatDeteksi.objects.filter(gambar__startswith=PREFIKS_KONTEN + '/')
+            .values('gambar').annotate(jumlah=Count('id'))
+        )
+        daftarBlob = []
+        for baris in jumlahPerBlob:
+            nama = baris['gambar']
+            ukuran = penyimpananKonten.size(nama) if penyimpananKonten.exists(nama) else 0
+            daftarBlob.append(BlobGambar(nama=nama, ukuran=ukuran, jumlah_referensi=baris['jumlah']))
+
+        with transaction.atomic():
+            BlobGambar.objects.update(jumlah_referensi=0)
+            BlobGambar.objects.bulk_create(
+                daftarBlob, batch_size=500, update_conflicts=True,
+                unique_fields=['nama'], update_fields=['ukuran', 'jumlah_referensi']
+            )
+            BlobGambar.objects.filter(jumlah_referensi=0).delete()
+        self.stdout.write(f'Jumlah referensi {len(daftarBlob)} blob dihitung ulang.')
@@ -0,0 +1,163 @@
+"""
+Management command untuk mengevaluasi kaskade model cepat -> model penuh.
+
+Gambar riwayat deteksi diproses sekali, lalu diprediksi oleh kedua model.
+Untuk setiap ambang kepercayaan dilaporkan rasio eskalasi ke model penuh,
+kecocokan top-1 jawaban model cepat dengan model penuh, kecocokan hasil
+akhir kaskade, dan perkiraan waktu inferensi per gambar. Model penuh
+dipakai sebagai acuan.
+
+Jalankan dengan: python manage.py evaluate_cascade [--riwayat 500] [--ambang 0.8 0.9 0.95]
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.cascade import muatModelCepat, perluEskalasi
+from api.models import RiwayatDeteksi
+from api.utils import muatModel, prosesGambar
+
+
+class Command(BaseCommand):
+    help = 'Mengukur rasio eskalasi dan kecocokan kaskade model pada gambar riwayat'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--riwayat', type=int, default=500,
+            help='Jumlah gambar riwayat terbaru yang dievaluasi (default: 500)'
+        )
+        parser.add_argument(
+            '--ambang', type=float, nargs='+', default=None,
+            help='Ambang kepercayaan yang dibandingkan (default: 0.7 0.8 0.9 0.95 '
+                 'dan KASKADE_AMBANG_KEPERCAYAAN)'
+        )
+        parser.add_argument(
+            '--ukuran-batch', type=int, default=32,
+            help='Jumlah gambar per forward pass (default: 32)'
+        )
+        parser.add_argument(
+            '--worker', type=int, default=4,
+            help='Jumlah thread untuk decode gambar (default: 4)'
+        )
+
+    def handle(self, *args, **options):
+        modelPenuh = muatModel()
+        modelCepat = muatModelCepat()
+        if modelPenuh is None or modelCepat is None:
+            raise CommandError(
+                f'Model penuh ({settings.MODEL_PATH}) dan model cepat '
+                f'({settings.MODEL_CEPAT_PATH}) harus tersedia.'
+            )
+
+        daftarAmbang = options['ambang'] or [0.7, 0.8, 0.9, 0.95]
+        daftarAmbang = sorted(set(daftarAmbang) | {settings.KASKADE_AMBANG_KEPERCAYAAN})
+
+        # Satu gambar dievaluasi sekali meski dipakai banyak riwayat
+        daftarNama = []
+        namaDilihat = set()
+        for nama in RiwayatDeteksi.objects.exclude(gambar='').order_by('-id') \
+                .values_list('gambar', flat=True).iterator():
+            if nama not in namaDilihat:
+                namaDilihat.add(nama)
+                daftarNama.append(nama)
+                if len(daftarNama) >= options['riwayat']:
+                    break
+        if not daftarNama:
+            self.stdout.write('Tidak ada gambar riwayat untuk dievaluasi.')
+            return
+
+        self.stdout.write(f'Mengevaluasi {len(daftarNama)} gambar riwayat...')
+        probabilitasCepat, probabilitasPenuh, waktuCepat, waktuPenuh = self._prediksiSemua(
+            daftarNama, modelCepat, modelPenuh,
+            ukuranBatch=max(1, options['ukuran_batch']), worker=max(1, options['worker']),
+        )
+        jumlah = len(probabilitasPenuh)
+        if jumlah == 0:
+            self.stdout.write('Tidak ada gambar riwayat yang dapat dibaca.')
+            return
+
+        kelasCepat = np.argmax(probabilitasCepat, axis=1)
+        kelasPenuh = np.argmax(probabilitasPenuh, axis=1)
+        cocok = kelasCepat == kelasPenuh
+        msCepat = waktuCepat / jumlah * 1000
+        msPenuh = waktuPenuh / jumlah * 1000
+
+        self.stdout.write(
+            f'\n{jumlah} gambar | model cepat {msCepat:.2f} ms/gambar, '
+            f'model penuh {msPenuh:.2f} ms/gambar | kecocokan top-1 tanpa kaskade: '
+            f'{cocok.mean() * 100:.1f}%'
+        )
+        if settings.KASKADE_KELAS_PANTAU:
+            self.stdout.write(f'Kelas pantau: {", ".join(settings.KASKADE_KELAS_PANTAU)}')
+
+        self.stdout.write(
+            f'\n{"Ambang":>8}{"Eskalasi":>11}{"Cocok (cepat)":>15}'
+            f'{"Cocok (akhir)":>15}{"ms/gambar":>11}{"Speedup":>9}'
+        )
+        for ambang in daftarAmbang:
+            eskalasi = perluEskalasi(probabilitasCepat, ambang=ambang)
+            dijawabCepat = ~eskalasi
+            # Jawaban yang dieskalasi sama dengan acuan
+            cocokAkhir = (cocok | eskalasi).mean()
+            cocokCepat = cocok[dijawabCepat].mean() if dijawabCepat.any() else 1.0
+            msKaskade = msCepat + eskalasi.mean() * msPenuh
+            penanda = ' *' if ambang == settings.KASKADE_AMBANG_KEPERCAYAAN else ''
+            self.stdout.write(
+                f'{ambang:>8.2f}{eskalasi.mean() * 100:>10.1f}%{cocokCepat * 100:>14.1f}%'
+                f'{cocokAkhir * 100:>14.1f}%{msKaskade:>11.2f}{msPenuh / msKaskade:>8.2f}x{penanda}'
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            '\n* = KASKADE_AMBANG_KEPERCAYAAN saat ini. Cocok (cepat): gambar yang '
+            'dijawab model cepat; Cocok (akhir): semua gambar.'
+        ))
+
+    def _prediksiSemua(self, daftarNama, modelCepat, modelPenuh, ukuranBatch, worker):
+        """
+        Decode gambar per potongan (paralel) lalu prediksi dengan kedua model.
+
+        Returns:
+            tuple: (probabilitas cepat, probabilitas penuh, total detik
+                model cepat, total detik model penuh)
+        """
+        lebar, tinggi = settings.UKURAN_GAMBAR_INPUT
+        arrayBatch = np.empty((ukuranBatch, tinggi, lebar, 3), dtype=np.float32)
+
+        def proses(argumen):
+            posisi, nama = argumen
+            try:
+                with RiwayatDeteksi._meta.get_field('gambar').storage.open(nama, 'rb') as fileGambar:
+                    prosesGambar(fileGambar, arrayBatch[posisi:posisi + 1])
+                return True
+            except (OSError, ValueError):
+                return False
+
+        hasilCepat = []
+        hasilPenuh = []
+        waktuCepat = 0.0
+        waktuPenuh = 0.0
+        with ThreadPoolExecutor(max_workers=worker) as executor:
+            for mulai in range(0, len(daftarNama), ukuranBatch):
+                potongan = daftarNama[mulai:mulai + ukuranBatch]
+                berhasil = list(executor.map(proses, enumerate(potongan)))
+                arrayValid = arrayBatch[:len(potongan)][np.array(berhasil)]
+                if not len(arrayValid):
+                    continue
+
+                waktuMulai = time.perf_counter()
+                hasilCepat.append(np.asarray(modelCepat.prediksi(arrayValid)))
+                waktuCepat += time.perf_counter() - waktuMulai
+
+                waktuMulai = time.perf_counter()
+                hasilPenuh.append(np.asarray(modelPenuh.prediksi(arrayValid)))
+                waktuPenuh += time.perf_counter() - waktuMulai
+
+                self.stdout.write(f'  Progres: {min(mulai + ukuranBatch, len(daftarNama))}/{len(daftarNama)}')
+
+        if not hasilPenuh:
+            return np.empty((0, 0)), np.empty((0, 0)), 0.0, 0.0
+        return np.concatenate(hasilCepat), np.concatenate(hasilPenuh), waktuCepat, waktuPenuh
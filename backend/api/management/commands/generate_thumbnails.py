@@ -0,0 +1,95 @@
+"""
+Management command untuk membuat thumbnail riwayat deteksi yang sudah ada.
+
+Riwayat diproses per potongan (chunk) id secara paralel; setiap potongan
+memuat barisnya sendiri sehingga memori tetap kecil meski riwayat banyak.
+
+Jalankan dengan: python manage.py generate_thumbnails [--semua] [--worker 4]
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.models import RiwayatDeteksi
+from api.thumbnails import buatThumbnail
+
+
+def prosesPotongan(daftarId, timpa=False):
+    """
+    Membuat thumbnail untuk satu potongan id riwayat.
+
+    Returns:
+        tuple: (jumlah berhasil, list pesan kegagalan)
+    """
+    close_old_connections()
+    berhasil = 0
+    daftarGagal = []
+    try:
+        for riwayat in RiwayatDeteksi.objects.filter(pk__in=daftarId):
+            try:
+                buatThumbnail(riwayat, timpa=timpa)
+                berhasil += 1
+            except Exception as kesalahan:
+                daftarGagal.append(f'Riwayat {riwayat.pk}: {kesalahan}')
+    finally:
+        close_old_connections()
+    return berhasil, daftarGagal
+
+
+class Command(BaseCommand):
+    help = 'Membuat thumbnail WebP untuk riwayat deteksi yang belum memilikinya'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--semua', action='store_true',
+            help='Buat ulang thumbnail untuk semua riwayat, bukan hanya yang belum ada'
+        )
+        parser.add_argument(
+            '--worker', type=int, default=4,
+            help='Jumlah thread paralel (default: 4)'
+        )
+        parser.add_argument(
+            '--ukuran-potongan', type=int, default=100,
+            help='Jumlah riwayat per potongan (default: 100)'
+        )
+
+    def handle(self, *args, **options):
+        riwayat = RiwayatDeteksi.objects.exclude(gambar='')
+        if not options['semua']:
+            riwayat = riwayat.filter(gambar_kecil='')
+        daftarId = list(riwayat.order_by('pk').values_list('pk', flat=True))
+
+        if not daftarId:
+            self.stdout.write(self.style.SUCCESS('Semua riwayat sudah memiliki thumbnail.'))
+            return
+
+        ukuranPotongan = max(1, options['ukuran_potongan'])
+        daftarPotongan = [
+            daftarId[indeks:indeks + ukuranPotongan]
+            for indeks in range(0, len(daftarId), ukuranPotongan)
+        ]
+        self.stdout.write(
+            f'Membuat thumbnail untuk {len(daftarId)} riwayat '
+            f'({len(daftarPotongan)} potongan, {options["worker"]} worker)...'
+        )
+
+        totalBerhasil = 0
+        totalGagal = 0
+        with ThreadPoolExecutor(max_workers=max(1, options['worker'])) as executor:
+            daftarFuture = [
+                executor.submit(prosesPotongan, potongan, options['semua'])
+                for potongan in daftarPotongan
+            ]
+            for future in as_completed(daftarFuture):
+                berhasil, daftarGagal = future.result()
+                totalBerhasil += berhasil
+                totalGagal += len(daftarGagal)
+                for pesan in daftarGagal:
+                    self.stdout.write(self.style.WARNING(f'  Gagal: {pesan}'))
+                self.stdout.write(f'  Progres: {totalBerhasil + totalGagal}/{len(daftarId)}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\nSelesai! {totalBerhasil} riwayat berhasil, {totalGagal} gagal.'
+        ))
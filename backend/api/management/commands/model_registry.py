@@ -0,0 +1,115 @@
+"""
+Management command untuk mengelola registri model (MODEL_REGISTRI_DIR).
+
+    daftar                          tampilkan semua versi dan versi aktif
+    tambah FILE --versi V           salin file model ke registri beserta metadata
+    aktifkan V                      jadikan V versi aktif (worker beralih sendiri)
+    verifikasi [V]                  periksa checksum dan kompatibilitas versi
+
+Worker dengan MODEL_REGISTRI_AKTIF=True memuat versi baru di latar belakang
+paling lambat MODEL_REGISTRI_INTERVAL_CEK detik setelah aktifkan.
+
+Jalankan dengan: python manage.py model_registry tambah model.onnx --versi v2 --aktifkan
+"""
+
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.backends import DAFTAR_BACKEND
+from api.model_registry import KesalahanRegistri, dapatkanRegistriModel
+
+
+class Command(BaseCommand):
+    help = 'Mengelola versi model di registri model (daftar, tambah, aktifkan, verifikasi)'
+
+    def add_arguments(self, parser):
+        subparser = parser.add_subparsers(dest='aksi', required=True)
+
+        subparser.add_parser('daftar', help='Menampilkan semua versi model')
+
+        parserTambah = subparser.add_parser('tambah', help='Menambahkan file model sebagai versi baru')
+        parserTambah.add_argument('file', help='Path file model (.keras, .tflite, atau .onnx)')
+        parserTambah.add_argument('--versi', required=True, help='Nama versi, mis. v2-mobilenet')
+        parserTambah.add_argument(
+            '--backend', choices=list(DAFTAR_BACKEND), default=None,
+            help='Backend inferensi (default: dari ekstensi file)'
+        )
+        parserTambah.add_argument('--catatan', default='', help='Keterangan versi')
+        parserTambah.add_argument(
+            '--aktifkan', action='store_true', help='Langsung jadikan versi aktif'
+        )
+
+        parserAktifkan = subparser.add_parser('aktifkan', help='Menjadikan versi sebagai versi aktif')
+        parserAktifkan.add_argument('versi')
+
+        parserVerifikasi = subparser.add_parser('verifikasi', help='Memeriksa checksum versi')
+        parserVerifikasi.add_argument('versi', nargs='?', help='Default: semua versi')
+
+    def handle(self, *args, **options):
+        registri = dapatkanRegistriModel()
+        try:
+            getattr(self, f'_{options["aksi"]}')(registri, options)
+        except KesalahanRegistri as kesalahan:
+            raise CommandError(str(kesalahan))
+
+    def _daftar(self, registri, options):
+        versiAktif = registri.versiAktif()
+        daftarVersi = registri.daftarVersi()
+        if not daftarVersi:
+            self.stdout.write(f'Registri kosong: {registri.direktori}')
+            return
+        for versiModel in daftarVersi:
+            penanda = '*' if versiModel.versi == versiAktif else ' '
+            self.stdout.write(
+                f'{penanda} {versiModel.versi:<20}{versiModel.backend:<8}'
+                f'{versiModel.checksum[:19]:<22}{versiModel.dibuat or "-":<34}{versiModel.catatan}'
+            )
+
+    def _tambah(self, registri, options):
+        jalurSumber = options['file']
+        if not os.path.isfile(jalurSumber):
+            raise CommandError(f'File model tidak ditemukan: {jalurSumber}')
+
+        backend = options['backend']
+        if backend is None:
+            ekstensi = os.path.splitext(jalurSumber)[1].lower()
+            backend = next(
+                (nama for nama, kelas in DAFTAR_BACKEND.items() if kelas.ekstensi == ekstensi), None
+            )
+            if backend is None:
+                raise CommandError('Backend tidak dapat ditebak dari ekstensi file; isi --backend.')
+
+        versiModel = registri.tambah(
+            jalurSumber, options['versi'], backend, catatan=options['catatan']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Versi {versiModel.versi} ditambahkan ({versiModel.backend}, {versiModel.checksum}).'
+        ))
+        if options['aktifkan']:
+            self._aktifkan(registri, {'versi': versiModel.versi})
+
+    def _aktifkan(self, registri, options):
+        versiModel = registri.aktifkan(options['versi'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Versi aktif: {versiModel.versi}. Worker beralih setelah model selesai dimuat.'
+        ))
+
+    def _verifikasi(self, registri, options):
+        if options['versi']:
+            daftarVersi = [registri.bacaVersi(options['versi'])]
+        else:
+            daftarVersi = registri.daftarVersi()
+
+        jumlahGagal = 0
+        for versiModel in daftarVersi:
+            try:
+                versiModel.periksaKompatibel()
+                versiModel.periksaChecksum()
+                self.stdout.write(f'  {versiModel.versi}: OK')
+            except KesalahanRegistri as kesalahan:
+                jumlahGagal += 1
+                self.stdout.write(self.style.ERROR(f'  {versiModel.versi}: {kesalahan}'))
+        if jumlahGagal:
+            raise CommandError(f'{jumlahGagal} versi tidak valid.')
+        self.stdout.write(self.style.SUCCESS(f'{len(daftarVersi)} versi valid.'))
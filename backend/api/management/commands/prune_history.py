@@ -0,0 +1,330 @@
+"""
+Management command untuk retensi riwayat deteksi dan pembersihan media.
+
+Dua kebijakan retensi (boleh digabung, 0 berarti nonaktif):
+    --hari N           hapus riwayat yang lebih tua dari N hari
+    --maks-per-user N  simpan hanya N riwayat terbaru per pengguna
+
+Riwayat dihapus per potongan (--ukuran-potongan) dalam transaksi terpisah,
+sehingga kunci tabel hanya dipegang sebentar. Penghapusan memakai
+QuerySet.delete() agar signal tetap mengurangi rollup StatistikHarian dan
+melepas referensi BlobGambar (file dihapus setelah commit jika tidak ada
+riwayat lain yang memakainya).
+
+Setelah itu direktori media deteksi/ ditelusuri secara paralel (--worker)
+untuk menghapus file yatim: blob tanpa BlobGambar, thumbnail tanpa blob,
+file lama yang tidak dirujuk riwayat mana pun, dan sisa file sementara
+upload. File yang lebih baru dari --umur-min-jam tidak pernah disentuh,
+karena file upload ditulis sebelum riwayatnya di-commit (terutama saat
+write-behind aktif).
+
+Jalankan dengan: python manage.py prune_history [--hari 365] [--maks-per-user 500] [--dry-run]
+"""
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from api.models import BlobGambar, RiwayatDeteksi
+from api.storage import PREFIKS_KONTEN, penyimpananKonten
+from api.thumbnails import VARIAN_THUMBNAIL
+
+
+PREFIKS_MEDIA = 'deteksi'
+
+# Awalan file sementara PenyimpananKonten._save
+PREFIKS_SEMENTARA = '.unggah-'
+
+# Jumlah nama per query IN saat memeriksa referensi file
+UKURAN_POTONGAN_NAMA = 500
+
+# Akhiran nama thumbnail dari thumbnails.namaTurunan, mis. '_kecil.webp'
+AKHIRAN_THUMBNAIL = tuple(
+    f'_{namaField.split("_", 1)[1]}.webp' for namaField, _ in VARIAN_THUMBNAIL
+)
+
+
+def kondisiRetensi(idUser, batasWaktu, maksPerUser):
+    """
+    Membentuk filter riwayat milik satu pengguna yang harus dihapus.
+
+    Args:
+        idUser: ID pengguna.
+        batasWaktu: Riwayat sebelum waktu ini dihapus (None = nonaktif).
+        maksPerUser: Jumlah riwayat terbaru yang disimpan (0 = nonaktif).
+
+    Returns:
+        Q: Filter riwayat, atau None jika tidak ada yang perlu dihapus.
+    """
+    kondisi = None
+    if batasWaktu is not None:
+        kondisi = Q(created_at__lt=batasWaktu)
+    if maksPerUser:
+        # Riwayat ke-N terbaru menjadi batas keyset (created_at, id)
+        batas = (
+            RiwayatDeteksi.objects.filter(user_id=idUser)
+            .order_by('-created_at', '-id')
+            .values_list('created_at', 'id')[maksPerUser - 1:maksPerUser]
+            .first()
+        )
+        if batas is not None:
+            waktuBatas, idBatas = batas
+            lebihLama = Q(created_at__lt=waktuBatas) | Q(created_at=waktuBatas, id__lt=idBatas)
+            kondisi = lebihLama if kondisi is None else kondisi | lebihLama
+    return kondisi
+
+
+def _dipakai(nama, referensi):
+    # File thumbnail dipakai jika blob aslinya masih dirujuk
+    for akhiran in AKHIRAN_THUMBNAIL:
+        if nama.endswith(akhiran):
+            return nama in referensi or nama[:-len(akhiran)] in referensi
+    return nama in referensi
+
+
+def _referensiDirektori(relatif, daftarNama):
+    """
+    Mencari nama file di satu direktori yang masih dirujuk database.
+
+    Blob berbasis konten dicek ke BlobGambar (indeks unik nama); file lama
+    dicek ke kolom gambar/thumbnail RiwayatDeteksi.
+
+    Returns:
+        set: Nama lengkap yang dirujuk, ditambah stem blob (tanpa
+        ekstensi) agar thumbnail-nya ikut dianggap dipakai.
+    """
+    referensi = set()
+    namaLengkap = [f'{relatif}/{nama}' for nama in daftarNama]
+    for indeks in range(0, len(namaLengkap), UKURAN_POTONGAN_NAMA):
+        potongan = namaLengkap[indeks:indeks + UKURAN_POTONGAN_NAMA]
+        if relatif == PREFIKS_KONTEN or relatif.startswith(PREFIKS_KONTEN + '/'):
+            referensi.update(BlobGambar.objects.filter(nama__in=potongan).values_list('nama', flat=True))
+        else:
+            for gambar, gambarKecil, gambarSedang in RiwayatDeteksi.objects.filter(
+                Q(gambar__in=potongan) | Q(gambar_kecil__in=potongan) | Q(gambar_sedang__in=potongan)
+            ).values_list('gambar', 'gambar_kecil', 'gambar_sedang'):
+                referensi.update((gambar, gambarKecil, gambarSedang))
+    referensi.update(os.path.splitext(nama)[0] for nama in list(referensi) if nama)
+    return referensi
+
+
+def periksaDirektori(relatif, batasMtime, dryRun):
+    """
+    Memeriksa satu direktori media dan menghapus file yatimnya.
+
+    Dijalankan di thread worker; setiap thread memakai koneksi database
+    sendiri yang ditutup setelah selesai.
+
+    Args:
+        relatif: Path direktori relatif terhadap MEDIA_ROOT.
+        batasMtime: File dengan mtime setelah timestamp ini dilewati.
+        dryRun: Jika True, file hanya dilaporkan.
+
+    Returns:
+        tuple: (daftar subdirektori, jumlah file yatim, byte yatim)
+    """
+    try:
+        subdirektori = []
+        kandidat = {}
+        with os.scandir(penyimpananKonten.path(relatif)) as daftarEntri:
+            for entri in daftarEntri:
+                if entri.is_dir(follow_symlinks=False):
+                    subdirektori.append(f'{relatif}/{entri.name}')
+                elif entri.is_file(follow_symlinks=False):
+                    info = entri.stat(follow_symlinks=False)
+                    if info.st_mtime <= batasMtime:
+                        kandidat[entri.name] = info.st_size
+
+        # Sisa file sementara upload yang gagal selalu yatim
+        referensi = _referensiDirektori(
+            relatif, [nama for nama in kandidat if not nama.startswith(PREFIKS_SEMENTARA)]
+        )
+        jumlahYatim = 0
+        byteYatim = 0
+        for nama, ukuran in kandidat.items():
+            namaLengkap = f'{relatif}/{nama}'
+            if not nama.startswith(PREFIKS_SEMENTARA) and _dipakai(namaLengkap, referensi):
+                continue
+            jumlahYatim += 1
+            byteYatim += ukuran
+            if not dryRun:
+                penyimpananKonten.delete(namaLengkap)
+        return subdirektori, jumlahYatim, byteYatim
+    finally:
+        connection.close()
+
+
+def formatByte(jumlahByte):
+    """Format jumlah byte dalam MB (mis. '12.3 MB')."""
+    return f'{jumlahByte / (1024 * 1024):.1f} MB'
+
+
+class Command(BaseCommand):
+    help = 'Menghapus riwayat deteksi lama sesuai kebijakan retensi dan file media yatim'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hari', type=int, default=settings.RIWAYAT_RETENSI_HARI,
+            help='Hapus riwayat lebih tua dari N hari (default: RIWAYAT_RETENSI_HARI, 0 = nonaktif)'
+        )
+        parser.add_argument(
+            '--maks-per-user', type=int, default=settings.RIWAYAT_MAKS_PER_USER,
+            help='Simpan hanya N riwayat terbaru per pengguna (default: RIWAYAT_MAKS_PER_USER, 0 = nonaktif)'
+        )
+        parser.add_argument(
+            '--ukuran-potongan', type=int, default=500,
+            help='Jumlah riwayat per transaksi penghapusan (default: 500)'
+        )
+        parser.add_argument(
+            '--worker', type=int, default=4,
+            help='Jumlah thread untuk menelusuri direktori media (default: 4)'
+        )
+        parser.add_argument(
+            '--umur-min-jam', type=float, default=24,
+            help='File media yang lebih baru dari N jam tidak dihapus (default: 24)'
+        )
+        parser.add_argument(
+            '--tanpa-media', action='store_true',
+            help='Lewati pembersihan file media yatim'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Hanya laporkan apa yang akan dihapus'
+        )
+
+    def handle(self, *args, **options):
+        waktuMulai = time.monotonic()
+        dryRun = options['dry_run']
+        if dryRun:
+            self.stdout.write(self.style.WARNING('Mode dry-run: tidak ada yang dihapus.'))
+
+        jumlahRiwayat = self.pangkasRiwayat(
+            hari=max(0, options['hari']),
+            maksPerUser=max(0, options['maks_per_user']),
+            ukuranPotongan=max(1, options['ukuran_potongan']),
+            dryRun=dryRun,
+        )
+
+        jumlahYatim = byteYatim = 0
+        if not options['tanpa_media']:
+            jumlahYatim, byteYatim = self.bersihkanMedia(
+                worker=max(1, options['worker']),
+                umurMinJam=max(0.0, options['umur_min_jam']),
+                dryRun=dryRun,
+            )
+
+        kata = 'akan dihapus' if dryRun else 'dihapus'
+        self.stdout.write(self.style.SUCCESS(
+            f'\nSelesai dalam {time.monotonic() - waktuMulai:.1f} detik! '
+            f'{jumlahRiwayat} riwayat {kata}, '
+            f'{jumlahYatim} file yatim ({formatByte(byteYatim)}) {kata}.'
+        ))
+
+    def pangkasRiwayat(self, hari, maksPerUser, ukuranPotongan, dryRun):
+        """
+        Menerapkan kebijakan retensi per pengguna.
+
+        ID riwayat dikumpulkan lintas pengguna sampai satu potongan penuh,
+        lalu dihapus dalam satu transaksi. Query per pengguna memakai
+        indeks riwayat_user_waktu_idx.
+
+        Returns:
+            int: Jumlah riwayat yang dihapus (atau akan dihapus).
+        """
+        if not hari and not maksPerUser:
+            self.stdout.write('Kebijakan retensi nonaktif (--hari dan --maks-per-user = 0).')
+            return 0
+
+        batasWaktu = timezone.now() - timedelta(days=hari) if hari else None
+        daftarIdUser = set()
+        if batasWaktu is not None:
+            daftarIdUser.update(
+                RiwayatDeteksi.objects.filter(created_at__lt=batasWaktu)
+                .order_by().values_list('user_id', flat=True).distinct()
+            )
+        if maksPerUser:
+            daftarIdUser.update(
+                RiwayatDeteksi.objects.order_by().values('user_id')
+                .annotate(jumlah=Count('id')).filter(jumlah__gt=maksPerUser)
+                .values_list('user_id', flat=True)
+            )
+        self.stdout.write(f'Menerapkan retensi untuk {len(daftarIdUser)} pengguna...')
+
+        total = 0
+        antrean = []
+
+        def hapusAntrean():
+            nonlocal total
+            with transaction.atomic():
+                RiwayatDeteksi.objects.filter(pk__in=antrean).delete()
+            total += len(antrean)
+            antrean.clear()
+            self.stdout.write(f'  Progres: {total} riwayat dihapus')
+
+        for idUser in sorted(daftarIdUser):
+            kondisi = kondisiRetensi(idUser, batasWaktu, maksPerUser)
+            if kondisi is None:
+                continue
+            riwayat = RiwayatDeteksi.objects.filter(kondisi, user_id=idUser)
+            if dryRun:
+                jumlah = riwayat.count()
+                total += jumlah
+                if jumlah:
+                    self.stdout.write(f'  User {idUser}: {jumlah} riwayat')
+                continue
+
+            while True:
+                sisa = ukuranPotongan - len(antrean)
+                daftarId = list(
+                    riwayat.order_by('-created_at', '-id').values_list('pk', flat=True)[:sisa]
+                )
+                antrean.extend(daftarId)
+                if len(antrean) >= ukuranPotongan:
+                    hapusAntrean()
+                if len(daftarId) < sisa:
+                    break
+
+        if antrean:
+            hapusAntrean()
+        return total
+
+    def bersihkanMedia(self, worker, umurMinJam, dryRun):
+        """
+        Menelusuri MEDIA_ROOT/deteksi secara paralel dan menghapus file yatim.
+
+        Setiap direktori diproses satu tugas; subdirektori yang ditemukan
+        langsung dijadwalkan sebagai tugas baru.
+
+        Returns:
+            tuple: (jumlah file yatim, total byte)
+        """
+        if not penyimpananKonten.exists(PREFIKS_MEDIA):
+            return 0, 0
+
+        self.stdout.write(f'Menelusuri media {PREFIKS_MEDIA}/ dengan {worker} worker...')
+        batasMtime = time.time() - umurMinJam * 3600
+        jumlahYatim = 0
+        byteYatim = 0
+        jumlahDirektori = 0
+
+        with ThreadPoolExecutor(max_workers=worker) as executor:
+            berjalan = {executor.submit(periksaDirektori, PREFIKS_MEDIA, batasMtime, dryRun)}
+            while berjalan:
+                selesai, berjalan = wait(berjalan, return_when=FIRST_COMPLETED)
+                for futur in selesai:
+                    subdirektori, jumlah, ukuran = futur.result()
+                    jumlahDirektori += 1
+                    jumlahYatim += jumlah
+                    byteYatim += ukuran
+                    for relatif in subdirektori:
+                        berjalan.add(executor.submit(periksaDirektori, relatif, batasMtime, dryRun))
+
+        self.stdout.write(f'  {jumlahDirektori} direktori diperiksa')
+        return jumlahYatim, byteYatim
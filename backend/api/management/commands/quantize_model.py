@@ -0,0 +1,167 @@
+"""
+Management command untuk membuat varian model terkuantisasi.
+
+Menghasilkan varian TFLite dynamic-range, float16, dan int8 penuh dari
+model .keras. Kalibrasi int8 memakai gambar dari RiwayatDeteksi. Setiap
+varian dibandingkan dengan model float dalam ukuran, waktu muat, latensi
+per gambar, dan kecocokan kelas top-1.
+
+Varian dipakai untuk serving dengan MODEL_BACKEND=tflite dan
+MODEL_KUANTISASI=<varian>.
+
+Jalankan dengan: python manage.py quantize_model [--varian dinamis float16 int8]
+"""
+
+import os
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.backends import BackendKeras, BackendTFLite
+from api.models import RiwayatDeteksi
+from api.utils import dapatkanJalurModel, prosesGambar
+
+
+DAFTAR_VARIAN = ['dinamis', 'float16', 'int8']
+
+
+class Command(BaseCommand):
+    help = 'Membuat varian model terkuantisasi dan membandingkannya dengan model float'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--varian', nargs='+', choices=DAFTAR_VARIAN, default=DAFTAR_VARIAN,
+            help='Varian yang dibuat (default: dinamis float16 int8)'
+        )
+        parser.add_argument(
+            '--kalibrasi', type=int, default=200,
+            help='Jumlah gambar riwayat untuk kalibrasi int8 (default: 200)'
+        )
+        parser.add_argument(
+            '--evaluasi', type=int, default=300,
+            help='Jumlah gambar riwayat untuk evaluasi kecocokan (default: 300)'
+        )
+
+    def handle(self, *args, **options):
+        jalurKeras = settings.MODEL_PATH
+        if not os.path.exists(jalurKeras):
+            raise CommandError(f'File model tidak ditemukan di: {jalurKeras}')
+
+        import tensorflow as tf
+
+        self.stdout.write(f'Memuat model float dari {jalurKeras}...')
+        waktuMulai = time.perf_counter()
+        backendFloat = BackendKeras(jalurKeras)
+        waktuMuatFloat = time.perf_counter() - waktuMulai
+
+        # Gambar kalibrasi dan evaluasi diambil dari riwayat yang berbeda
+        jumlahKalibrasi = options['kalibrasi']
+        daftarGambar = self._muatGambarRiwayat(jumlahKalibrasi + options['evaluasi'])
+        gambarKalibrasi = daftarGambar[:jumlahKalibrasi]
+        gambarEvaluasi = daftarGambar[jumlahKalibrasi:] or gambarKalibrasi
+
+        if not daftarGambar:
+            self.stdout.write(self.style.WARNING(
+                'Tidak ada gambar riwayat; kalibrasi dan evaluasi memakai gambar acak.'
+            ))
+            lebar, tinggi = settings.UKURAN_GAMBAR_INPUT
+            generator = np.random.default_rng(0)
+            gambarKalibrasi = gambarEvaluasi = [
+                generator.random((1, tinggi, lebar, 3), dtype=np.float32)
+                for _ in range(32)
+            ]
+
+        arrayEvaluasi = np.concatenate(gambarEvaluasi)
+        kelasFloat = np.argmax(backendFloat.prediksi(arrayEvaluasi), axis=1)
+
+        laporan = [self._ukurBackend(
+            'float32 (keras)', backendFloat, jalurKeras, waktuMuatFloat,
+            arrayEvaluasi, kelasFloat
+        )]
+
+        for varian in options['varian']:
+            jalurVarian = dapatkanJalurModel('tflite', varian)
+            self.stdout.write(f'Membuat varian {varian}: {jalurVarian}')
+
+            konverter = tf.lite.TFLiteConverter.from_keras_model(backendFloat.model)
+            konverter.optimizations = [tf.lite.Optimize.DEFAULT]
+            if varian == 'float16':
+                konverter.target_spec.supported_types = [tf.float16]
+            elif varian == 'int8':
+                konverter.representative_dataset = lambda: ([gambar] for gambar in gambarKalibrasi)
+                konverter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+            with open(jalurVarian, 'wb') as berkas:
+                berkas.write(konverter.convert())
+
+            waktuMulai = time.perf_counter()
+            backend = BackendTFLite(jalurVarian)
+            waktuMuat = time.perf_counter() - waktuMulai
+            laporan.append(self._ukurBackend(
+                varian, backend, jalurVarian, waktuMuat, arrayEvaluasi, kelasFloat
+            ))
+
+        self._tulisLaporan(laporan, len(arrayEvaluasi))
+
+    def _muatGambarRiwayat(self, batas):
+        daftarGambar = []
+        daftarRiwayat = RiwayatDeteksi.objects.exclude(gambar='').order_by('-id')[:batas]
+        for riwayat in daftarRiwayat.iterator():
+            try:
+                with riwayat.gambar.open('rb') as fileGambar:
+                    daftarGambar.append(prosesGambar(fileGambar))
+            except (OSError, ValueError):
+                continue
+        return daftarGambar
+
+    def _ukurBackend(self, nama, backend, jalurModel, waktuMuat, arrayEvaluasi, kelasFloat):
+        # Latensi per gambar diukur dengan batch 1, seperti di PrediksiView
+        backend.prediksi(arrayEvaluasi[:1])
+        daftarKelas = []
+        waktuMulai = time.perf_counter()
+        for indeks in range(len(arrayEvaluasi)):
+            probabilitas = backend.prediksi(arrayEvaluasi[indeks:indeks + 1])
+            daftarKelas.append(int(np.argmax(probabilitas[0])))
+        latensi = (time.perf_counter() - waktuMulai) / len(arrayEvaluasi)
+
+        kelasVarian = np.array(daftarKelas)
+        kecocokanPerKelas = {}
+        for indeksKelas, namaKelas in enumerate(settings.DAFTAR_KELAS_PENYAKIT):
+            maskKelas = kelasFloat == indeksKelas
+            if maskKelas.any():
+                kecocokanPerKelas[namaKelas] = float(np.mean(kelasVarian[maskKelas] == indeksKelas))
+
+        return {
+            'nama': nama,
+            'ukuranMB': os.path.getsize(jalurModel) / 1e6,
+            'waktuMuat': waktuMuat,
+            'latensiMs': latensi * 1000,
+            'kecocokan': float(np.mean(kelasVarian == kelasFloat)),
+            'kecocokanPerKelas': kecocokanPerKelas,
+        }
+
+    def _tulisLaporan(self, laporan, jumlahEvaluasi):
+        self.stdout.write(f'\nEvaluasi pada {jumlahEvaluasi} gambar:\n')
+        self.stdout.write(
+            f'{"Varian":<18}{"Ukuran (MB)":>12}{"Muat (s)":>10}'
+            f'{"Latensi (ms)":>14}{"Top-1 cocok":>13}'
+        )
+        for baris in laporan:
+            self.stdout.write(
+                f'{baris["nama"]:<18}{baris["ukuranMB"]:>12.2f}{baris["waktuMuat"]:>10.2f}'
+                f'{baris["latensiMs"]:>14.2f}{baris["kecocokan"] * 100:>12.1f}%'
+            )
+
+        self.stdout.write('\nKecocokan top-1 per kelas (terhadap model float):')
+        for baris in laporan[1:]:
+            rincian = ', '.join(
+                f'{namaKelas} {nilai * 100:.0f}%'
+                for namaKelas, nilai in baris['kecocokanPerKelas'].items()
+            )
+            self.stdout.write(f'  {baris["nama"]}: {rincian}')
+
+        self.stdout.write(self.style.SUCCESS(
+            '\nSelesai! Pilih varian dengan MODEL_BACKEND=tflite dan MODEL_KUANTISASI=<varian>.'
+        ))
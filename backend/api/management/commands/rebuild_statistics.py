@@ -0,0 +1,68 @@
+"""
+Management command untuk membangun ulang rollup StatistikHarian.
+
+Riwayat diagregasi per potongan pengguna: untuk setiap potongan, rollup
+lama dihapus dan diganti hasil GROUP BY riwayatnya dalam satu transaksi,
+sehingga memori dan durasi kunci tetap kecil meski riwayat banyak.
+Jalankan sekali setelah migrasi, atau kapan pun rollup diragukan.
+
+Riwayat yang dibuat/dihapus saat potongan yang sama sedang diproses bisa
+terhitung ganda atau hilang; jalankan saat trafik rendah.
+
+Jalankan dengan: python manage.py rebuild_statistics [--ukuran-potongan 200]
+"""
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import RiwayatDeteksi, StatistikHarian
+from api.statistics import hitungRollupDariRiwayat
+
+
+class Command(BaseCommand):
+    help = 'Membangun ulang rollup statistik harian dari riwayat deteksi'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ukuran-potongan', type=int, default=200,
+            help='Jumlah pengguna per potongan (default: 200)'
+        )
+
+    def handle(self, *args, **options):
+        daftarIdUser = list(
+            User.objects.filter(riwayat_deteksi__isnull=False)
+            .distinct().order_by('pk').values_list('pk', flat=True)
+        )
+        ukuranPotongan = max(1, options['ukuran_potongan'])
+
+        # Rollup pengguna yang tidak lagi punya riwayat
+        with transaction.atomic():
+            terhapus, _ = StatistikHarian.objects.exclude(
+                user_id__in=RiwayatDeteksi.objects.values('user_id')
+            ).delete()
+        if terhapus:
+            self.stdout.write(f'  {terhapus} rollup tanpa riwayat dihapus')
+
+        if not daftarIdUser:
+            self.stdout.write(self.style.SUCCESS('Tidak ada riwayat deteksi.'))
+            return
+
+        self.stdout.write(f'Membangun rollup untuk {len(daftarIdUser)} pengguna...')
+        totalBaris = 0
+        for indeks in range(0, len(daftarIdUser), ukuranPotongan):
+            potongan = daftarIdUser[indeks:indeks + ukuranPotongan]
+            with transaction.atomic():
+                StatistikHarian.objects.filter(user_id__in=potongan).delete()
+                daftarBaris = hitungRollupDariRiwayat(
+                    RiwayatDeteksi.objects.filter(user_id__in=potongan)
+                )
+                StatistikHarian.objects.bulk_create(daftarBaris, batch_size=1000)
+            totalBaris += len(daftarBaris)
+            self.stdout.write(
+                f'  Progres: {min(indeks + ukuranPotongan, len(daftarIdUser))}/{len(daftarIdUser)} pengguna'
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\nSelesai! {totalBaris} baris rollup dibuat.'
+        ))
@@ -0,0 +1,255 @@
+"""
+Instrumentasi waktu per tahap dan metrik Prometheus untuk ChiliGuard.
+
+Setiap request prediksi mencatat durasi tahapnya (parse, decode, prediksi,
+query katalog, tulis DB, ...) ke ContextVar. Di akhir request, durasi
+dikirim sebagai header Server-Timing dan dimasukkan ke histogram dalam
+proses yang diekspos oleh /api/metrics/ dalam format teks Prometheus.
+
+Saat settings.INSTRUMENTASI_AKTIF mati, ukurTahap() hanya membaca satu
+ContextVar dan mengembalikan context manager kosong.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+
+from django.conf import settings
+
+
+# Batas bucket histogram latensi (detik)
+BATAS_BUCKET = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Kelompok ukuran file upload untuk label histogram
+KELOMPOK_UKURAN = (
+    (256 * 1024, '<256KB'),
+    (1024 * 1024, '256KB-1MB'),
+    (3 * 1024 * 1024, '1-3MB'),
+    (5 * 1024 * 1024, '3-5MB'),
+)
+
+_catatanRequest = contextvars.ContextVar('catatanRequest', default=None)
+
+
+class CatatanRequest:
+    """Durasi tahap dan label satu request yang sedang diukur."""
+
+    __slots__ = ('tahap', 'label')
+
+    def __init__(self):
+        self.tahap = {}
+        self.label = {}
+
+
+class _TanpaPengukuran:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_TANPA_PENGUKURAN = _TanpaPengukuran()
+
+
+class _PengukurTahap:
+    __slots__ = ('catatan', 'nama', 'mulai')
+
+    def __init__(self, catatan, nama):
+        self.catatan = catatan
+        self.nama = nama
+
+    def __enter__(self):
+        self.mulai = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        durasi = time.perf_counter() - self.mulai
+        self.catatan.tahap[self.nama] = self.catatan.tahap.get(self.nama, 0.0) + durasi
+        return False
+
+
+def ukurTahap(namaTahap):
+    """
+    Context manager untuk mengukur durasi satu tahap request saat ini.
+
+    Args:
+        namaTahap: Nama tahap (dipakai di Server-Timing dan label histogram).
+    """
+    catatan = _catatanRequest.get()
+    if catatan is None:
+        return _TANPA_PENGUKURAN
+    return _PengukurTahap(catatan, namaTahap)
+
+
+def catatLabel(nama, nilai):
+    """Menyimpan label request saat ini (mis. kelas hasil prediksi)."""
+    catatan = _catatanRequest.get()
+    if catatan is not None:
+        catatan.label[nama] = nilai
+
+
+def mulaiPengukuran():
+    """
+    Memulai pengukuran untuk request saat ini.
+
+    Returns:
+        Token ContextVar, atau None jika instrumentasi dimatikan.
+    """
+    if not settings.INSTRUMENTASI_AKTIF:
+        return None
+    return _catatanRequest.set(CatatanRequest())
+
+
+def selesaiPengukuran(token, respons):
+    """
+    Mengakhiri pengukuran: menulis header Server-Timing dan mengisi histogram.
+
+    Args:
+        token: Token dari mulaiPengukuran().
+        respons: Response yang akan dikirim ke klien (None jika request
+            berakhir dengan exception; catatan dibuang).
+    """
+    catatan = _catatanRequest.get()
+    _catatanRequest.reset(token)
+    if catatan is None or respons is None:
+        return
+
+    respons['Server-Timing'] = ', '.join(
+        f'{nama};dur={durasi * 1000:.2f}' for nama, durasi in catatan.tahap.items()
+    )
+
+    for nama, durasi in catatan.tahap.items():
+        registri.amati('chiliguard_tahap_durasi_detik', {'tahap': nama}, durasi)
+
+    durasiTotal = catatan.tahap.get('total')
+    if durasiTotal is None:
+        return
+    if 'kelas' in catatan.label:
+        registri.amati(
+            'chiliguard_prediksi_durasi_per_kelas_detik',
+            {'kelas': catatan.label['kelas']}, durasiTotal
+        )
+    if 'ukuranFile' in catatan.label:
+        registri.amati(
+            'chiliguard_prediksi_durasi_per_ukuran_detik',
+            {'ukuran': kelompokUkuran(catatan.label['ukuranFile'])}, durasiTotal
+        )
+
+
+def kelompokUkuran(ukuranByte):
+    """Mengelompokkan ukuran file upload untuk label histogram."""
+    for batas, nama in KELOMPOK_UKURAN:
+        if ukuranByte < batas:
+            return nama
+    return '>5MB'
+
+
+class Histogram:
+    """Histogram kumulatif bergaya Prometheus untuk satu kombinasi label."""
+
+    __slots__ = ('jumlahPerBucket', 'total', 'jumlah')
+
+    def __init__(self):
+        self.jumlahPerBucket = [0] * (len(BATAS_BUCKET) + 1)
+        self.total = 0.0
+        self.jumlah = 0
+
+    def amati(self, nilai):
+        self.jumlahPerBucket[bisect.bisect_left(BATAS_BUCKET, nilai)] += 1
+        self.total += nilai
+        self.jumlah += 1
+
+
+class RegistriMetrik:
+    """
+    Kumpulan histogram dalam proses ini.
+
+    Setiap proses worker (gunicorn/uvicorn) memiliki registrinya sendiri;
+    Prometheus menjumlahkannya saat men-scrape semua worker.
+    """
+
+    DESKRIPSI = {
+        'chiliguard_tahap_durasi_detik': 'Durasi setiap tahap request prediksi',
+        'chiliguard_prediksi_durasi_per_kelas_detik': 'Durasi request prediksi per kelas hasil',
+        'chiliguard_prediksi_durasi_per_ukuran_detik': 'Durasi request prediksi per ukuran file upload',
+    }
+
+    def __init__(self):
+        self._histogram = {}
+        self._kunci = threading.Lock()
+
+    def amati(self, namaMetrik, label, nilai):
+        kunciLabel = (namaMetrik, tuple(sorted(label.items())))
+        with self._kunci:
+            histogram = self._histogram.get(kunciLabel)
+            if histogram is None:
+                histogram = self._histogram[kunciLabel] = Histogram()
+            histogram.amati(nilai)
+
+    def reset(self):
+        with self._kunci:
+            self._histogram.clear()
+
+    def renderPrometheus(self):
+        """
+        Returns:
+            str: Semua histogram dalam format teks Prometheus 0.0.4.
+        """
+        with self._kunci:
+            salinan = sorted(
+                (kunci, list(h.jumlahPerBucket), h.total, h.jumlah)
+                for kunci, h in self._histogram.items()
+            )
+
+        baris = []
+        namaSebelumnya = None
+        for (namaMetrik, label), jumlahPerBucket, total, jumlah in salinan:
+            if namaMetrik != namaSebelumnya:
+                baris.append(f'# HELP {namaMetrik} {self.DESKRIPSI.get(namaMetrik, namaMetrik)}')
+                baris.append(f'# TYPE {namaMetrik} histogram')
+                namaSebelumnya = namaMetrik
+
+            kumulatif = 0
+            for batas, jumlahBucket in zip(BATAS_BUCKET + ('+Inf',), jumlahPerBucket):
+                kumulatif += jumlahBucket
+                labelBucket = _formatLabel(label + (('le', str(batas)),))
+                baris.append(f'{namaMetrik}_bucket{labelBucket} {kumulatif}')
+            baris.append(f'{namaMetrik}_sum{_formatLabel(label)} {total}')
+            baris.append(f'{namaMetrik}_count{_formatLabel(label)} {jumlah}')
+
+        return '\n'.join(baris) + '\n' if baris else ''
+
+
+def _formatLabel(label):
+    if not label:
+        return ''
+    isi = ','.join(
+        '{}="{}"'.format(
+            nama, str(nilai).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        )
+        for nama, nilai in label
+    )
+    return '{' + isi + '}'
+
+
+def renderMetrikTambahan(daftarMetrik):
+    """
+    Merender metrik counter/gauge sederhana.
+
+    Args:
+        daftarMetrik: List (nama, tipe, deskripsi, nilai).
+
+    Returns:
+        str: Metrik dalam format teks Prometheus.
+    """
+    baris = []
+    for nama, tipe, deskripsi, nilai in daftarMetrik:
+        baris.append(f'# HELP {nama} {deskripsi}')
+        baris.append(f'# TYPE {nama} {tipe}')
+        baris.append(f'{nama} {nilai}')
+    return '\n'.join(baris) + '\n' if baris else ''
+
+
+registri = RegistriMetrik()
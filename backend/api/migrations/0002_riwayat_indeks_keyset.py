@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='riwayatdeteksi',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='riwayat_user_waktu_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='riwayatdeteksi',
+            index=models.Index(fields=['user', 'nama_kelas', '-created_at', '-id'], name='riwayat_user_kelas_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='riwayatdeteksi',
+            index=models.Index(fields=['user', 'status_sehat', '-created_at', '-id'], name='riwayat_user_sehat_idx'),
+        ),
+    ]
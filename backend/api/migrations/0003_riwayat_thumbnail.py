@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_riwayat_indeks_keyset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='riwayatdeteksi',
+            name='gambar_kecil',
+            field=models.ImageField(blank=True, help_text='Thumbnail WebP kecil (dibuat di latar belakang)', upload_to='deteksi/%Y/%m/%d/'),
+        ),
+        migrations.AddField(
+            model_name='riwayatdeteksi',
+            name='gambar_sedang',
+            field=models.ImageField(blank=True, help_text='Thumbnail WebP sedang (dibuat di latar belakang)', upload_to='deteksi/%Y/%m/%d/'),
+        ),
+    ]
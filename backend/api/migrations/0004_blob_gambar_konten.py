@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:46
+
+import api.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_riwayat_thumbnail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlobGambar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nama', models.CharField(help_text='Nama file di storage', max_length=255, unique=True)),
+                ('ukuran', models.BigIntegerField(default=0, help_text='Ukuran file dalam byte')),
+                ('jumlah_referensi', models.PositiveIntegerField(default=0, help_text='Jumlah riwayat yang memakai file ini')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Blob Gambar',
+                'verbose_name_plural': 'Blob Gambar',
+            },
+        ),
+        migrations.AlterField(
+            model_name='riwayatdeteksi',
+            name='gambar',
+            field=models.ImageField(help_text='Gambar yang diupload untuk deteksi (dinamai berdasarkan hash isi)', storage=api.storage.dapatkanPenyimpananGambar, upload_to='deteksi/%Y/%m/%d/'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_blob_gambar_konten'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatistikHarian',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tanggal', models.DateField(help_text='Tanggal deteksi (zona waktu lokal)')),
+                ('nama_kelas', models.CharField(max_length=100)),
+                ('jumlah', models.IntegerField(default=0, help_text='Jumlah deteksi')),
+                ('jumlah_sehat', models.IntegerField(default=0, help_text='Jumlah deteksi tanaman sehat')),
+                ('total_kepercayaan', models.FloatField(default=0.0, help_text='Jumlah nilai kepercayaan (untuk rata-rata)')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statistik_harian', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Statistik Harian',
+                'verbose_name_plural': 'Statistik Harian',
+                'indexes': [models.Index(fields=['tanggal', 'nama_kelas'], name='statistik_tanggal_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'tanggal', 'nama_kelas'), name='statistik_unik_harian')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_statistik_harian'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='riwayatdeteksi',
+            name='versi_model',
+            field=models.CharField(blank=True, default='', help_text='Versi model yang menghasilkan prediksi (kosong untuk riwayat lama)', max_length=64),
+        ),
+    ]
@@ -0,0 +1,502 @@
+"""
+Registri model: versi model beserta metadata, dapat diganti tanpa restart.
+
+Struktur MODEL_REGISTRI_DIR:
+    <versi>/model.<ekstensi>   file model (keras/tflite/onnx)
+    <versi>/metadata.json      backend, daftar kelas, ukuran input, checksum
+    AKTIF                      nama versi aktif
+
+Versi ditambahkan dan diaktifkan dengan python manage.py model_registry.
+Penanda AKTIF ditulis ke file sementara lalu di-rename (os.replace),
+sehingga pembaca selalu melihat versi lama atau versi baru secara utuh.
+
+Setiap proses memeriksa penanda AKTIF paling sering sekali per
+MODEL_REGISTRI_INTERVAL_CEK detik. Jika berubah, versi baru diverifikasi
+(checksum dan kompatibilitas), dimuat dan dipanaskan di thread latar
+belakang, baru kemudian menggantikan model lama. Request yang datang
+selama pemuatan tetap dilayani model lama. Setiap prediksi meminjam
+pasangan (versi, model) lewat PengelolaModel.pakai(); model lama (mis.
+pool proses) baru dihentikan setelah peminjam terakhirnya selesai.
+
+Daftar kelas dan ukuran input versi harus sama dengan
+DAFTAR_KELAS_PENYAKIT dan UKURAN_GAMBAR_INPUT, karena katalog penyakit,
+statistik, dan praproses bergantung pada keduanya.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+
+NAMA_METADATA = 'metadata.json'
+NAMA_PENANDA_AKTIF = 'AKTIF'
+
+
+class KesalahanRegistri(Exception):
+    """Versi model tidak ada, rusak, atau tidak kompatibel."""
+
+
+def hitungChecksum(jalurFile):
+    """
+    Menghitung checksum SHA-256 file model secara streaming.
+
+    Returns:
+        str: Mis. 'sha256:3fa4...'.
+    """
+    hasher = hashlib.sha256()
+    with open(jalurFile, 'rb') as berkas:
+        for potongan in iter(lambda: berkas.read(1024 * 1024), b''):
+            hasher.update(potongan)
+    return f'sha256:{hasher.hexdigest()}'
+
+
+def _tulisAtomik(jalur, isi):
+    direktori = os.path.dirname(jalur)
+    deskriptor, jalurSementara = tempfile.mkstemp(dir=direktori, prefix='.tulis-')
+    try:
+        with os.fdopen(deskriptor, 'w', encoding='utf-8') as berkas:
+            berkas.write(isi)
+            berkas.flush()
+            os.fsync(berkas.fileno())
+        os.replace(jalurSementara, jalur)
+    except BaseException:
+        if os.path.exists(jalurSementara):
+            os.unlink(jalurSementara)
+        raise
+
+
+class VersiModel:
+    """
+    Metadata satu versi model di registri.
+
+    Args:
+        versi: Nama versi (nama direktori).
+        backend: 'keras', 'tflite', atau 'onnx'.
+        jalurModel: Path absolut file model.
+        kelas: Daftar kelas sesuai urutan output model.
+        ukuranInput: (lebar, tinggi) input model.
+        checksum: Checksum file model ('sha256:...').
+        dibuat: Waktu versi ditambahkan (ISO 8601).
+        catatan: Keterangan bebas.
+    """
+
+    def __init__(self, versi, backend, jalurModel, kelas, ukuranInput, checksum,
+                 dibuat=None, catatan=''):
+        self.versi = versi
+        self.backend = backend
+        self.jalurModel = jalurModel
+        self.kelas = list(kelas)
+        self.ukuranInput = tuple(ukuranInput)
+        self.checksum = checksum
+        self.dibuat = dibuat
+        self.catatan = catatan
+
+    def keDict(self):
+        return {
+            'versi': self.versi,
+            'backend': self.backend,
+            'file': os.path.basename(self.jalurModel),
+            'kelas': self.kelas,
+            'ukuranInput': list(self.ukuranInput),
+            'checksum': self.checksum,
+            'dibuat': self.dibuat,
+            'catatan': self.catatan,
+        }
+
+    def periksaKompatibel(self):
+        """
+        Raises:
+            KesalahanRegistri: Jika backend, kelas, atau ukuran input berbeda
+                dari yang dipakai aplikasi.
+        """
+        from .backends import DAFTAR_BACKEND
+
+        if self.backend not in DAFTAR_BACKEND:
+            raise KesalahanRegistri(f'Backend "{self.backend}" tidak dikenal.')
+        if self.kelas != list(settings.DAFTAR_KELAS_PENYAKIT):
+            raise KesalahanRegistri(
+                f'Daftar kelas versi {self.versi} berbeda dari DAFTAR_KELAS_PENYAKIT.'
+            )
+        if self.ukuranInput != tuple(settings.UKURAN_GAMBAR_INPUT):
+            raise KesalahanRegistri(
+                f'Ukuran input versi {self.versi} {self.ukuranInput} berbeda dari '
+                f'UKURAN_GAMBAR_INPUT {tuple(settings.UKURAN_GAMBAR_INPUT)}.'
+            )
+
+    def periksaChecksum(self):
+        """
+        Raises:
+            KesalahanRegistri: Jika file model hilang atau isinya berubah.
+        """
+        try:
+            checksum = hitungChecksum(self.jalurModel)
+        except OSError as kesalahan:
+            raise KesalahanRegistri(f'File model versi {self.versi} tidak dapat dibaca: {kesalahan}')
+        if checksum != self.checksum:
+            raise KesalahanRegistri(f'Checksum file model versi {self.versi} tidak cocok.')
+
+
+class RegistriModel:
+    """
+    Akses ke direktori registri model.
+
+    Args:
+        direktori: Path MODEL_REGISTRI_DIR.
+    """
+
+    def __init__(self, direktori):
+        self.direktori = str(direktori)
+
+    @property
+    def jalurPenanda(self):
+        return os.path.join(self.direktori, NAMA_PENANDA_AKTIF)
+
+    def bacaVersi(self, versi):
+        """
+        Membaca metadata satu versi.
+
+        Raises:
+            KesalahanRegistri: Jika versi tidak ada atau metadata rusak.
+        """
+        direktoriVersi = os.path.join(self.direktori, versi)
+        try:
+            with open(os.path.join(direktoriVersi, NAMA_METADATA), encoding='utf-8') as berkas:
+                data = json.load(berkas)
+            return VersiModel(
+                versi=data['versi'],
+                backend=data['backend'],
+                jalurModel=os.path.join(direktoriVersi, data['file']),
+                kelas=data['kelas'],
+                ukuranInput=data['ukuranInput'],
+                checksum=data['checksum'],
+                dibuat=data.get('dibuat'),
+                catatan=data.get('catatan', ''),
+            )
+        except FileNotFoundError:
+            raise KesalahanRegistri(f'Versi model "{versi}" tidak ada di registri.')
+        except (OSError, ValueError, KeyError) as kesalahan:
+            raise KesalahanRegistri(f'Metadata versi "{versi}" rusak: {kesalahan}')
+
+    def daftarVersi(self):
+        """
+        Returns:
+            list: VersiModel yang valid, diurutkan menurut waktu dibuat.
+        """
+        if not os.path.isdir(self.direktori):
+            return []
+        daftar = []
+        for nama in os.listdir(self.direktori):
+            if os.path.isfile(os.path.join(self.direktori, nama, NAMA_METADATA)):
+                try:
+                    daftar.append(self.bacaVersi(nama))
+                except KesalahanRegistri:
+                    continue
+        return sorted(daftar, key=lambda versiModel: versiModel.dibuat or '')
+
+    def versiAktif(self):
+        """
+        Returns:
+            str: Nama versi aktif, atau None jika belum ada.
+        """
+        return self.penandaAktif()[0]
+
+    def penandaAktif(self):
+        """
+        Membaca penanda AKTIF beserta waktu modifikasinya.
+
+        Waktu modifikasi membedakan aktivasi ulang versi yang sama (mis.
+        setelah file model yang rusak diperbaiki).
+
+        Returns:
+            tuple: (nama versi atau None, mtime_ns atau None)
+        """
+        try:
+            with open(self.jalurPenanda, encoding='utf-8') as berkas:
+                versi = berkas.read().strip() or None
+                return versi, os.fstat(berkas.fileno()).st_mtime_ns
+        except FileNotFoundError:
+            return None, None
+
+    def tambah(self, jalurSumber, versi, backend, kelas=None, ukuranInput=None, catatan=''):
+        """
+        Menyalin file model ke registri sebagai versi baru.
+
+        File disalin ke direktori sementara di dalam registri lalu di-rename,
+        sehingga versi yang setengah tersalin tidak pernah terlihat.
+
+        Returns:
+            VersiModel
+
+        Raises:
+            KesalahanRegistri: Jika versi sudah ada atau tidak kompatibel.
+        """
+        if not versi or versi.startswith('.') or os.sep in versi or versi == NAMA_PENANDA_AKTIF:
+            raise KesalahanRegistri(f'Nama versi "{versi}" tidak valid.')
+        direktoriVersi = os.path.join(self.direktori, versi)
+        if os.path.exists(direktoriVersi):
+            raise KesalahanRegistri(f'Versi "{versi}" sudah ada di registri.')
+
+        ekstensi = os.path.splitext(jalurSumber)[1] or f'.{backend}'
+        versiModel = VersiModel(
+            versi=versi,
+            backend=backend,
+            jalurModel=os.path.join(direktoriVersi, f'model{ekstensi}'),
+            kelas=kelas or settings.DAFTAR_KELAS_PENYAKIT,
+            ukuranInput=ukuranInput or settings.UKURAN_GAMBAR_INPUT,
+            checksum=hitungChecksum(jalurSumber),
+            dibuat=timezone.now().isoformat(),
+            catatan=catatan,
+        )
+        versiModel.periksaKompatibel()
+
+        os.makedirs(self.direktori, exist_ok=True)
+        direktoriSementara = tempfile.mkdtemp(dir=self.direktori, prefix='.versi-')
+        try:
+            shutil.copyfile(jalurSumber, os.path.join(direktoriSementara, f'model{ekstensi}'))
+            with open(os.path.join(direktoriSementara, NAMA_METADATA), 'w', encoding='utf-8') as berkas:
+                json.dump(versiModel.keDict(), berkas, ensure_ascii=False, indent=2)
+            os.rename(direktoriSementara, direktoriVersi)
+        except BaseException:
+            shutil.rmtree(direktoriSementara, ignore_errors=True)
+            raise
+        return versiModel
+
+    def aktifkan(self, versi):
+        """
+        Menjadikan satu versi sebagai versi aktif (atomik).
+
+        Returns:
+            VersiModel
+
+        Raises:
+            KesalahanRegistri: Jika versi tidak ada, rusak, atau tidak kompatibel.
+        """
+        versiModel = self.bacaVersi(versi)
+        versiModel.periksaKompatibel()
+        versiModel.periksaChecksum()
+        _tulisAtomik(self.jalurPenanda, versi + '\n')
+        return versiModel
+
+
+class PengelolaModel:
+    """
+    Model aktif proses ini, dengan pergantian versi di latar belakang.
+
+    Model aktif disimpan sebagai satu tuple (VersiModel, model), sehingga
+    pergantiannya adalah satu penugasan atribut. Jumlah peminjam setiap
+    tuple dicatat agar model lama tidak dihentikan di tengah prediksi.
+
+    Args:
+        registri: RegistriModel.
+        buatModel: Fungsi (VersiModel) -> objek dengan method prediksi();
+            dipanggil di thread latar belakang saat versi berganti.
+        intervalCek: Jarak minimal (detik) antar-pemeriksaan penanda AKTIF.
+        jumlahPemanasan: Jumlah forward pass dummy sebelum beralih.
+    """
+
+    def __init__(self, registri, buatModel, intervalCek=10.0, jumlahPemanasan=1):
+        self.registri = registri
+        self.buatModel = buatModel
+        self.intervalCek = intervalCek
+        self.jumlahPemanasan = jumlahPemanasan
+        self._aktif = None
+        self._kunci = threading.Lock()
+        self._cekTerakhir = 0.0
+        self._versiDimuat = None
+        # Penanda AKTIF (versi, mtime) yang gagal dimuat; tidak dicoba ulang
+        # sampai penanda ditulis ulang
+        self._penandaGagal = None
+        # id(tuple aktif) -> jumlah peminjam yang belum selesai
+        self._jumlahPeminjam = {}
+        self.jumlahPergantian = 0
+        self.kesalahanTerakhir = None
+
+    def _muatVersi(self, versi):
+        versiModel = self.registri.bacaVersi(versi)
+        versiModel.periksaKompatibel()
+        versiModel.periksaChecksum()
+        waktuMulai = time.perf_counter()
+        model = self.buatModel(versiModel)
+        if model is None:
+            raise KesalahanRegistri(f'Model versi {versi} gagal dimuat.')
+
+        lebar, tinggi = versiModel.ukuranInput
+        arrayDummy = np.zeros((1, tinggi, lebar, 3), dtype=np.float32)
+        for _ in range(self.jumlahPemanasan):
+            model.prediksi(arrayDummy)
+        print(f"[SUKSES] Model versi {versi} siap dari: {versiModel.jalurModel} "
+              f"({time.perf_counter() - waktuMulai:.2f} detik)")
+        return versiModel, model
+
+    def _gantiDiLatar(self, penanda):
+        versi = penanda[0]
+        try:
+            aktifBaru = self._muatVersi(versi)
+        except Exception as kesalahan:
+            print(f"[ERROR] Gagal beralih ke model versi {versi}: {kesalahan}")
+            with self._kunci:
+                self._penandaGagal = penanda
+                self._versiDimuat = None
+                self.kesalahanTerakhir = str(kesalahan)
+            return
+
+        with self._kunci:
+            aktifLama = self._aktif
+            self._aktif = aktifBaru
+            self._versiDimuat = None
+            self.jumlahPergantian += 1
+            self.kesalahanTerakhir = None
+            masihDipinjam = id(aktifLama) in self._jumlahPeminjam
+        print(f"[INFO] Beralih ke model versi {versi}")
+        # Jika masih dipinjam, model lama dihentikan oleh peminjam terakhir
+        if aktifLama is not None and not masihDipinjam:
+            self._pensiunkan(aktifLama)
+
+    def _pensiunkan(self, aktif):
+        if hasattr(aktif[1], 'hentikan'):
+            aktif[1].hentikan()
+            print(f"[INFO] Model versi {aktif[0].versi} dihentikan")
+
+    @contextmanager
+    def pakai(self):
+        """
+        Meminjam model aktif selama satu prediksi.
+
+        Versi dan model berasal dari snapshot yang sama, sehingga versi
+        yang dicatat selalu versi yang benar-benar menjawab, meski
+        pergantian terjadi di tengah prediksi.
+
+        Yields:
+            tuple: (VersiModel, model), atau None jika belum ada versi aktif.
+        """
+        self.aktif()
+        with self._kunci:
+            aktif = self._aktif
+            if aktif is not None:
+                self._jumlahPeminjam[id(aktif)] = self._jumlahPeminjam.get(id(aktif), 0) + 1
+        try:
+            yield aktif
+        finally:
+            if aktif is not None:
+                self._lepas(aktif)
+
+    def _lepas(self, aktif):
+        with self._kunci:
+            sisa = self._jumlahPeminjam[id(aktif)] - 1
+            if sisa:
+                self._jumlahPeminjam[id(aktif)] = sisa
+                return
+            del self._jumlahPeminjam[id(aktif)]
+            sudahDiganti = aktif is not self._aktif
+        if sudahDiganti:
+            self._pensiunkan(aktif)
+
+    def periksaVersi(self, paksa=False):
+        """
+        Memulai pemuatan latar belakang jika penanda AKTIF berubah.
+
+        Args:
+            paksa: Abaikan intervalCek.
+        """
+        sekarang = time.monotonic()
+        if not paksa and sekarang - self._cekTerakhir < self.intervalCek:
+            return
+        self._cekTerakhir = sekarang
+
+        penanda = self.registri.penandaAktif()
+        versi = penanda[0]
+        with self._kunci:
+            versiSekarang = self._aktif[0].versi if self._aktif else None
+            if versi is None or versi in (versiSekarang, self._versiDimuat) \
+                    or penanda == self._penandaGagal:
+                return
+            self._versiDimuat = versi
+        threading.Thread(
+            target=self._gantiDiLatar, args=(penanda,),
+            name='chiliguard-muat-model', daemon=True,
+        ).start()
+
+    def aktif(self):
+        """
+        Mendapatkan model aktif; versi pertama dimuat langsung (blocking).
+
+        Returns:
+            tuple: (VersiModel, model), atau None jika belum ada versi aktif
+                yang dapat dimuat.
+        """
+        if self._aktif is None:
+            with self._kunci:
+                if self._aktif is None and self._penandaGagal is None:
+                    penanda = self.registri.penandaAktif()
+                    if penanda[0] is None:
+                        print(f"[PERINGATAN] Belum ada versi model aktif di: {self.registri.direktori}")
+                        self._penandaGagal = penanda
+                    else:
+                        try:
+                            self._aktif = self._muatVersi(penanda[0])
+                        except Exception as kesalahan:
+                            print(f"[ERROR] Gagal memuat model versi {penanda[0]}: {kesalahan}")
+                            self._penandaGagal = penanda
+                            self.kesalahanTerakhir = str(kesalahan)
+                    self._cekTerakhir = time.monotonic()
+            if self._aktif is None:
+                # Tunggu penanda AKTIF diperbaiki/diubah
+                self.periksaVersi()
+                return self._aktif
+        self.periksaVersi()
+        return self._aktif
+
+    def statistik(self):
+        """
+        Returns:
+            dict: Versi aktif, versi yang sedang dimuat, dan jumlah pergantian.
+        """
+        aktif = self._aktif
+        return {
+            'versiAktif': aktif[0].versi if aktif else None,
+            'checksum': aktif[0].checksum if aktif else None,
+            'sedangDimuat': self._versiDimuat,
+            'versiGagal': self._penandaGagal[0] if self._penandaGagal else None,
+            'jumlahPergantian': self.jumlahPergantian,
+            'kesalahanTerakhir': self.kesalahanTerakhir,
+        }
+
+
+_pengelolaModel = None
+_kunciPengelola = threading.Lock()
+
+
+def dapatkanRegistriModel():
+    """Registri di settings.MODEL_REGISTRI_DIR."""
+    return RegistriModel(settings.MODEL_REGISTRI_DIR)
+
+
+def dapatkanPengelolaModel():
+    """
+    Mendapatkan pengelola model aktif proses ini (dibuat sekali).
+
+    Returns:
+        PengelolaModel
+    """
+    global _pengelolaModel
+
+    if _pengelolaModel is None:
+        with _kunciPengelola:
+            if _pengelolaModel is None:
+                from .utils import buatModelDariVersi
+                _pengelolaModel = PengelolaModel(
+                    dapatkanRegistriModel(),
+                    buatModelDariVersi,
+                    intervalCek=settings.MODEL_REGISTRI_INTERVAL_CEK,
+                    jumlahPemanasan=settings.MODEL_JUMLAH_PEMANASAN,
+                )
+    return _pengelolaModel
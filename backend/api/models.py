@@ -8,6 +8,8 @@ riwayat deteksi, dan profil pengguna.
 from django.db import models
 from django.contrib.auth.models import User
 
+from .storage import dapatkanPenyimpananGambar
+
 
 class Penyakit(models.Model):
     """
@@ -44,7 +46,18 @@ class RiwayatDeteksi(models.Model):
     )
     gambar = models.ImageField(
         upload_to='deteksi/%Y/%m/%d/',
-        help_text="Gambar yang diupload untuk deteksi"
+        storage=dapatkanPenyimpananGambar,
+        help_text="Gambar yang diupload untuk deteksi (dinamai berdasarkan hash isi)"
+    )
+    gambar_kecil = models.ImageField(
+        upload_to='deteksi/%Y/%m/%d/',
+        blank=True,
+        help_text="Thumbnail WebP kecil (dibuat di latar belakang)"
+    )
+    gambar_sedang = models.ImageField(
+        upload_to='deteksi/%Y/%m/%d/',
+        blank=True,
+        help_text="Thumbnail WebP sedang (dibuat di latar belakang)"
     )
     penyakit = models.ForeignKey(
         Penyakit,
@@ -57,17 +70,79 @@ class RiwayatDeteksi(models.Model):
     nama_kelas = models.CharField(max_length=100, help_text="Nama kelas hasil prediksi")
     kepercayaan = models.FloatField(help_text="Nilai kepercayaan prediksi (0-1)")
     status_sehat = models.BooleanField(default=False, help_text="Apakah tanaman sehat")
+    versi_model = models.CharField(
+        max_length=64, blank=True, default='',
+        help_text="Versi model yang menghasilkan prediksi (kosong untuk riwayat lama)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name = "Riwayat Deteksi"
         verbose_name_plural = "Riwayat Deteksi"
         ordering = ['-created_at']
+        indexes = [
+            # Pagination keyset riwayat per pengguna (created_at, id)
+            models.Index(fields=['user', '-created_at', '-id'], name='riwayat_user_waktu_idx'),
+            # Filter kelas dan status sehat pada riwayat pengguna
+            models.Index(fields=['user', 'nama_kelas', '-created_at', '-id'], name='riwayat_user_kelas_idx'),
+            models.Index(fields=['user', 'status_sehat', '-created_at', '-id'], name='riwayat_user_sehat_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.nama_kelas} ({self.created_at.strftime('%Y-%m-%d %H:%M')})"
 
 
+class BlobGambar(models.Model):
+    """
+    Model untuk mencatat jumlah referensi file gambar berbasis konten.
+    """
+    nama = models.CharField(max_length=255, unique=True, help_text="Nama file di storage")
+    ukuran = models.BigIntegerField(default=0, help_text="Ukuran file dalam byte")
+    jumlah_referensi = models.PositiveIntegerField(default=0, help_text="Jumlah riwayat yang memakai file ini")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Blob Gambar"
+        verbose_name_plural = "Blob Gambar"
+
+    def __str__(self):
+        return f"{self.nama} ({self.jumlah_referensi} referensi)"
+
+
+class StatistikHarian(models.Model):
+    """
+    Model rollup harian riwayat deteksi per pengguna dan kelas.
+    
+    Diperbarui bertambah/berkurang setiap riwayat dibuat atau dihapus
+    (lihat api/statistics.py), sehingga dashboard tidak perlu GROUP BY
+    atas seluruh RiwayatDeteksi.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='statistik_harian'
+    )
+    tanggal = models.DateField(help_text="Tanggal deteksi (zona waktu lokal)")
+    nama_kelas = models.CharField(max_length=100)
+    jumlah = models.IntegerField(default=0, help_text="Jumlah deteksi")
+    jumlah_sehat = models.IntegerField(default=0, help_text="Jumlah deteksi tanaman sehat")
+    total_kepercayaan = models.FloatField(default=0.0, help_text="Jumlah nilai kepercayaan (untuk rata-rata)")
+
+    class Meta:
+        verbose_name = "Statistik Harian"
+        verbose_name_plural = "Statistik Harian"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'tanggal', 'nama_kelas'], name='statistik_unik_harian'),
+        ]
+        indexes = [
+            # Statistik global per rentang tanggal
+            models.Index(fields=['tanggal', 'nama_kelas'], name='statistik_tanggal_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.tanggal} - {self.nama_kelas}: {self.jumlah}"
+
+
 class ProfilPengguna(models.Model):
     """
     Model untuk menyimpan informasi tambahan pengguna.
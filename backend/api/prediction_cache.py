@@ -0,0 +1,183 @@
+"""
+Cache hasil prediksi berbasis hash konten gambar.
+
+Gambar yang sama (byte identik) tidak perlu di-decode, di-resize, dan
+diprediksi ulang. Kunci cache terdiri dari versi model dan hash gambar,
+sehingga cache otomatis tidak berlaku lagi saat file model berganti.
+Entri versi lama tidak dikosongkan sekaligus (saat registri berganti
+versi, request lama dan baru bisa berselang-seling); entri tersebut
+tersingkir sendiri oleh LRU.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+def hitungHashGambar(fileGambar):
+    """
+    Menghitung hash konten file upload tanpa memuat seluruhnya sekaligus.
+
+    Hasilnya disimpan di atribut file, sehingga penyimpanan berbasis
+    konten (storage.py) tidak perlu meng-hash ulang file yang sama.
+
+    Args:
+        fileGambar: File gambar yang diupload.
+
+    Returns:
+        str: Hash BLAKE2b (hex) dari byte file.
+    """
+    hashTersimpan = getattr(fileGambar, '_hashKonten', None)
+    if hashTersimpan is not None:
+        return hashTersimpan
+
+    hasher = hashlib.blake2b(digest_size=16)
+    fileGambar.seek(0)
+    if hasattr(fileGambar, 'chunks'):
+        for potongan in fileGambar.chunks():
+            hasher.update(potongan)
+    else:
+        hasher.update(fileGambar.read())
+    fileGambar.seek(0)
+    try:
+        fileGambar._hashKonten = hasher.hexdigest()
+    except AttributeError:
+        # Objek file tanpa __dict__ (mis. BufferedReader)
+        return hasher.hexdigest()
+    return fileGambar._hashKonten
+
+
+def dapatkanVersiModel(jalurModel):
+    """
+    Membuat penanda versi model dari path, ukuran, dan waktu modifikasi file.
+
+    Args:
+        jalurModel: Path file model yang sedang dipakai.
+
+    Returns:
+        str: Penanda versi singkat (berubah jika file model berubah).
+    """
+    try:
+        infoFile = os.stat(jalurModel)
+        sumber = f'{jalurModel}:{infoFile.st_size}:{infoFile.st_mtime_ns}'
+    except OSError:
+        sumber = jalurModel
+    return hashlib.blake2b(sumber.encode(), digest_size=8).hexdigest()
+
+
+class CachePrediksi:
+    """
+    Cache LRU dalam proses, opsional dilapisi cache Django bersama.
+
+    Args:
+        kapasitas: Jumlah entri maksimal cache lokal.
+        aliasCacheDjango: Alias di settings.CACHES untuk cache bersama
+            antar-worker (kosong = hanya cache lokal).
+        ttl: Masa berlaku entri di cache Django (detik).
+    """
+
+    def __init__(self, kapasitas=1024, aliasCacheDjango=None, ttl=86400):
+        self.kapasitas = max(1, int(kapasitas))
+        self.aliasCacheDjango = aliasCacheDjango
+        self.ttl = ttl
+        # Kunci: (versiModel, hashGambar)
+        self._data = OrderedDict()
+        self._kunci = threading.Lock()
+        self.jumlahHit = 0
+        self.jumlahMiss = 0
+
+    def _cacheDjango(self):
+        if not self.aliasCacheDjango:
+            return None
+        from django.core.cache import caches
+        return caches[self.aliasCacheDjango]
+
+    def ambil(self, versiModel, hashGambar):
+        """
+        Mengambil semuaPrediksi yang tersimpan.
+
+        Returns:
+            list: semuaPrediksi (urut kepercayaan tertinggi), atau None jika miss.
+        """
+        kunciLokal = (versiModel, hashGambar)
+        with self._kunci:
+            nilai = self._data.get(kunciLokal)
+            if nilai is not None:
+                self._data.move_to_end(kunciLokal)
+                self.jumlahHit += 1
+                return nilai
+
+        cacheDjango = self._cacheDjango()
+        if cacheDjango is not None:
+            nilai = cacheDjango.get(f'prediksi:{versiModel}:{hashGambar}')
+            if nilai is not None:
+                self._simpanLokal(versiModel, hashGambar, nilai)
+                with self._kunci:
+                    self.jumlahHit += 1
+                return nilai
+
+        with self._kunci:
+            self.jumlahMiss += 1
+        return None
+
+    def simpan(self, versiModel, hashGambar, semuaPrediksi):
+        """Menyimpan semuaPrediksi untuk gambar dengan hash tertentu."""
+        self._simpanLokal(versiModel, hashGambar, semuaPrediksi)
+
+        cacheDjango = self._cacheDjango()
+        if cacheDjango is not None:
+            cacheDjango.set(f'prediksi:{versiModel}:{hashGambar}', semuaPrediksi, self.ttl)
+
+    def _simpanLokal(self, versiModel, hashGambar, semuaPrediksi):
+        kunciLokal = (versiModel, hashGambar)
+        with self._kunci:
+            self._data[kunciLokal] = semuaPrediksi
+            self._data.move_to_end(kunciLokal)
+            while len(self._data) > self.kapasitas:
+                self._data.popitem(last=False)
+
+    def bersihkan(self):
+        """Mengosongkan cache lokal dan mereset penghitung."""
+        with self._kunci:
+            self._data.clear()
+            self.jumlahHit = 0
+            self.jumlahMiss = 0
+
+    def statistik(self):
+        """
+        Returns:
+            dict: Jumlah hit, miss, rasio hit, dan ukuran cache lokal.
+        """
+        with self._kunci:
+            total = self.jumlahHit + self.jumlahMiss
+            return {
+                'hit': self.jumlahHit,
+                'miss': self.jumlahMiss,
+                'rasioHit': round(self.jumlahHit / total, 4) if total else 0.0,
+                'ukuran': len(self._data),
+                'kapasitas': self.kapasitas,
+            }
+
+
+_cachePrediksi = None
+
+
+def dapatkanCachePrediksi():
+    """
+    Mendapatkan cache prediksi proses ini (dibuat sekali).
+
+    Returns:
+        CachePrediksi
+    """
+    global _cachePrediksi
+
+    if _cachePrediksi is None:
+        _cachePrediksi = CachePrediksi(
+            kapasitas=settings.CACHE_PREDIKSI_KAPASITAS,
+            aliasCacheDjango=settings.CACHE_PREDIKSI_ALIAS,
+            ttl=settings.CACHE_PREDIKSI_TTL,
+        )
+    return _cachePrediksi
@@ -29,10 +29,10 @@ class RiwayatDeteksiSerializer(serializers.ModelSerializer):
     class Meta:
         model = RiwayatDeteksi
         fields = [
-            'id', 'username', 'gambar', 'nama_kelas', 
-            'kepercayaan', 'status_sehat', 'penyakit_detail', 'created_at'
+            'id', 'username', 'gambar', 'gambar_kecil', 'gambar_sedang', 'nama_kelas', 
+            'kepercayaan', 'status_sehat', 'versi_model', 'penyakit_detail', 'created_at'
         ]
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'gambar_kecil', 'gambar_sedang', 'versi_model', 'created_at']
 
 
 class ProfilPenggunaSerializer(serializers.ModelSerializer):
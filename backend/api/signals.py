@@ -0,0 +1,72 @@
+"""
+Sinyal model untuk aplikasi API ChiliGuard.
+"""
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import dapatkanCacheToken
+from .disease_catalog import dapatkanKatalogPenyakit
+from .models import Penyakit, ProfilPengguna, RiwayatDeteksi
+from .statistics import perbaruiStatistik
+from .storage import lepasReferensi
+from .thumbnails import jadwalkanThumbnail
+
+
+@receiver(post_save, sender=Penyakit)
+@receiver(post_delete, sender=Penyakit)
+def invalidasiKatalogPenyakit(sender, **kwargs):
+    """Mengosongkan cache katalog setelah data Penyakit berubah."""
+    # Tunggu commit agar worker lain tidak memuat ulang data lama
+    transaction.on_commit(dapatkanKatalogPenyakit().invalidasi)
+
+
+@receiver(post_save, sender=RiwayatDeteksi)
+def buatThumbnailRiwayat(sender, instance, created, **kwargs):
+    """Menjadwalkan thumbnail untuk riwayat baru (di luar jalur request)."""
+    if created and instance.gambar:
+        jadwalkanThumbnail([instance.pk])
+
+
+@receiver(post_save, sender=RiwayatDeteksi)
+def tambahStatistikRiwayat(sender, instance, created, **kwargs):
+    """Menambahkan riwayat baru ke rollup StatistikHarian."""
+    if created:
+        perbaruiStatistik([instance])
+
+
+@receiver(post_delete, sender=RiwayatDeteksi)
+def kurangiStatistikRiwayat(sender, instance, **kwargs):
+    """Mengurangi rollup StatistikHarian untuk riwayat yang dihapus."""
+    perbaruiStatistik([instance], arah=-1)
+
+
+@receiver(post_delete, sender=RiwayatDeteksi)
+def lepasReferensiGambar(sender, instance, **kwargs):
+    """Menghapus file gambar setelah riwayat terakhir yang memakainya dihapus."""
+    namaGambar = instance.gambar.name
+    daftarTurunan = (instance.gambar_kecil.name, instance.gambar_sedang.name)
+    transaction.on_commit(lambda: lepasReferensi(namaGambar, daftarTurunan))
+
+
+@receiver(post_delete, sender=Token)
+def invalidasiCacheTokenDihapus(sender, instance, **kwargs):
+    """Mengosongkan cache autentikasi untuk token yang dihapus (logout)."""
+    kunciToken = instance.key
+    transaction.on_commit(lambda: dapatkanCacheToken().hapus([kunciToken]))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=ProfilPengguna)
+def invalidasiCacheTokenUser(sender, instance, **kwargs):
+    """Mengosongkan cache autentikasi user yang diubah atau dinonaktifkan."""
+    if not settings.AUTH_TOKEN_CACHE_ALIAS:
+        return
+    idUser = instance.pk if sender is User else instance.user_id
+    daftarKunci = list(Token.objects.filter(user_id=idUser).values_list('key', flat=True))
+    if daftarKunci:
+        transaction.on_commit(lambda: dapatkanCacheToken().hapus(daftarKunci))
@@ -0,0 +1,165 @@
+"""
+Statistik deteksi dari rollup harian (StatistikHarian).
+
+Setiap RiwayatDeteksi yang dibuat atau dihapus menambah/mengurangi satu
+baris rollup (user, tanggal, kelas), jadi dashboard hanya membaca tabel
+rollup yang ukurannya sebanding dengan jumlah hari x kelas, bukan jumlah
+riwayat. Rollup lama dapat dibangun ulang dengan
+python manage.py rebuild_statistics.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def kelompokkanRiwayat(daftarRiwayat):
+    """
+    Mengelompokkan riwayat per (user, tanggal lokal, kelas).
+
+    Args:
+        daftarRiwayat: Iterable objek RiwayatDeteksi dengan created_at terisi.
+
+    Returns:
+        dict: (idUser, tanggal, namaKelas) -> [jumlah, jumlahSehat, totalKepercayaan]
+    """
+    kelompok = defaultdict(lambda: [0, 0, 0.0])
+    for riwayat in daftarRiwayat:
+        kunci = (riwayat.user_id, timezone.localdate(riwayat.created_at), riwayat.nama_kelas)
+        nilai = kelompok[kunci]
+        nilai[0] += 1
+        nilai[1] += int(riwayat.status_sehat)
+        nilai[2] += riwayat.kepercayaan
+    return kelompok
+
+
+def perbaruiStatistik(daftarRiwayat, arah=1):
+    """
+    Menambah (arah=1) atau mengurangi (arah=-1) rollup untuk riwayat.
+
+    Args:
+        daftarRiwayat: Iterable objek RiwayatDeteksi.
+        arah: 1 untuk riwayat baru, -1 untuk riwayat yang dihapus.
+    """
+    from .models import StatistikHarian
+
+    for (idUser, tanggal, namaKelas), (jumlah, jumlahSehat, totalKepercayaan) in \
+            kelompokkanRiwayat(daftarRiwayat).items():
+        baris = StatistikHarian.objects.filter(user_id=idUser, tanggal=tanggal, nama_kelas=namaKelas)
+        perubahan = {
+            'jumlah': F('jumlah') + arah * jumlah,
+            'jumlah_sehat': F('jumlah_sehat') + arah * jumlahSehat,
+            'total_kepercayaan': F('total_kepercayaan') + arah * totalKepercayaan,
+        }
+        if baris.update(**perubahan) or arah < 0:
+            continue
+        try:
+            with transaction.atomic():
+                StatistikHarian.objects.create(
+                    user_id=idUser, tanggal=tanggal, nama_kelas=namaKelas,
+                    jumlah=jumlah, jumlah_sehat=jumlahSehat,
+                    total_kepercayaan=totalKepercayaan,
+                )
+        except IntegrityError:
+            # Dibuat bersamaan oleh request lain
+            baris.update(**perubahan)
+
+
+def hitungRollupDariRiwayat(riwayat):
+    """
+    Menghitung baris rollup langsung dari queryset RiwayatDeteksi.
+
+    Dipakai untuk backfill; endpoint tidak pernah memanggil ini.
+
+    Args:
+        riwayat: QuerySet RiwayatDeteksi.
+
+    Returns:
+        list: Objek StatistikHarian (belum disimpan).
+    """
+    from .models import StatistikHarian
+
+    daftarBaris = (
+        riwayat.annotate(tanggal=TruncDate('created_at'))
+        .values('user_id', 'tanggal', 'nama_kelas')
+        .annotate(
+            jumlah=Count('id'),
+            jumlah_sehat=Count('id', filter=Q(status_sehat=True)),
+            total_kepercayaan=Sum('kepercayaan'),
+        )
+        .order_by()
+    )
+    return [StatistikHarian(**baris) for baris in daftarBaris]
+
+
+def susunStatistik(rollup, dari, sampai):
+    """
+    Menyusun ringkasan, rincian per kelas, dan per minggu dari rollup.
+
+    Agregasi per (tanggal, kelas) dilakukan database di atas tabel rollup;
+    hasilnya paling banyak (jumlah hari x jumlah kelas) baris.
+
+    Args:
+        rollup: QuerySet StatistikHarian (sudah difilter user jika perlu).
+        dari: Tanggal awal (inklusif).
+        sampai: Tanggal akhir (inklusif).
+
+    Returns:
+        dict: Data response statistik.
+    """
+    daftarBaris = (
+        rollup.filter(tanggal__gte=dari, tanggal__lte=sampai)
+        .values('tanggal', 'nama_kelas')
+        .annotate(
+            jumlah=Sum('jumlah'),
+            jumlahSehat=Sum('jumlah_sehat'),
+            totalKepercayaan=Sum('total_kepercayaan'),
+        )
+        .order_by('tanggal', 'nama_kelas')
+    )
+
+    perKelas = defaultdict(lambda: [0, 0.0])
+    perMinggu = defaultdict(lambda: defaultdict(int))
+    totalJumlah = 0
+    totalSehat = 0
+    totalKepercayaan = 0.0
+    for baris in daftarBaris:
+        if not baris['jumlah']:
+            continue
+        totalJumlah += baris['jumlah']
+        totalSehat += baris['jumlahSehat']
+        totalKepercayaan += baris['totalKepercayaan']
+        perKelas[baris['nama_kelas']][0] += baris['jumlah']
+        perKelas[baris['nama_kelas']][1] += baris['totalKepercayaan']
+        # Minggu diawali hari Senin
+        awalMinggu = baris['tanggal'] - timedelta(days=baris['tanggal'].weekday())
+        perMinggu[awalMinggu][baris['nama_kelas']] += baris['jumlah']
+
+    return {
+        'periode': {'dari': dari.isoformat(), 'sampai': sampai.isoformat()},
+        'ringkasan': {
+            'jumlahDeteksi': totalJumlah,
+            'persenSehat': round(totalSehat * 100 / totalJumlah, 2) if totalJumlah else 0.0,
+            'rataKepercayaan': round(totalKepercayaan / totalJumlah, 4) if totalJumlah else 0.0,
+        },
+        'perKelas': [
+            {
+                'kelas': namaKelas,
+                'jumlah': jumlah,
+                'rataKepercayaan': round(total / jumlah, 4),
+            }
+            for namaKelas, (jumlah, total) in sorted(perKelas.items(), key=lambda item: -item[1][0])
+        ],
+        'perMinggu': [
+            {
+                'minggu': awalMinggu.isoformat(),
+                'jumlah': sum(perMinggu[awalMinggu].values()),
+                'perKelas': dict(perMinggu[awalMinggu]),
+            }
+            for awalMinggu in sorted(perMinggu)
+        ],
+    }
@@ -0,0 +1,165 @@
+"""
+Penyimpanan gambar deteksi berbasis konten (content-addressed).
+
+Nama file gambar deteksi diturunkan dari hash isinya, misalnya
+deteksi/konten/3f/3fa4...c2.jpg. Upload dengan byte yang sama (umum saat
+pengguna mengulang request) tidak ditulis ulang, cukup memakai blob yang
+sudah ada. Jumlah RiwayatDeteksi yang memakai setiap blob dicatat di
+BlobGambar, sehingga file (beserta thumbnail-nya) hanya dihapus saat
+tidak ada lagi riwayat yang merujuknya.
+
+Referensi diambil oleh PenyimpananKonten.save() dengan baris BlobGambar
+terkunci, bersamaan dengan pemeriksaan apakah file sudah ada. Karena
+itu save() sebaiknya dipanggil di dalam transaksi yang sama dengan insert
+riwayatnya, agar referensi ikut dibatalkan jika insert gagal.
+"""
+
+import os
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .prediction_cache import hitungHashGambar
+from .thumbnails import VARIAN_THUMBNAIL, namaTurunan
+
+
+PREFIKS_KONTEN = 'deteksi/konten'
+
+
+def namaKonten(hashKonten, ekstensi):
+    """
+    Nama file blob untuk hash konten tertentu.
+
+    Args:
+        hashKonten: Hash BLAKE2b (hex) isi file.
+        ekstensi: Ekstensi file asli (mis. '.jpg').
+
+    Returns:
+        str: Mis. 'deteksi/konten/3f/3fa4...c2.jpg'.
+    """
+    return f'{PREFIKS_KONTEN}/{hashKonten[:2]}/{hashKonten}{ekstensi.lower()}'
+
+
+class PenyimpananKonten(FileSystemStorage):
+    """
+    FileSystemStorage yang menamai file berdasarkan hash isinya.
+
+    Nama dari upload_to hanya dipakai untuk ekstensinya. Jika blob dengan
+    hash yang sama sudah ada, penulisan dilewati. Setiap save() menambah
+    satu referensi BlobGambar.
+    """
+
+    def save(self, name, content, max_length=None):
+        from .models import BlobGambar
+
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        nama = namaKonten(hitungHashGambar(content), os.path.splitext(name)[1])
+
+        # Baris blob dikunci selama pemeriksaan file dan penambahan
+        # referensi, sehingga lepasReferensi yang bersamaan tidak dapat
+        # menghapus file di antara keduanya
+        with transaction.atomic():
+            blob = BlobGambar.objects.select_for_update().filter(nama=nama).first()
+            if blob is not None:
+                if not self.exists(nama):
+                    print(f"[PERINGATAN] File blob {nama} hilang, ditulis ulang")
+                    super().save(nama, content, max_length=max_length)
+                blob.jumlah_referensi += 1
+                blob.save(update_fields=['jumlah_referensi'])
+                return nama
+
+            nama = super().save(nama, content, max_length=max_length)
+            try:
+                with transaction.atomic():
+                    BlobGambar.objects.create(nama=nama, ukuran=self.size(nama), jumlah_referensi=1)
+            except IntegrityError:
+                # Dibuat bersamaan oleh request lain
+                BlobGambar.objects.filter(nama=nama).update(
+                    jumlah_referensi=F('jumlah_referensi') + 1
+                )
+        return nama
+
+    def get_available_name(self, name, max_length=None):
+        # Nama sama berarti isi sama; tidak perlu akhiran acak
+        return name
+
+    def _save(self, name, content):
+        jalurAkhir = self.path(name)
+        direktori = os.path.dirname(jalurAkhir)
+        os.makedirs(direktori, exist_ok=True)
+
+        # Tulis ke file sementara lalu hard-link ke nama akhir, agar pembaca
+        # tidak pernah melihat file setengah jadi dan dua upload identik
+        # yang bersamaan tidak saling menimpa.
+        deskriptor, jalurSementara = tempfile.mkstemp(dir=direktori, prefix='.unggah-')
+        try:
+            with os.fdopen(deskriptor, 'wb') as berkas:
+                for potongan in content.chunks():
+                    berkas.write(potongan)
+            if self.file_permissions_mode is not None:
+                os.chmod(jalurSementara, self.file_permissions_mode)
+            try:
+                os.link(jalurSementara, jalurAkhir)
+            except FileExistsError:
+                pass
+        finally:
+            os.unlink(jalurSementara)
+
+        return os.path.relpath(jalurAkhir, self.location).replace('\\', '/')
+
+
+penyimpananKonten = PenyimpananKonten()
+
+
+def dapatkanPenyimpananGambar():
+    """Storage untuk RiwayatDeteksi.gambar (dipakai sebagai callable di model)."""
+    return penyimpananKonten
+
+
+def lepasReferensi(namaGambar, daftarTurunan=()):
+    """
+    Mengurangi referensi blob dan menghapus file jika tidak dipakai lagi.
+
+    Gambar lama (sebelum dedup) tidak punya BlobGambar; file tersebut
+    dihapus jika tidak ada riwayat lain dengan nama yang sama.
+
+    Args:
+        namaGambar: Nama file gambar asli riwayat yang dihapus.
+        daftarTurunan: Nama file thumbnail riwayat tersebut.
+
+    Returns:
+        bool: True jika file dihapus.
+    """
+    from .models import BlobGambar, RiwayatDeteksi
+
+    if not namaGambar:
+        return False
+
+    with transaction.atomic():
+        blob = BlobGambar.objects.select_for_update().filter(nama=namaGambar).first()
+        if blob is None:
+            hapus = not RiwayatDeteksi.objects.filter(gambar=namaGambar).exists()
+        elif blob.jumlah_referensi > 1:
+            blob.jumlah_referensi -= 1
+            blob.save(update_fields=['jumlah_referensi'])
+            hapus = False
+        else:
+            blob.delete()
+            hapus = True
+
+        if hapus:
+            # Thumbnail dibagi semua riwayat blob ini; riwayat terakhir bisa
+            # saja dihapus sebelum thumbnail-nya sendiri dibuat, jadi nama
+            # turunan standar selalu ikut dihapus
+            daftarNama = {namaGambar, *daftarTurunan}
+            daftarNama.update(namaTurunan(namaGambar, namaField) for namaField, _ in VARIAN_THUMBNAIL)
+            # Masih di dalam transaksi: save() yang bersamaan menunggu kunci
+            # baris blob, lalu menulis ulang file sebagai blob baru
+            for nama in daftarNama:
+                if nama:
+                    penyimpananKonten.delete(nama)
+    return hapus
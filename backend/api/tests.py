@@ -1,3 +1,1393 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from PIL import Image, ImageFile
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.utils.http import parse_http_date
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from . import authentication, cascade, disease_catalog, metrics, model_registry, utils
+from .admission import AntreanPenuh, KontrolMasuk
+from .backends import DAFTAR_BACKEND, BackendInferensi
+from .batching import PenjadwalBatch
+from .management.commands.benchmark_preprocessing import buatGambarSintetis, prosesGambarLama
+from .cascade import perluEskalasi
+from .metrics import ukurTahap
+from .model_registry import KesalahanRegistri, RegistriModel, dapatkanPengelolaModel
+from .models import BlobGambar, Penyakit, RiwayatDeteksi, StatistikHarian
+from .prediction_cache import CachePrediksi, dapatkanCachePrediksi, dapatkanVersiModel, hitungHashGambar
+from .statistics import hitungRollupDariRiwayat
+from .storage import PREFIKS_KONTEN, penyimpananKonten
+from .thumbnails import buatThumbnail, namaTurunan
+from .upload_validation import GambarTidakValid, bukaHeaderGambar, periksaGambar
+from .utils import klasifikasiGambar
+from .worker_pool import PoolInferensi
+from .write_behind import EntriRiwayat, PenulisRiwayat
+
+
+def buatFileGambar(nama='daun.png', warna=(40, 160, 60), ukuran=(64, 64), format='PNG'):
+    """File upload berisi gambar kecil yang valid."""
+    keluaran = io.BytesIO()
+    Image.new('RGB', ukuran, warna).save(keluaran, format=format)
+    return SimpleUploadedFile(nama, keluaran.getvalue(), content_type=f'image/{format.lower()}')
+
+
+class BackendCepatUji(BackendInferensi):
+    """Model cepat stub: file model berisi jumlah kolom output; yakin untuk gambar terang."""
+
+    nama = 'cepat-uji'
+    ekstensi = '.uji'
+
+    def __init__(self, jalurModel, jumlahThread=None):
+        super().__init__(jalurModel, jumlahThread)
+        with open(jalurModel) as berkas:
+            self.jumlahKolom = int(berkas.read())
+
+    def prediksi(self, arrayBatch):
+        probabilitas = np.zeros((len(arrayBatch), self.jumlahKolom), dtype=np.float32)
+        for indeks, gambar in enumerate(arrayBatch):
+            if gambar.mean() > 0.5:
+                probabilitas[indeks, 3] = 0.95
+            else:
+                probabilitas[indeks, [0, 3]] = (0.3, 0.4)
+        return probabilitas
+
+
+class BackendUji(BackendInferensi):
+    """Backend stub: file model berisi indeks kelas yang selalu dijawab."""
+
+    nama = 'uji'
+    ekstensi = '.uji'
+    # Dipanggil sekali di forward pass berikutnya (lalu dikosongkan)
+    kaitPrediksi = None
+
+    def __init__(self, jalurModel, jumlahThread=None):
+        super().__init__(jalurModel, jumlahThread)
+        with open(jalurModel) as berkas:
+            self.indeksKelas = int(berkas.read())
+        self.dihentikan = False
+
+    def prediksi(self, arrayBatch):
+        kait, BackendUji.kaitPrediksi = BackendUji.kaitPrediksi, None
+        if kait is not None:
+            kait(self)
+        probabilitas = np.zeros((len(arrayBatch), 9), dtype=np.float32)
+        probabilitas[:, self.indeksKelas] = 1.0
+        return probabilitas
+
+    def hentikan(self):
+        self.dihentikan = True
+
+
+class RiwayatDeteksiViewTest(TestCase):
+    """Pagination keyset dan anggaran query endpoint /api/history/."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='petani', password='rahasia123')
+        penyakit = Penyakit.objects.create(
+            nama='Leaf Curl', nama_indonesia='Keriting Daun', deskripsi='-'
+        )
+
+        waktuDasar = timezone.now()
+        daftarRiwayat = RiwayatDeteksi.objects.bulk_create([
+            RiwayatDeteksi(
+                user=cls.user,
+                gambar=f'deteksi/{indeks}.jpg',
+                penyakit=penyakit if indeks % 2 else None,
+                nama_kelas='Leaf Curl' if indeks % 2 else 'Healthy Leaf',
+                kepercayaan=0.9,
+                status_sehat=not indeks % 2,
+            )
+            for indeks in range(120)
+        ])
+        # Setiap tiga riwayat berbagi created_at yang sama, agar batas
+        # halaman jatuh di tengah nilai kembar
+        for indeks, riwayat in enumerate(daftarRiwayat):
+            RiwayatDeteksi.objects.filter(pk=riwayat.pk).update(
+                created_at=waktuDasar - timedelta(minutes=indeks // 3)
+            )
+
+        userLain = User.objects.create_user(username='lain', password='rahasia123')
+        RiwayatDeteksi.objects.create(
+            user=userLain, gambar='deteksi/lain.jpg', nama_kelas='Leaf Curl',
+            kepercayaan=0.8, status_sehat=False
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _ambilSemuaHalaman(self, **parameter):
+        semuaId = []
+        cursor = None
+        while True:
+            if cursor:
+                parameter['cursor'] = cursor
+            respons = self.client.get('/api/history/', parameter)
+            self.assertEqual(respons.status_code, 200)
+            semuaId.extend(riwayat['id'] for riwayat in respons.data['riwayat'])
+            cursor = respons.data['berikutnya']
+            if cursor is None:
+                return semuaId
+
+    def test_anggaran_query_per_halaman(self):
+        # Satu query untuk halaman beserta user dan penyakit (tanpa N+1)
+        with self.assertNumQueries(1):
+            respons = self.client.get('/api/history/', {'batas': 100})
+        self.assertEqual(respons.data['jumlah'], 100)
+
+        with self.assertNumQueries(1):
+            self.client.get('/api/history/', {'cursor': respons.data['berikutnya']})
+
+    def test_cursor_menelusuri_semua_riwayat_tanpa_duplikat(self):
+        semuaId = self._ambilSemuaHalaman(batas=7)
+        urutanDB = list(
+            RiwayatDeteksi.objects.filter(user=self.user)
+            .order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(semuaId, urutanDB)
+
+    def test_filter_kelas_dan_status_sehat(self):
+        semuaId = self._ambilSemuaHalaman(batas=25, kelas='Leaf Curl')
+        self.assertEqual(len(semuaId), 60)
+
+        respons = self.client.get('/api/history/', {'sehat': 'true', 'batas': 100})
+        self.assertEqual(respons.data['jumlah'], 60)
+        self.assertTrue(all(riwayat['status_sehat'] for riwayat in respons.data['riwayat']))
+
+    def test_filter_rentang_tanggal(self):
+        besok = (timezone.localdate() + timedelta(days=1)).isoformat()
+        respons = self.client.get('/api/history/', {'dari': besok})
+        self.assertEqual(respons.data['jumlah'], 0)
+
+    def test_ekspor_csv_dan_ndjson_gzip(self):
+        respons = self.client.get('/api/history/export/', {'kelas': 'Leaf Curl'})
+        self.assertEqual(respons['Content-Type'], 'text/csv; charset=utf-8')
+        baris = b''.join(respons.streaming_content).decode().splitlines()
+        self.assertEqual(baris[0].split(',')[:3], ['id', 'waktu', 'nama_kelas'])
+        self.assertEqual(len(baris), 61)
+
+        respons = self.client.get('/api/history/export/', {'tipe': 'ndjson', 'gzip': 'true'})
+        isi = [json.loads(teks) for teks in gzip.decompress(b''.join(respons.streaming_content)).splitlines()]
+        self.assertEqual(len(isi), 120)
+        self.assertEqual(
+            {riwayat['nama_indonesia'] for riwayat in isi if riwayat['nama_kelas'] == 'Leaf Curl'},
+            {'Keriting Daun'}
+        )
+
+    def test_parameter_tidak_valid(self):
+        for parameter in ({'cursor': 'bukan-cursor'}, {'sehat': 'mungkin'}, {'dari': '2024-13-01'}):
+            respons = self.client.get('/api/history/', parameter)
+            self.assertEqual(respons.status_code, 400)
+
+
+class StatistikHarianTest(TestCase):
+    """Rollup statistik harian dan endpoint /api/stats/."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='penyuluh', password='rahasia123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for indeks in range(12):
+            RiwayatDeteksi.objects.create(
+                user=self.user, gambar=f'deteksi/s{indeks}.jpg',
+                nama_kelas='Healthy Leaf' if indeks % 3 == 0 else 'Whitefly',
+                kepercayaan=0.5 + indeks / 100, status_sehat=indeks % 3 == 0
+            )
+
+    def _rollupSamaDenganRiwayat(self):
+        def kunci(baris):
+            return (baris.tanggal, baris.nama_kelas, baris.jumlah, baris.jumlah_sehat,
+                    round(baris.total_kepercayaan, 6))
+
+        tersimpan = sorted(kunci(baris) for baris in StatistikHarian.objects.filter(user=self.user, jumlah__gt=0))
+        dihitung = sorted(kunci(baris) for baris in hitungRollupDariRiwayat(RiwayatDeteksi.objects.filter(user=self.user)))
+        self.assertEqual(tersimpan, dihitung)
+
+    def test_rollup_mengikuti_buat_dan_hapus(self):
+        self._rollupSamaDenganRiwayat()
+        for riwayat in RiwayatDeteksi.objects.filter(nama_kelas='Whitefly')[:3]:
+            riwayat.delete()
+        self._rollupSamaDenganRiwayat()
+
+    def test_endpoint_hanya_membaca_rollup(self):
+        with self.assertNumQueries(1):
+            respons = self.client.get('/api/stats/')
+        self.assertEqual(respons.data['ringkasan']['jumlahDeteksi'], 12)
+        self.assertEqual(respons.data['ringkasan']['persenSehat'], 33.33)
+
+        respons = self.client.get('/api/stats/', {'dari': '2020-01-01'})
+        self.assertEqual(respons.status_code, 400)
+
+    def test_statistik_global_hanya_untuk_staf(self):
+        petani = User.objects.create_user(username='petani', password='rahasia123')
+        RiwayatDeteksi.objects.create(
+            user=petani, gambar='deteksi/lain.jpg',
+            nama_kelas='Whitefly', kepercayaan=0.9, status_sehat=False
+        )
+        self.assertEqual(self.client.get('/api/stats/global/').status_code, 403)
+        self.assertEqual(APIClient().get('/api/stats/global/').status_code, 401)
+
+        self.user.is_staff = True
+        self.user.save()
+        respons = self.client.get('/api/stats/global/')
+        self.assertEqual(respons.status_code, 200)
+        self.assertEqual(respons.data['ringkasan']['jumlahDeteksi'], 13)
+
+
+class PruneHistoryTest(TestCase):
+    """Kebijakan retensi command prune_history."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='pemangkas', password='rahasia123')
+        waktuDasar = timezone.now()
+        for indeks in range(12):
+            riwayat = RiwayatDeteksi.objects.create(
+                user=self.user, gambar=f'deteksi/p{indeks}.jpg', nama_kelas='Whitefly',
+                kepercayaan=0.7, status_sehat=False
+            )
+            RiwayatDeteksi.objects.filter(pk=riwayat.pk).update(
+                created_at=waktuDasar - timedelta(days=indeks // 2)
+            )
+
+    def _pangkas(self, *argumen):
+        call_command('prune_history', *argumen, '--tanpa-media', '--ukuran-potongan', '2',
+                     stdout=io.StringIO())
+        return list(RiwayatDeteksi.objects.filter(user=self.user).order_by('-created_at', '-id'))
+
+    def test_dry_run_tidak_menghapus(self):
+        self.assertEqual(len(self._pangkas('--maks-per-user', '3', '--dry-run')), 12)
+
+    def test_maks_per_user_dan_umur(self):
+        terbaru = list(RiwayatDeteksi.objects.filter(user=self.user).order_by('-created_at', '-id'))
+        # Batas jatuh di antara dua riwayat dengan created_at kembar
+        self.assertEqual(self._pangkas('--maks-per-user', '5'), terbaru[:5])
+        self.assertEqual(self._pangkas('--hari', '1'), terbaru[:2])
+
+
+class KaskadeModelTest(TestCase):
+    """Keputusan eskalasi kaskade model cepat -> model penuh."""
+
+    @override_settings(KASKADE_AMBANG_KEPERCAYAAN=0.9, KASKADE_KELAS_PANTAU=['Leaf Curl'])
+    def test_eskalasi_ambang_dan_kelas_pantau(self):
+        probabilitas = np.full((3, 9), 0.01, dtype=np.float32)
+        probabilitas[0, 3] = 0.95  # Healthy Leaf, yakin
+        probabilitas[1, 3] = 0.60  # Healthy Leaf, ragu
+        probabilitas[2, 4] = 0.99  # Leaf Curl, kelas pantau
+        self.assertEqual(perluEskalasi(probabilitas).tolist(), [False, True, True])
+        self.assertEqual(perluEskalasi(probabilitas, ambang=0.5, kelasPantau=[]).tolist(),
+                         [False, False, False])
+
+    def _siapkanModelCepat(self, jumlahKolom):
+        direktori = tempfile.TemporaryDirectory()
+        self.addCleanup(direktori.cleanup)
+        jalurModel = os.path.join(direktori.name, 'model_cepat.uji')
+        with open(jalurModel, 'w') as berkas:
+            berkas.write(str(jumlahKolom))
+        self.enterContext(mock.patch.dict(DAFTAR_BACKEND, {BackendCepatUji.nama: BackendCepatUji}))
+        self.enterContext(override_settings(
+            KASKADE_AKTIF=True, MODEL_CEPAT_BACKEND=BackendCepatUji.nama, MODEL_CEPAT_PATH=jalurModel,
+        ))
+        self.enterContext(mock.patch.object(cascade, '_modelCepat', None))
+        self.enterContext(mock.patch.object(cascade, '_gagalMuat', False))
+
+    @override_settings(KASKADE_AMBANG_KEPERCAYAAN=0.9, KASKADE_KELAS_PANTAU=[])
+    def test_prediksi_kaskade_eskalasi_ke_model_penuh(self):
+        self._siapkanModelCepat(9)
+        self.enterContext(mock.patch.object(cascade, 'statistikKaskade', cascade.StatistikKaskade()))
+        # Baris terang dijawab yakin oleh model cepat, baris gelap ragu
+        arrayBatch = np.zeros((4, 224, 224, 3), dtype=np.float32)
+        arrayBatch[[0, 2]] = 1.0
+        daftarMasukanPenuh = []
+
+        def prediksiPenuh(arrayEskalasi):
+            daftarMasukanPenuh.append(len(arrayEskalasi))
+            probabilitas = np.zeros((len(arrayEskalasi), 9), dtype=np.float32)
+            probabilitas[:, 0] = 1.0
+            return probabilitas
+
+        probabilitas, daftarTahap = cascade.prediksiKaskade(arrayBatch, prediksiPenuh)
+        self.assertEqual(daftarTahap, ['cepat', 'penuh', 'cepat', 'penuh'])
+        self.assertEqual(daftarMasukanPenuh, [2])
+        self.assertEqual(np.argmax(probabilitas, axis=1).tolist(), [3, 0, 3, 0])
+        statistik = cascade.statistikKaskade.statistik()
+        self.assertEqual((statistik['cepat'], statistik['penuh']), (2, 2))
+
+    def test_model_cepat_dengan_jumlah_kelas_berbeda_ditolak(self):
+        self._siapkanModelCepat(5)
+        self.assertIsNone(cascade.muatModelCepat())
+        self.assertTrue(cascade._gagalMuat)
+        self.assertFalse(cascade.kaskadeAktif())
+
+
+class RegistriModelTest(TestCase):
+    """Penambahan, aktivasi, dan verifikasi versi di registri model."""
+
+    def setUp(self):
+        self.direktori = tempfile.TemporaryDirectory()
+        self.addCleanup(self.direktori.cleanup)
+        self.registri = RegistriModel(os.path.join(self.direktori.name, 'registri'))
+        self.jalurSumber = os.path.join(self.direktori.name, 'model.onnx')
+        with open(self.jalurSumber, 'wb') as berkas:
+            berkas.write(b'bobot-model')
+
+    def test_tambah_dan_aktifkan(self):
+        self.registri.tambah(self.jalurSumber, 'v1', 'onnx')
+        self.registri.tambah(self.jalurSumber, 'v2', 'onnx', catatan='lebih cepat')
+        self.assertIsNone(self.registri.versiAktif())
+        self.registri.aktifkan('v2')
+        self.assertEqual(self.registri.versiAktif(), 'v2')
+        self.assertEqual([versiModel.versi for versiModel in self.registri.daftarVersi()], ['v1', 'v2'])
+        with self.assertRaises(KesalahanRegistri):
+            self.registri.tambah(self.jalurSumber, 'v1', 'onnx')
+
+    def test_tolak_versi_rusak_atau_tidak_kompatibel(self):
+        versiModel = self.registri.tambah(self.jalurSumber, 'v1', 'onnx')
+        with open(versiModel.jalurModel, 'ab') as berkas:
+            berkas.write(b'!')
+        with self.assertRaises(KesalahanRegistri):
+            self.registri.aktifkan('v1')
+        self.assertIsNone(self.registri.versiAktif())
+
+        with self.assertRaises(KesalahanRegistri):
+            self.registri.tambah(self.jalurSumber, 'v2', 'onnx', kelas=['Healthy Leaf'])
+
+
+@override_settings(
+    MODEL_REGISTRI_AKTIF=True, MODEL_REGISTRI_INTERVAL_CEK=0, MODEL_JUMLAH_PEMANASAN=1,
+    INFERENSI_BATCH_AKTIF=True, INFERENSI_POOL_AKTIF=False, KASKADE_AKTIF=False,
+    CACHE_PREDIKSI_AKTIF=True,
+)
+class PergantianVersiModelTest(TestCase):
+    """Versi yang dicatat selalu versi model yang menjawab."""
+
+    def setUp(self):
+        direktori = tempfile.TemporaryDirectory()
+        self.addCleanup(direktori.cleanup)
+        self.enterContext(mock.patch.dict(DAFTAR_BACKEND, {BackendUji.nama: BackendUji}))
+        self.enterContext(override_settings(MODEL_REGISTRI_DIR=os.path.join(direktori.name, 'registri')))
+        self.enterContext(mock.patch.object(model_registry, '_pengelolaModel', None))
+        self.addCleanup(setattr, BackendUji, 'kaitPrediksi', None)
+        dapatkanCachePrediksi().bersihkan()
+
+        self.registri = model_registry.dapatkanRegistriModel()
+        for versi, indeksKelas in (('v1', '3'), ('v2', '5')):
+            jalurSumber = os.path.join(direktori.name, f'{versi}.uji')
+            with open(jalurSumber, 'w') as berkas:
+                berkas.write(indeksKelas)
+            self.registri.tambah(jalurSumber, versi, BackendUji.nama)
+        self.registri.aktifkan('v1')
+
+    def test_pergantian_di_tengah_prediksi(self):
+        pengelola = dapatkanPengelolaModel()
+        modelLama = pengelola.aktif()[1]
+        dicatatSaatGanti = {}
+
+        def gantiKeV2(model):
+            self.registri.aktifkan('v2')
+            pengelola.periksaVersi(paksa=True)
+            batasWaktu = time.monotonic() + 5
+            while pengelola.statistik()['versiAktif'] != 'v2' and time.monotonic() < batasWaktu:
+                time.sleep(0.01)
+            dicatatSaatGanti['versiAktif'] = pengelola.statistik()['versiAktif']
+            dicatatSaatGanti['lamaDihentikan'] = model.dihentikan
+
+        BackendUji.kaitPrediksi = gantiKeV2
+        fileGambar = buatFileGambar()
+        hasil = klasifikasiGambar(fileGambar)
+
+        # Model v1 menjawab dan tidak dihentikan selama masih dipinjam
+        self.assertEqual(dicatatSaatGanti, {'versiAktif': 'v2', 'lamaDihentikan': False})
+        self.assertEqual((hasil['kelas'], hasil['versiModel']), ('Healthy Leaf', 'v1'))
+        self.assertTrue(modelLama.dihentikan)
+        self.assertEqual(
+            dapatkanCachePrediksi().ambil('v1', hitungHashGambar(fileGambar))[0]['kelas'],
+            'Healthy Leaf'
+        )
+
+        hasil = klasifikasiGambar(buatFileGambar(warna=(200, 200, 40)))
+        self.assertEqual((hasil['kelas'], hasil['versiModel']), ('Leaf Spot', 'v2'))
+
+
+class PoolInferensiTest(TestCase):
+    """Inferensi lewat pool worker dan siklus hidup pool."""
+
+    def _buatPool(self):
+        direktori = tempfile.TemporaryDirectory()
+        self.addCleanup(direktori.cleanup)
+        jalurModel = os.path.join(direktori.name, 'model_cepat.uji')
+        with open(jalurModel, 'w') as berkas:
+            berkas.write('9')
+        self.enterContext(mock.patch.dict(DAFTAR_BACKEND, {BackendCepatUji.nama: BackendCepatUji}))
+        pool = PoolInferensi(2, BackendCepatUji.nama, jalurModel, (32, 32), jumlahPemanasan=1, timeout=10)
+        # Backend stub hanya terdaftar di proses ini; worker hasil fork ikut
+        # mewarisinya (produksi memakai spawn)
+        pool._konteks = multiprocessing.get_context('fork')
+        self.addCleanup(pool.hentikan)
+        return pool, BackendCepatUji(jalurModel)
+
+    @override_settings(
+        MODEL_REGISTRI_AKTIF=False, INFERENSI_BATCH_AKTIF=False, KASKADE_AKTIF=False,
+    )
+    def test_hasil_pool_sama_dengan_prediksi_dalam_proses(self):
+        pool, modelLokal = self._buatPool()
+        arrayBatch = np.random.default_rng(0).random((5, 32, 32, 3), dtype=np.float32)
+        arrayBatch[[0, 3]] = 1.0
+        arrayBatch[1] = 0.0
+
+        with override_settings(INFERENSI_POOL_AKTIF=False), \
+                mock.patch.object(utils, '_modelTerlatih', modelLokal):
+            hasilLokal = utils.prediksiBatch(arrayBatch)
+        with override_settings(INFERENSI_POOL_AKTIF=True), \
+                mock.patch.object(utils, '_poolInferensi', pool), \
+                mock.patch.object(utils, 'dapatkanJalurModel', return_value=pool.jalurModel):
+            hasilPool = utils.prediksiBatch(arrayBatch)
+
+        self.assertEqual(hasilPool.shape, (5, 9))
+        np.testing.assert_array_equal(hasilPool, hasilLokal)
+        # Setiap baris dijawab dari gambarnya sendiri di shared memory
+        self.assertEqual(
+            (hasilPool[:, 0] == 0).tolist(), (arrayBatch.mean(axis=(1, 2, 3)) > 0.5).tolist()
+        )
+        self.assertEqual((hasilPool[:, 0] == 0).tolist()[:2], [True, False])
+
+    def test_atexit_didaftarkan_sekali_dan_dilepas(self):
+        pool, _ = self._buatPool()
+        with mock.patch('api.worker_pool.atexit') as modulAtexit:
+            pool.mulai()
+            # Dijalankan ulang (mis. setelah start gagal atau fork)
+            pool._hentikanWorker()
+            pool.mulai()
+            modulAtexit.register.assert_called_once_with(pool.hentikan)
+            pool.hentikan()
+            modulAtexit.unregister.assert_called_once_with(pool.hentikan)
+
+    def test_prediksi_setelah_dihentikan_gagal(self):
+        pool = PoolInferensi(1, 'onnx', 'tidak-ada.onnx', (224, 224))
+        pool.hentikan()
+        with mock.patch.object(pool, '_mulaiWorker') as mulaiWorker:
+            with self.assertRaises(RuntimeError):
+                pool.prediksi(np.zeros((1, 224, 224, 3), dtype=np.float32))
+            with self.assertRaises(RuntimeError):
+                pool.mulai()
+        mulaiWorker.assert_not_called()
+
+
+class PenulisRiwayatTest(TestCase):
+    """Pemuatan ulang tumpahan write-behind yang dipakai bersama worker."""
+
+    def setUp(self):
+        direktori = tempfile.TemporaryDirectory()
+        self.addCleanup(direktori.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=os.path.join(direktori.name, 'media')))
+        self.direktoriTumpahan = os.path.join(direktori.name, 'tumpahan')
+        self.user = User.objects.create_user(username='penulis', password='rahasia123')
+
+    def _penulis(self):
+        return PenulisRiwayat(ukuranBatch=2, direktoriTumpahan=self.direktoriTumpahan)
+
+    def _entri(self, indeks, kepercayaan=0.8):
+        return EntriRiwayat(
+            self.user.pk, None, 'Whitefly', kepercayaan, False,
+            f'daun{indeks}.png', buatFileGambar(warna=(indeks, 100, 100)).read(),
+        )
+
+    def test_tumpahan_diklaim_satu_worker(self):
+        self._penulis()._tumpahkan([self._entri(indeks) for indeks in range(2)])
+        penulisA, penulisB = self._penulis(), self._penulis()
+
+        daftarKlaim = penulisB._klaimTumpahan(os.listdir(self.direktoriTumpahan))
+        penulisA._muatUlangTumpahan(paksa=True)
+        self.assertEqual(RiwayatDeteksi.objects.count(), 0)
+
+        penulisB._tulisTumpahan(daftarKlaim)
+        penulisA._muatUlangTumpahan(paksa=True)
+        self.assertEqual(RiwayatDeteksi.objects.count(), 2)
+        self.assertEqual(os.listdir(self.direktoriTumpahan), [])
+
+    def test_riwayat_gagal_dikarantina_tanpa_menahan_lainnya(self):
+        penulis = self._penulis()
+        # Riwayat tidak valid ditumpahkan paling awal
+        penulis._tumpahkan([self._entri(0, kepercayaan=None)])
+        penulis._tumpahkan([self._entri(indeks) for indeks in range(1, 4)])
+
+        for _ in range(5):
+            penulis._muatUlangTumpahan(paksa=True)
+
+        self.assertEqual(RiwayatDeteksi.objects.count(), 3)
+        self.assertEqual(os.listdir(self.direktoriTumpahan), ['karantina'])
+        daftarKarantina = os.listdir(penulis.direktoriKarantina)
+        self.assertEqual(len(daftarKarantina), 2)
+        namaMetadata = next(nama for nama in daftarKarantina if nama.endswith('.json'))
+        with open(os.path.join(penulis.direktoriKarantina, namaMetadata)) as berkas:
+            metadata = json.load(berkas)
+        self.assertEqual(metadata['percobaan'], 3)
+        self.assertIn('kesalahan', metadata)
+
+
+class PenyimpananKontenTest(TestCase):
+    """Deduplikasi blob gambar dan jumlah referensinya."""
+
+    def setUp(self):
+        direktori = tempfile.TemporaryDirectory()
+        self.addCleanup(direktori.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=direktori.name, THUMBNAIL_AKTIF=False))
+        self.user = User.objects.create_user(username='pengunggah', password='rahasia123')
+
+    def _buatRiwayat(self, fileGambar):
+        return RiwayatDeteksi.objects.create(
+            user=self.user, gambar=fileGambar, nama_kelas='Whitefly',
+            kepercayaan=0.7, status_sehat=False
+        )
+
+    def _hapus(self, riwayat):
+        with self.captureOnCommitCallbacks(execute=True):
+            riwayat.delete()
+
+    def test_upload_identik_berbagi_blob(self):
+        riwayatA = self._buatRiwayat(buatFileGambar('a.png'))
+        riwayatB = self._buatRiwayat(buatFileGambar('b.png'))
+        nama = riwayatA.gambar.name
+        self.assertEqual(riwayatB.gambar.name, nama)
+        self.assertTrue(nama.startswith(PREFIKS_KONTEN + '/'))
+        self.assertEqual(BlobGambar.objects.get(nama=nama).jumlah_referensi, 2)
+
+        self._hapus(riwayatA)
+        self.assertEqual(BlobGambar.objects.get(nama=nama).jumlah_referensi, 1)
+        self.assertTrue(penyimpananKonten.exists(nama))
+
+        self._hapus(riwayatB)
+        self.assertFalse(BlobGambar.objects.filter(nama=nama).exists())
+        self.assertFalse(penyimpananKonten.exists(nama))
+
+    def test_referensi_diambil_saat_simpan(self):
+        riwayat = self._buatRiwayat(buatFileGambar())
+        nama = riwayat.gambar.name
+
+        # Upload identik sudah menyimpan file (dan referensinya) sebelum
+        # riwayatnya di-insert; riwayat lama yang dihapus di antaranya
+        # tidak boleh menghapus file
+        self.assertEqual(penyimpananKonten.save('daun.png', buatFileGambar()), nama)
+        self._hapus(riwayat)
+        self.assertTrue(penyimpananKonten.exists(nama))
+        self.assertEqual(BlobGambar.objects.get(nama=nama).jumlah_referensi, 1)
+
+    def test_file_blob_hilang_ditulis_ulang(self):
+        nama = self._buatRiwayat(buatFileGambar()).gambar.name
+        os.unlink(penyimpananKonten.path(nama))
+
+        self._buatRiwayat(buatFileGambar())
+        self.assertTrue(penyimpananKonten.exists(nama))
+        self.assertEqual(BlobGambar.objects.get(nama=nama).jumlah_referensi, 2)
+
+
+@override_settings(AUTH_TOKEN_CACHE_ALIAS='default')
+class CacheTokenTest(TestCase):
+    """Logout dan penonaktifan user langsung berlaku walau token di-cache."""
+
+    def setUp(self):
+        self.enterContext(mock.patch.object(authentication, '_cacheToken', None))
+        self.user = User.objects.create_user(username='bertoken', password='rahasia123')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def _statusRiwayat(self):
+        return self.client.get('/api/history/').status_code
+
+    def test_logout_langsung_berlaku(self):
+        self.assertEqual(self._statusRiwayat(), 200)
+        self.assertEqual(self._statusRiwayat(), 200)
+        self.assertEqual(authentication.dapatkanCacheToken().statistik()['hit'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post('/api/auth/logout/').status_code, 200)
+        self.assertEqual(self._statusRiwayat(), 401)
+
+    def test_user_nonaktif_langsung_ditolak(self):
+        self.assertEqual(self._statusRiwayat(), 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self._statusRiwayat(), 401)
+
+    @override_settings(AUTH_TOKEN_CACHE_ALIAS='')
+    def test_tanpa_alias_bersama_tidak_di_cache(self):
+        self.assertEqual(self._statusRiwayat(), 200)
+        self.assertFalse(authentication.dapatkanCacheToken().aktif)
+        # Tanpa cache, penonaktifan berlaku tanpa menunggu sinyal
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self._statusRiwayat(), 401)
+
+
+class KontrolMasukTest(TestCase):
+    """Slot inferensi, antrean tunggu, dan penolakan KontrolMasuk."""
+
+    def test_antrean_penuh_ditolak(self):
+        kontrol = KontrolMasuk(maksBerjalan=1, maksAntre=0, retryAfter=7)
+        with kontrol.masuk():
+            with self.assertRaises(AntreanPenuh) as konteks:
+                with kontrol.masuk():
+                    pass
+        self.assertEqual(konteks.exception.retryAfter, 7)
+        self.assertEqual(kontrol.statistik()['ditolak'], 1)
+
+    def test_batas_tunggu_habis(self):
+        kontrol = KontrolMasuk(maksBerjalan=1, maksAntre=1, batasTunggu=0.05)
+        with kontrol.masuk():
+            mulai = time.monotonic()
+            with self.assertRaises(AntreanPenuh):
+                with kontrol.masuk():
+                    pass
+            self.assertGreaterEqual(time.monotonic() - mulai, 0.05)
+        statistik = kontrol.statistik()
+        self.assertEqual((statistik['berjalan'], statistik['menunggu']), (0, 0))
+
+    def test_slot_dilepas_saat_error(self):
+        kontrol = KontrolMasuk(maksBerjalan=1, maksAntre=0)
+        with self.assertRaises(ValueError):
+            with kontrol.masuk():
+                raise ValueError('inferensi gagal')
+        self.assertEqual(kontrol.statistik()['berjalan'], 0)
+        with kontrol.masuk():
+            pass
+
+    def test_penunggu_mendapat_slot_yang_dilepas(self):
+        kontrol = KontrolMasuk(maksBerjalan=1, maksAntre=1, batasTunggu=5)
+        slotDiambil = threading.Event()
+
+        def tahanSebentar():
+            with kontrol.masuk():
+                slotDiambil.set()
+                time.sleep(0.05)
+
+        thread = threading.Thread(target=tahanSebentar)
+        thread.start()
+        slotDiambil.wait(5)
+        with kontrol.masuk():
+            self.assertEqual(kontrol.statistik()['berjalan'], 1)
+        thread.join()
+        self.assertEqual(kontrol.statistik()['diterima'], 2)
+
+    def test_amasuk_tolak_tunggu_dan_lepas(self):
+        kontrol = KontrolMasuk(maksBerjalan=1, maksAntre=1, batasTunggu=0.05)
+
+        async def skenario():
+            async with kontrol.amasuk():
+                # Menunggu sampai batas waktu habis
+                with self.assertRaises(AntreanPenuh):
+                    async with kontrol.amasuk():
+                        pass
+                # Antrean penuh: langsung ditolak
+                kontrol.maksAntre = 0
+                with self.assertRaises(AntreanPenuh):
+                    async with kontrol.amasuk():
+                        pass
+            with self.assertRaises(ValueError):
+                async with kontrol.amasuk():
+                    raise ValueError('inferensi gagal')
+
+        asyncio.run(skenario())
+        statistik = kontrol.statistik()
+        self.assertEqual((statistik['berjalan'], statistik['menunggu']), (0, 0))
+        self.assertEqual((statistik['diterima'], statistik['ditolak']), (2, 2))
+
+
+class BatasPrediksiViewTest(TestCase):
+    """Respons 429 (rate limit) dan 503 (admission control) endpoint prediksi."""
+
+    def setUp(self):
+        # Hitungan throttle disimpan di cache 'default'
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+
+    def test_rate_limit_429(self):
+        rate = {'prediksi_anon': '1/min', 'prediksi_user': '1/min'}
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rate}):
+            for url in ('/api/predict/', '/api/predict/async/'):
+                cache.clear()
+                self.assertEqual(self.client.post(url, {}).status_code, 400)
+                respons = self.client.post(url, {})
+                self.assertEqual(respons.status_code, 429, url)
+                self.assertIn('Retry-After', respons)
+
+    def test_server_penuh_503(self):
+        kontrol = KontrolMasuk(maksBerjalan=1, maksAntre=0, retryAfter=3)
+        self.enterContext(mock.patch('api.views.dapatkanKontrolMasuk', return_value=kontrol))
+        self.enterContext(kontrol.masuk())
+        for url in ('/api/predict/', '/api/predict/async/'):
+            respons = self.client.post(url, {'image': buatFileGambar()})
+            self.assertEqual(respons.status_code, 503, url)
+            self.assertEqual(respons['Retry-After'], '3')
+        self.assertEqual(kontrol.statistik()['ditolak'], 2)
+
+
+class KatalogPenyakitTest(TestCase):
+    """Validator ETag/Last-Modified endpoint katalog penyakit."""
+
+    def setUp(self):
+        self.enterContext(mock.patch.object(disease_catalog, '_katalogPenyakit', None))
+        kemarin = timezone.now() - timedelta(days=1)
+        self.lama = Penyakit.objects.create(nama='Leaf Spot', nama_indonesia='Bercak Daun', deskripsi='-')
+        self.baru = Penyakit.objects.create(nama='Leaf Curl', nama_indonesia='Keriting Daun', deskripsi='-')
+        Penyakit.objects.filter(pk=self.lama.pk).update(updated_at=kemarin - timedelta(days=1))
+        Penyakit.objects.filter(pk=self.baru.pk).update(updated_at=kemarin)
+        self.client = APIClient()
+
+    def test_etag_dan_304(self):
+        for url in ('/api/classes/', '/api/diseases/', f'/api/diseases/{self.lama.pk}/'):
+            respons = self.client.get(url)
+            self.assertEqual(respons.status_code, 200, url)
+            etag = respons['ETag']
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304, url)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=f'W/{etag}').status_code, 304, url)
+            self.assertEqual(
+                self.client.get(url, HTTP_IF_MODIFIED_SINCE=respons['Last-Modified']).status_code, 304, url
+            )
+
+            responsGzip = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(responsGzip.status_code, 200, url)
+            self.assertNotEqual(responsGzip['ETag'], etag)
+            self.assertEqual(json.loads(gzip.decompress(responsGzip.content)), respons.json())
+
+        etagLama = self.client.get('/api/diseases/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lama.deskripsi = 'Bercak coklat pada daun'
+            self.lama.save()
+        self.assertEqual(self.client.get('/api/diseases/', HTTP_IF_NONE_MATCH=etagLama).status_code, 200)
+
+    def test_hapus_penyakit_terbaru_tidak_memundurkan_last_modified(self):
+        respons = self.client.get('/api/diseases/')
+        lastModifiedLama = respons['Last-Modified']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.baru.delete()
+        respons = self.client.get('/api/diseases/', HTTP_IF_MODIFIED_SINCE=lastModifiedLama)
+        self.assertEqual(respons.status_code, 200)
+        self.assertEqual(respons.json()['jumlah'], 1)
+        self.assertGreater(parse_http_date(respons['Last-Modified']), parse_http_date(lastModifiedLama))
+
+    @override_settings(KATALOG_CACHE_ALIAS='default')
+    def test_waktu_ubah_bersama_antar_worker(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        workerA = disease_catalog.KatalogPenyakit('default', intervalCekVersi=0)
+        workerB = disease_catalog.KatalogPenyakit('default', intervalCekVersi=0)
+        buatData = lambda daftarPenyakit: {'jumlah': len(daftarPenyakit)}
+
+        daftarWaktu = []
+        for _ in range(3):
+            workerA.invalidasi()
+            payloadA = workerA.payload('penyakit', buatData)
+            payloadB = workerB.payload('penyakit', buatData)
+            self.assertEqual(payloadA.terakhirDiubah, payloadB.terakhirDiubah)
+            daftarWaktu.append(payloadB.terakhirDiubah)
+        # Naik terus walaupun invalidasi terjadi di milidetik yang sama
+        self.assertEqual(daftarWaktu, sorted(set(daftarWaktu)))
+
+
+@override_settings(GAMBAR_PIKSEL_MAKS=100_000)
+class ValidasiUnggahanTest(TestCase):
+    """File upload ditolak dari magic bytes dan header, sebelum decode penuh."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        # Decode penuh (load) dilarang selama validasi
+        self.enterContext(mock.patch.object(
+            ImageFile.ImageFile, 'load', side_effect=AssertionError('gambar di-decode penuh')
+        ))
+
+    def _fileDitolak(self):
+        pngKecil = buatFileGambar().read()
+        gif = io.BytesIO()
+        Image.new('RGB', (8, 8)).save(gif, format='GIF')
+        return {
+            'teks': SimpleUploadedFile('daun.jpg', b'bukan gambar sama sekali', content_type='image/jpeg'),
+            'gif': SimpleUploadedFile('daun.png', gif.getvalue(), content_type='image/png'),
+            'headerTerpotong': SimpleUploadedFile('daun.png', pngKecil[:20], content_type='image/png'),
+            'bomb': buatFileGambar(ukuran=(400, 400)),
+        }
+
+    def test_periksa_gambar_menolak_tanpa_decode(self):
+        for nama, fileGambar in self._fileDitolak().items():
+            with self.assertRaises(GambarTidakValid, msg=nama):
+                periksaGambar(fileGambar)
+
+    def test_header_dibaca_dengan_draft_jpeg(self):
+        # 2000x2000 = 4 MP, tetapi di-decode pada skala 1/8 (250x250)
+        gambar = bukaHeaderGambar(buatFileGambar('foto.jpg', ukuran=(2000, 2000), format='JPEG'))
+        self.assertEqual(gambar.infoGambar.format, 'JPEG')
+        self.assertEqual((gambar.infoGambar.lebar, gambar.infoGambar.tinggi), (2000, 2000))
+        self.assertEqual(gambar.infoGambar.pikselDecode, 250 * 250)
+
+        info = periksaGambar(buatFileGambar('daun.webp', format='WEBP'))
+        self.assertEqual((info.format, info.pikselDecode), ('WEBP', 64 * 64))
+
+    def test_endpoint_prediksi_menjawab_400(self):
+        klasifikasi = self.enterContext(mock.patch('api.views.klasifikasiGambar'))
+        for url in ('/api/predict/', '/api/predict/async/'):
+            for nama, fileGambar in self._fileDitolak().items():
+                respons = self.client.post(url, {'image': fileGambar})
+                self.assertEqual(respons.status_code, 400, f'{url} {nama}')
+                self.assertFalse(respons.json()['sukses'])
+        klasifikasi.assert_not_called()
+
+
+
+@override_settings(PRAPROSES_RESAMPLER='lanczos')
+class PraprosesGambarTest(TestCase):
+    """Draft decode + reducing_gap tetap dekat dengan jalur lama (decode penuh + LANCZOS)."""
+
+    def test_selisih_piksel_dengan_jalur_lama_kecil(self):
+        # 4000x3000 JPEG di-decode pada skala 1/8 (500x375) lewat draft mode
+        for lebar, tinggi in ((640, 480), (1920, 1080), (4000, 3000)):
+            for formatGambar in ('JPEG', 'PNG'):
+                with self.subTest(resolusi=f'{lebar}x{tinggi}', format=formatGambar):
+                    fileGambar = buatGambarSintetis(lebar, tinggi, formatGambar)
+                    acuan = prosesGambarLama(fileGambar)
+                    fileGambar.seek(0)
+                    hasil = utils.prosesGambar(fileGambar)
+
+                    self.assertEqual(hasil.shape, acuan.shape)
+                    selisih = np.abs(hasil - acuan) * 255
+                    self.assertLess(selisih.mean(), 2.0)
+                    self.assertLess(selisih.max(), 16.0)
+
+
+class PenjadwalBatchTest(TestCase):
+    """Penggabungan permintaan bersamaan oleh PenjadwalBatch."""
+
+    def setUp(self):
+        self.daftarPanggilan = []
+
+    def _fungsiPrediksi(self, arrayBatch, model):
+        self.daftarPanggilan.append((len(arrayBatch), model))
+        # Setiap baris menjawab dengan nilai piksel gambarnya sendiri
+        return arrayBatch.reshape(len(arrayBatch), -1)[:, :3].copy()
+
+    def _prediksiBersamaan(self, penjadwal, daftarMasukan):
+        hasil = [None] * len(daftarMasukan)
+        penghalang = threading.Barrier(len(daftarMasukan))
+
+        def kirim(indeks, nilai, model):
+            penghalang.wait()
+            try:
+                hasil[indeks] = penjadwal.prediksi(np.full((1, 4, 4, 3), nilai, dtype=np.float32), model)
+            except Exception as kesalahan:
+                hasil[indeks] = kesalahan
+
+        daftarThread = [
+            threading.Thread(target=kirim, args=(indeks, nilai, model))
+            for indeks, (nilai, model) in enumerate(daftarMasukan)
+        ]
+        for thread in daftarThread:
+            thread.start()
+        for thread in daftarThread:
+            thread.join(10)
+        return hasil
+
+    def test_permintaan_bersamaan_satu_forward_pass(self):
+        penjadwal = PenjadwalBatch(self._fungsiPrediksi, ukuranBatchMaks=4, waktuTungguMaks=2.0)
+        hasil = self._prediksiBersamaan(penjadwal, [(nilai, None) for nilai in range(4)])
+        self.assertEqual(self.daftarPanggilan, [(4, None)])
+        for nilai, baris in enumerate(hasil):
+            self.assertEqual(baris.tolist(), [nilai] * 3)
+
+    def test_model_berbeda_tidak_digabung(self):
+        modelA, modelB = object(), object()
+        penjadwal = PenjadwalBatch(self._fungsiPrediksi, ukuranBatchMaks=4, waktuTungguMaks=2.0)
+        hasil = self._prediksiBersamaan(penjadwal, [(0, modelA), (1, modelB), (2, modelA), (3, modelB)])
+        self.assertCountEqual(self.daftarPanggilan, [(2, modelA), (2, modelB)])
+        self.assertEqual([baris[0] for baris in hasil], [0, 1, 2, 3])
+
+    def test_kesalahan_diteruskan_ke_semua_pemanggil(self):
+        def gagal(arrayBatch, model):
+            raise RuntimeError('forward pass gagal')
+
+        penjadwal = PenjadwalBatch(gagal, ukuranBatchMaks=2, waktuTungguMaks=2.0)
+        hasil = self._prediksiBersamaan(penjadwal, [(0, None), (1, None)])
+        self.assertTrue(all(isinstance(kesalahan, RuntimeError) for kesalahan in hasil))
+
+    def test_thread_dan_antrean_baru_setelah_fork(self):
+        penjadwal = PenjadwalBatch(self._fungsiPrediksi, ukuranBatchMaks=1, waktuTungguMaks=0)
+        arrayGambar = np.ones((4, 4, 3), dtype=np.float32)
+        penjadwal.prediksi(arrayGambar)
+        threadInduk, antreanInduk = penjadwal._thread, penjadwal._antrean
+
+        # Proses anak hasil fork: pid berbeda, antrean induk tidak boleh dipakai
+        with mock.patch('api.batching.os.getpid', return_value=os.getpid() + 1):
+            self.assertEqual(penjadwal.prediksi(arrayGambar).tolist(), [1, 1, 1])
+            self.assertIsNot(penjadwal._thread, threadInduk)
+            self.assertIsNot(penjadwal._antrean, antreanInduk)
+            self.assertEqual(penjadwal._pid, os.getpid())
+        self.assertEqual(len(self.daftarPanggilan), 2)
+
+
+class CachePrediksiTest(TestCase):
+    """Cache prediksi per hash gambar dan versi model."""
+
+    semuaPrediksi = [{'kelas': 'Healthy Leaf', 'kepercayaan': 0.97}]
+
+    def test_versi_model_bagian_dari_kunci(self):
+        cachePrediksi = CachePrediksi(kapasitas=8)
+        cachePrediksi.simpan('v1', 'hash-a', self.semuaPrediksi)
+        self.assertEqual(cachePrediksi.ambil('v1', 'hash-a'), self.semuaPrediksi)
+        self.assertIsNone(cachePrediksi.ambil('v2', 'hash-a'))
+
+        # Request versi lama dan baru berselang-seling (pergantian registri):
+        # entri kedua versi tetap ada
+        prediksiBaru = [{'kelas': 'Leaf Curl', 'kepercayaan': 0.88}]
+        cachePrediksi.simpan('v2', 'hash-a', prediksiBaru)
+        for _ in range(3):
+            self.assertEqual(cachePrediksi.ambil('v1', 'hash-a'), self.semuaPrediksi)
+            self.assertEqual(cachePrediksi.ambil('v2', 'hash-a'), prediksiBaru)
+        statistik = cachePrediksi.statistik()
+        self.assertEqual((statistik['hit'], statistik['miss'], statistik['ukuran']), (7, 1, 2))
+
+    def test_entri_versi_lama_tersingkir_lru(self):
+        cachePrediksi = CachePrediksi(kapasitas=2)
+        cachePrediksi.simpan('v1', 'hash-a', self.semuaPrediksi)
+        cachePrediksi.simpan('v2', 'hash-a', self.semuaPrediksi)
+        cachePrediksi.simpan('v2', 'hash-b', self.semuaPrediksi)
+        self.assertIsNone(cachePrediksi.ambil('v1', 'hash-a'))
+        self.assertIsNotNone(cachePrediksi.ambil('v2', 'hash-a'))
+        self.assertIsNotNone(cachePrediksi.ambil('v2', 'hash-b'))
+
+    def test_versi_berubah_saat_file_model_diganti(self):
+        with tempfile.TemporaryDirectory() as direktori:
+            jalurModel = os.path.join(direktori, 'model.onnx')
+            with open(jalurModel, 'wb') as berkas:
+                berkas.write(b'bobot-lama')
+            versiLama = dapatkanVersiModel(jalurModel)
+            self.assertEqual(dapatkanVersiModel(jalurModel), versiLama)
+
+            with open(jalurModel, 'wb') as berkas:
+                berkas.write(b'bobot-baru-yang-lebih-panjang')
+            self.assertNotEqual(dapatkanVersiModel(jalurModel), versiLama)
+
+    def test_lru_dan_cache_bersama(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        cachePrediksi = CachePrediksi(kapasitas=2, aliasCacheDjango='default')
+        for hashGambar in ('hash-a', 'hash-b', 'hash-c'):
+            cachePrediksi.simpan('v1', hashGambar, self.semuaPrediksi)
+        self.assertEqual(cachePrediksi.statistik()['ukuran'], 2)
+
+        # Worker lain (cache lokal kosong) mendapat hit dari cache bersama
+        workerLain = CachePrediksi(kapasitas=2, aliasCacheDjango='default')
+        self.assertEqual(workerLain.ambil('v1', 'hash-a'), self.semuaPrediksi)
+        self.assertIsNone(workerLain.ambil('v2', 'hash-a'))
+
+    def test_hash_mengikuti_konten(self):
+        fileA = buatFileGambar('a.png')
+        fileB = buatFileGambar('b.png')
+        fileLain = buatFileGambar('a.png', warna=(200, 30, 30))
+        self.assertEqual(hitungHashGambar(fileA), hitungHashGambar(fileB))
+        self.assertNotEqual(hitungHashGambar(fileA), hitungHashGambar(fileLain))
+        self.assertEqual(fileA.tell(), 0)
+
+
+@override_settings(
+    INSTRUMENTASI_AKTIF=True, MODEL_REGISTRI_AKTIF=False, INFERENSI_BATCH_AKTIF=False,
+    INFERENSI_POOL_AKTIF=False, KASKADE_AKTIF=False, CACHE_PREDIKSI_AKTIF=False,
+)
+class PengukuranTahapTest(TestCase):
+    """ukurTahap, header Server-Timing, dan histogram /api/metrics/."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        metrics.registri.reset()
+        self.addCleanup(metrics.registri.reset)
+
+    def test_ukur_tahap_tanpa_pengukuran_tidak_mencatat(self):
+        with ukurTahap('prediksi'):
+            pass
+        self.assertEqual(metrics.registri.renderPrometheus(), '')
+
+    def test_durasi_tahap_dijumlahkan_ke_server_timing(self):
+        respons = {}
+        token = metrics.mulaiPengukuran()
+        with ukurTahap('decode'):
+            time.sleep(0.002)
+        with ukurTahap('decode'):
+            time.sleep(0.002)
+        with ukurTahap('prediksi'):
+            pass
+        metrics.selesaiPengukuran(token, respons)
+
+        daftarTahap = dict(
+            bagian.split(';dur=') for bagian in respons['Server-Timing'].split(', ')
+        )
+        self.assertEqual(list(daftarTahap), ['decode', 'prediksi'])
+        self.assertGreaterEqual(float(daftarTahap['decode']), 4.0)
+        self.assertIn(
+            'chiliguard_tahap_durasi_detik_count{tahap="decode"} 1',
+            metrics.registri.renderPrometheus()
+        )
+
+    @override_settings(INSTRUMENTASI_AKTIF=False)
+    def test_instrumentasi_mati_tanpa_header(self):
+        self.assertIsNone(metrics.mulaiPengukuran())
+        respons = self.client.post('/api/predict/', {})
+        self.assertNotIn('Server-Timing', respons)
+
+    def test_server_timing_endpoint_prediksi(self):
+        direktori = tempfile.TemporaryDirectory()
+        self.addCleanup(direktori.cleanup)
+        jalurModel = os.path.join(direktori.name, 'model.uji')
+        with open(jalurModel, 'w') as berkas:
+            berkas.write('3')
+        self.enterContext(mock.patch.object(utils, '_modelTerlatih', BackendUji(jalurModel)))
+
+        for url in ('/api/predict/', '/api/predict/async/'):
+            respons = self.client.post(url, {'image': buatFileGambar()})
+            self.assertEqual(respons.status_code, 200, url)
+            daftarTahap = {bagian.split(';')[0] for bagian in respons['Server-Timing'].split(', ')}
+            # Tahap di thread executor (async) ikut tercatat
+            self.assertLessEqual(
+                {'total', 'parse', 'decode', 'resize', 'normalisasi', 'prediksi', 'katalog'},
+                daftarTahap, url
+            )
+
+        staf = User.objects.create_user(username='staf', password='rahasia123', is_staff=True)
+        self.client.force_login(staf)
+        metrik = self.client.get('/api/metrics/').content.decode()
+        self.assertIn('chiliguard_tahap_durasi_detik_count{tahap="prediksi"} 2', metrik)
+        self.assertIn('chiliguard_prediksi_durasi_per_kelas_detik_count{kelas="Healthy Leaf"}', metrik)
+        self.assertIn('chiliguard_prediksi_durasi_per_ukuran_detik_count{ukuran="<256KB"}', metrik)
+
+    def test_endpoint_metrik_hanya_untuk_staf(self):
+        self.assertEqual(APIClient().get('/api/metrics/').status_code, 401)
+
+        petani = User.objects.create_user(username='petani', password='rahasia123')
+        klien = APIClient()
+        klien.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=petani).key}')
+        self.assertEqual(klien.get('/api/metrics/').status_code, 403)
+
+        petani.is_staff = True
+        petani.save()
+        respons = klien.get('/api/metrics/')
+        self.assertEqual(respons.status_code, 200)
+        self.assertIn(b'chiliguard_model_dimuat', respons.content)
+
+
+@override_settings(THUMBNAIL_AKTIF=False, THUMBNAIL_UKURAN_SEDANG=120, THUMBNAIL_UKURAN_KECIL=40)
+class ThumbnailTest(TestCase):
+    """Thumbnail WebP riwayat, dibagi antar riwayat dengan blob yang sama."""
+
+    def setUp(self):
+        direktori = tempfile.TemporaryDirectory()
+        self.addCleanup(direktori.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=direktori.name))
+        self.user = User.objects.create_user(username='pemotret', password='rahasia123')
+
+    def _buatRiwayat(self):
+        return RiwayatDeteksi.objects.create(
+            user=self.user, gambar=buatFileGambar('daun.jpg', ukuran=(400, 300), format='JPEG'),
+            nama_kelas='Whitefly', kepercayaan=0.7, status_sehat=False
+        )
+
+    def _hapus(self, riwayat):
+        riwayat.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            riwayat.delete()
+
+    def test_thumbnail_dibuat_dengan_ukuran_varian(self):
+        riwayat = self._buatRiwayat()
+        namaTersimpan = buatThumbnail(riwayat)
+        riwayat.refresh_from_db()
+        self.assertEqual(riwayat.gambar_kecil.name, namaTersimpan['gambar_kecil'])
+        for namaField, ukuranMaks in (('gambar_sedang', 120), ('gambar_kecil', 40)):
+            with Image.open(penyimpananKonten.open(namaTersimpan[namaField])) as gambar:
+                self.assertEqual(gambar.format, 'WEBP')
+                self.assertEqual(max(gambar.size), ukuranMaks)
+
+    def test_blob_sama_berbagi_thumbnail(self):
+        riwayatA = self._buatRiwayat()
+        riwayatB = self._buatRiwayat()
+        self.assertEqual(riwayatA.gambar.name, riwayatB.gambar.name)
+        namaA = buatThumbnail(riwayatA)
+
+        # Thumbnail yang sudah ada dipakai ulang tanpa decode atau tulis ulang
+        with mock.patch.object(Image, 'open', side_effect=AssertionError('gambar di-decode ulang')):
+            namaB = buatThumbnail(riwayatB)
+        self.assertEqual(namaB, namaA)
+        riwayatB.refresh_from_db()
+        self.assertEqual(riwayatB.gambar_sedang.name, namaA['gambar_sedang'])
+
+        # Thumbnail baru dihapus bersama referensi blob terakhir
+        self._hapus(riwayatA)
+        self.assertTrue(all(penyimpananKonten.exists(nama) for nama in namaA.values()))
+        self._hapus(riwayatB)
+        self.assertFalse(any(penyimpananKonten.exists(nama) for nama in namaA.values()))
+
+    def test_thumbnail_terhapus_walau_riwayat_terakhir_belum_punya(self):
+        riwayatA = self._buatRiwayat()
+        riwayatB = self._buatRiwayat()
+        namaA = buatThumbnail(riwayatA)
+
+        # riwayatB dihapus sebelum thumbnail-nya sempat dibuat
+        self._hapus(riwayatA)
+        self._hapus(riwayatB)
+        self.assertFalse(penyimpananKonten.exists(riwayatB.gambar.name))
+        self.assertFalse(any(penyimpananKonten.exists(nama) for nama in namaA.values()))
+
+    def _isiDirektori(self, riwayat):
+        return sorted(os.listdir(os.path.dirname(penyimpananKonten.path(riwayat.gambar.name))))
+
+    def test_thumbnail_bersamaan_tidak_membuat_nama_berakhiran(self):
+        riwayat = self._buatRiwayat()
+        namaStandar = {
+            namaField: namaTurunan(riwayat.gambar.name, namaField)
+            for namaField in ('gambar_sedang', 'gambar_kecil')
+        }
+
+        def tulisWorkerLain(nama):
+            with open(penyimpananKonten.path(nama), 'wb') as berkas:
+                berkas.write(b'ditulis worker lain')
+
+        for nama in namaStandar.values():
+            tulisWorkerLain(nama)
+        isiAwal = self._isiDirektori(riwayat)
+
+        # Worker lain menulis thumbnail yang sama di antara pemeriksaan
+        # exists() dan penulisan (juga tepat setelah delete(), jika ada)
+        existsAsli, deleteAsli = FileSystemStorage.exists, FileSystemStorage.delete
+        sudahDiperiksa = []
+
+        def existsTerlambat(storage, nama):
+            if not sudahDiperiksa:
+                sudahDiperiksa.append(nama)
+                return False
+            return existsAsli(storage, nama)
+
+        def hapusLaluDitulisUlang(storage, nama):
+            deleteAsli(storage, nama)
+            tulisWorkerLain(nama)
+
+        with mock.patch.object(
+            FileSystemStorage, 'exists', autospec=True, side_effect=existsTerlambat
+        ), mock.patch.object(FileSystemStorage, 'delete', autospec=True, side_effect=hapusLaluDitulisUlang):
+            self.assertEqual(buatThumbnail(riwayat), namaStandar)
+        self.assertEqual(self._isiDirektori(riwayat), isiAwal)
+        with penyimpananKonten.open(namaStandar['gambar_kecil']) as berkas:
+            self.assertEqual(berkas.read(), b'ditulis worker lain')
+
+        # timpa=True mengganti isi pada nama yang sama
+        self.assertEqual(buatThumbnail(riwayat, timpa=True), namaStandar)
+        self.assertEqual(self._isiDirektori(riwayat), isiAwal)
+        with Image.open(penyimpananKonten.open(namaStandar['gambar_kecil'])) as gambar:
+            self.assertEqual(gambar.format, 'WEBP')
+
+
+def buatArsipZip(daftarEntri):
+    """Isi file zip (bytearray) dari daftar (nama, isi)."""
+    keluaran = io.BytesIO()
+    with zipfile.ZipFile(keluaran, 'w', zipfile.ZIP_DEFLATED) as berkasZip:
+        for nama, isi in daftarEntri:
+            berkasZip.writestr(nama, isi)
+    return bytearray(keluaran.getvalue())
+
+
+@override_settings(
+    MODEL_REGISTRI_AKTIF=False, INFERENSI_BATCH_AKTIF=False, INFERENSI_POOL_AKTIF=False,
+    KASKADE_AKTIF=False, CACHE_PREDIKSI_AKTIF=False, PREDIKSI_BATCH_MAKS_GAMBAR=3,
+)
+class PrediksiBatchViewTest(TestCase):
+    """Endpoint /api/predict/batch/ untuk beberapa gambar dan arsip zip."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        direktori = tempfile.TemporaryDirectory()
+        self.addCleanup(direktori.cleanup)
+        jalurModel = os.path.join(direktori.name, 'model.uji')
+        with open(jalurModel, 'w') as berkas:
+            berkas.write('3')
+        self.enterContext(mock.patch.object(utils, '_modelTerlatih', BackendUji(jalurModel)))
+        self.isiPng = buatFileGambar().read()
+
+    def _kirim(self, **data):
+        return self.client.post('/api/predict/batch/', data)
+
+    def _kirimArsip(self, isiZip):
+        return self._kirim(archive=SimpleUploadedFile('batch.zip', bytes(isiZip), content_type='application/zip'))
+
+    def test_beberapa_gambar(self):
+        respons = self._kirim(images=[buatFileGambar('a.png'), buatFileGambar('b.jpg', format='JPEG')])
+        self.assertEqual(respons.status_code, 200)
+        data = respons.json()
+        self.assertEqual((data['jumlah'], data['jumlahBerhasil']), (2, 2))
+        self.assertEqual([hasil['namaFile'] for hasil in data['hasil']], ['a.png', 'b.jpg'])
+        self.assertEqual({hasil['kelas'] for hasil in data['hasil']}, {'Healthy Leaf'})
+
+    def test_arsip_zip(self):
+        respons = self._kirimArsip(buatArsipZip([
+            ('daun/a.png', self.isiPng), ('daun/b.png', self.isiPng),
+            ('catatan.txt', b'bukan gambar'), ('__MACOSX/._a.png', b'metadata'),
+        ]))
+        self.assertEqual(respons.status_code, 200)
+        data = respons.json()
+        self.assertEqual((data['jumlah'], data['jumlahBerhasil']), (2, 2))
+        self.assertEqual([hasil['namaFile'] for hasil in data['hasil']], ['a.png', 'b.png'])
+
+    def test_terlalu_banyak_gambar_ditolak_sebelum_ekstraksi(self):
+        ekstrak = self.enterContext(mock.patch('api.views.ekstrakEntriArsip'))
+        isiZip = buatArsipZip([(f'{indeks}.png', self.isiPng) for indeks in range(4)])
+        respons = self._kirimArsip(isiZip)
+        self.assertEqual(respons.status_code, 400)
+        self.assertIn('Terlalu banyak gambar', respons.json()['pesan'])
+
+        # Gambar dari key images ikut dihitung
+        respons = self._kirim(
+            images=[buatFileGambar('a.png'), buatFileGambar('b.png')],
+            archive=SimpleUploadedFile('batch.zip', bytes(buatArsipZip([
+                ('c.png', self.isiPng), ('d.png', self.isiPng),
+            ]))),
+        )
+        self.assertEqual(respons.status_code, 400)
+        ekstrak.assert_not_called()
+
+    def test_campuran_gambar_valid_dan_tidak_valid(self):
+        respons = self._kirimArsip(buatArsipZip([
+            ('a.png', self.isiPng), ('rusak.jpg', b'bukan jpeg'), ('c.png', self.isiPng[:20]),
+        ]))
+        self.assertEqual(respons.status_code, 200)
+        data = respons.json()
+        self.assertEqual((data['jumlah'], data['jumlahBerhasil']), (3, 1))
+        self.assertEqual([hasil['sukses'] for hasil in data['hasil']], [True, False, False])
+
+    def test_entri_terlalu_besar(self):
+        isiBesar = buatFileGambar(ukuran=(256, 256)).read()
+        with mock.patch('api.views.UKURAN_FILE_MAKS', len(self.isiPng) + 1):
+            respons = self._kirimArsip(buatArsipZip([('a.png', self.isiPng), ('besar.png', isiBesar)]))
+        self.assertEqual(respons.status_code, 200)
+        hasilBesar = respons.json()['hasil'][1]
+        self.assertFalse(hasilBesar['sukses'])
+        self.assertIn('terlalu besar', hasilBesar['pesan'])
+
+    def test_total_ekstraksi_dibatasi(self):
+        isiZip = buatArsipZip([('a.png', self.isiPng), ('b.png', self.isiPng)])
+        with override_settings(PREDIKSI_BATCH_UKURAN_ARSIP_MAKS=len(self.isiPng) + 1):
+            respons = self._kirimArsip(isiZip)
+            self.assertEqual(respons.status_code, 400)
+            self.assertIn('Total ukuran', respons.json()['pesan'])
+        with override_settings(PREDIKSI_BATCH_UKURAN_ARSIP_MAKS=len(self.isiPng) * 2):
+            self.assertEqual(self._kirimArsip(isiZip).status_code, 200)
+
+    def test_arsip_rusak_400(self):
+        terenkripsi = buatArsipZip([('a.png', self.isiPng)])
+        terenkripsi[terenkripsi.find(b'PK\x01\x02') + 8] |= 0x1
+        kompresiAsing = buatArsipZip([('a.png', self.isiPng)])
+        indeks = kompresiAsing.find(b'PK\x01\x02') + 10
+        kompresiAsing[indeks:indeks + 2] = (99).to_bytes(2, 'little')
+        deflateRusak = buatArsipZip([('a.png', b'x' * 5000)])
+        deflateRusak[35:45] = b'\xff' * 10
+
+        for nama, isiZip in (('bukan zip', b'bukan zip'), ('terenkripsi', terenkripsi),
+                             ('kompresi asing', kompresiAsing), ('deflate rusak', deflateRusak)):
+            respons = self._kirimArsip(isiZip)
+            self.assertEqual(respons.status_code, 400, nama)
+            self.assertFalse(respons.json()['sukses'])
+
+
+@override_settings(
+    MODEL_REGISTRI_AKTIF=False, INFERENSI_BATCH_AKTIF=False, INFERENSI_POOL_AKTIF=False,
+    KASKADE_AKTIF=False, CACHE_PREDIKSI_AKTIF=False, THUMBNAIL_AKTIF=False,
+    RIWAYAT_WRITE_BEHIND_AKTIF=False,
+)
+class PrediksiAsyncViewTest(TestCase):
+    """Endpoint /api/predict/async/."""
+
+    url = '/api/predict/async/'
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        direktori = tempfile.TemporaryDirectory()
+        self.addCleanup(direktori.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=direktori.name))
+        jalurModel = os.path.join(direktori.name, 'model.uji')
+        with open(jalurModel, 'w') as berkas:
+            berkas.write('3')
+        self.enterContext(mock.patch.object(utils, '_modelTerlatih', BackendUji(jalurModel)))
+
+        self.user = User.objects.create_user(username='petani-async', password='rahasia123')
+        self.klienLogin = APIClient()
+        self.klienLogin.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}'
+        )
+
+    def test_user_login_riwayat_tersimpan(self):
+        respons = self.klienLogin.post(self.url, {'image': buatFileGambar()})
+        self.assertEqual(respons.status_code, 200)
+        self.assertEqual((respons.json()['kelas'], respons.json()['tersimpan']), ('Healthy Leaf', True))
+        riwayat = RiwayatDeteksi.objects.get(user=self.user)
+        self.assertEqual(riwayat.nama_kelas, 'Healthy Leaf')
+        self.assertEqual(BlobGambar.objects.get(nama=riwayat.gambar.name).jumlah_referensi, 1)
+
+    def test_anonim_tidak_menyimpan(self):
+        respons = self.client.post(self.url, {'image': buatFileGambar()})
+        self.assertEqual(respons.status_code, 200)
+        self.assertFalse(respons.json()['tersimpan'])
+        self.assertFalse(RiwayatDeteksi.objects.exists())
+
+    def test_file_tidak_valid_400(self):
+        for data in ({}, {'image': SimpleUploadedFile('daun.jpg', b'bukan gambar', content_type='image/jpeg')}):
+            respons = self.client.post(self.url, data)
+            self.assertEqual(respons.status_code, 400)
+            self.assertFalse(respons.json()['sukses'])
+
+    def test_server_penuh_503(self):
+        kontrol = KontrolMasuk(maksBerjalan=1, maksAntre=0, retryAfter=2)
+        self.enterContext(mock.patch('api.views.dapatkanKontrolMasuk', return_value=kontrol))
+        with kontrol.masuk():
+            respons = self.klienLogin.post(self.url, {'image': buatFileGambar()})
+        self.assertEqual(respons.status_code, 503)
+        self.assertEqual(respons['Retry-After'], '2')
+        self.assertFalse(RiwayatDeteksi.objects.exists())
+
+    def test_insert_gagal_membatalkan_referensi_blob(self):
+        with mock.patch.object(RiwayatDeteksi, '_do_insert', side_effect=IntegrityError('insert gagal')):
+            with self.assertRaises(IntegrityError):
+                self.klienLogin.post(self.url, {'image': buatFileGambar()})
+        self.assertFalse(BlobGambar.objects.exists())
+
+    @override_settings(RIWAYAT_WRITE_BEHIND_AKTIF=True)
+    def test_write_behind_di_luar_event_loop(self):
+        daftarLoop = []
+
+        def antre(*args):
+            try:
+                daftarLoop.append(asyncio.get_running_loop())
+            except RuntimeError:
+                daftarLoop.append(None)
+
+        with mock.patch('api.views.antreRiwayatDeteksi', side_effect=antre):
+            self.assertEqual(self.klienLogin.post(self.url, {'image': buatFileGambar()}).status_code, 200)
+        self.assertEqual(daftarLoop, [None])
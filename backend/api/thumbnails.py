@@ -0,0 +1,181 @@
+"""
+Pembuatan thumbnail WebP untuk gambar riwayat deteksi.
+
+Halaman riwayat hanya butuh gambar kecil, jadi setiap RiwayatDeteksi
+mendapat dua turunan WebP (kecil dan sedang) yang disimpan di samping
+file aslinya: deteksi/2026/01/24/daun.jpg -> daun_kecil.webp dan
+daun_sedang.webp. Thumbnail dibuat di thread latar belakang setelah
+transaksi commit, sehingga tidak menambah latensi request prediksi.
+"""
+
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from PIL import Image, ImageOps
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+
+# (nama field model, nama setting ukuran), urut dari yang terbesar agar
+# thumbnail kecil dibuat dari thumbnail sedang, bukan dari gambar asli
+VARIAN_THUMBNAIL = (
+    ('gambar_sedang', 'THUMBNAIL_UKURAN_SEDANG'),
+    ('gambar_kecil', 'THUMBNAIL_UKURAN_KECIL'),
+)
+
+_executorThumbnail = None
+
+
+def namaTurunan(namaAsli, namaField):
+    """
+    Nama file turunan di samping file asli.
+
+    Args:
+        namaAsli: Nama file gambar asli di storage.
+        namaField: 'gambar_kecil' atau 'gambar_sedang'.
+
+    Returns:
+        str: Mis. 'deteksi/2026/01/24/daun_kecil.webp'.
+    """
+    akar, _ = os.path.splitext(namaAsli)
+    return f'{akar}_{namaField.split("_", 1)[1]}.webp'
+
+
+def tulisTurunan(storage, nama, isi, timpa=False):
+    """
+    Menulis file thumbnail pada nama standarnya secara atomik.
+
+    Isi ditulis ke file sementara lalu di-link ke nama akhir. Dua worker
+    yang membuat thumbnail blob yang sama bersamaan tidak menghasilkan
+    file berakhiran acak (daun_kecil_AbC123.webp) yang tidak pernah
+    terhapus; file yang sudah ada dianggap selesai.
+
+    Args:
+        storage: FileSystemStorage tujuan.
+        nama: Nama file dari namaTurunan().
+        isi: Byte WebP thumbnail.
+        timpa: Ganti file yang sudah ada (os.replace, tanpa hapus dulu).
+
+    Returns:
+        str: Nama file, selalu sama dengan nama.
+    """
+    jalurAkhir = storage.path(nama)
+    direktori = os.path.dirname(jalurAkhir)
+    os.makedirs(direktori, exist_ok=True)
+
+    deskriptor, jalurSementara = tempfile.mkstemp(dir=direktori, prefix='.thumbnail-')
+    try:
+        with os.fdopen(deskriptor, 'wb') as berkas:
+            berkas.write(isi)
+        if storage.file_permissions_mode is not None:
+            os.chmod(jalurSementara, storage.file_permissions_mode)
+        if timpa:
+            os.replace(jalurSementara, jalurAkhir)
+        else:
+            try:
+                os.link(jalurSementara, jalurAkhir)
+            except FileExistsError:
+                pass
+    finally:
+        try:
+            os.unlink(jalurSementara)
+        except FileNotFoundError:
+            # Sudah dipindahkan oleh os.replace
+            pass
+    return nama
+
+
+def buatThumbnail(riwayat, timpa=False):
+    """
+    Membuat dan menyimpan semua thumbnail untuk satu riwayat.
+
+    Riwayat dengan gambar yang sama (blob berbasis konten) berbagi
+    thumbnail; thumbnail yang sudah ada dipakai ulang kecuali timpa=True.
+
+    Args:
+        riwayat: Objek RiwayatDeteksi dengan gambar asli tersimpan.
+        timpa: Buat ulang thumbnail meskipun file-nya sudah ada.
+
+    Returns:
+        dict: Nama file per field thumbnail.
+    """
+    from .models import RiwayatDeteksi
+
+    storage = riwayat.gambar_kecil.storage
+    namaTersimpan = {
+        namaField: namaTurunan(riwayat.gambar.name, namaField)
+        for namaField, _ in VARIAN_THUMBNAIL
+    }
+    if not timpa and all(storage.exists(nama) for nama in namaTersimpan.values()):
+        RiwayatDeteksi.objects.filter(pk=riwayat.pk).update(**namaTersimpan)
+        return namaTersimpan
+
+    ukuranTerbesar = getattr(settings, VARIAN_THUMBNAIL[0][1])
+    with riwayat.gambar.open('rb') as fileGambar:
+        gambar = Image.open(fileGambar)
+        # Decode JPEG langsung di skala yang cukup untuk thumbnail terbesar
+        gambar.draft('RGB', (ukuranTerbesar, ukuranTerbesar))
+        gambar.load()
+        gambar = ImageOps.exif_transpose(gambar)
+        if gambar.mode != 'RGB':
+            gambar = gambar.convert('RGB')
+
+    for namaField, namaSetting in VARIAN_THUMBNAIL:
+        ukuran = getattr(settings, namaSetting)
+        gambar.thumbnail((ukuran, ukuran), Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+        buffer = BytesIO()
+        gambar.save(buffer, format='WEBP', quality=settings.THUMBNAIL_KUALITAS, method=4)
+        tulisTurunan(storage, namaTersimpan[namaField], buffer.getvalue(), timpa=timpa)
+
+    # update() agar tidak memicu sinyal post_save lagi
+    RiwayatDeteksi.objects.filter(pk=riwayat.pk).update(**namaTersimpan)
+    return namaTersimpan
+
+
+def _buatThumbnailLatar(daftarId):
+    from .models import RiwayatDeteksi
+
+    close_old_connections()
+    try:
+        for riwayat in RiwayatDeteksi.objects.filter(pk__in=daftarId).exclude(gambar=''):
+            try:
+                buatThumbnail(riwayat)
+            except Exception as kesalahan:
+                print(f"[PERINGATAN] Gagal membuat thumbnail riwayat {riwayat.pk}: {kesalahan}")
+    finally:
+        close_old_connections()
+
+
+def dapatkanExecutorThumbnail():
+    """
+    Mendapatkan executor latar belakang untuk thumbnail (dibuat sekali).
+
+    Returns:
+        ThreadPoolExecutor: Executor dengan THUMBNAIL_JUMLAH_WORKER thread.
+    """
+    global _executorThumbnail
+
+    if _executorThumbnail is None:
+        _executorThumbnail = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_JUMLAH_WORKER,
+            thread_name_prefix='chiliguard-thumbnail'
+        )
+    return _executorThumbnail
+
+
+def jadwalkanThumbnail(daftarId):
+    """
+    Menjadwalkan pembuatan thumbnail setelah transaksi saat ini commit.
+
+    Args:
+        daftarId: Iterable id RiwayatDeteksi.
+    """
+    daftarId = list(daftarId)
+    if not settings.THUMBNAIL_AKTIF or not daftarId:
+        return
+    transaction.on_commit(
+        lambda: dapatkanExecutorThumbnail().submit(_buatThumbnailLatar, daftarId)
+    )
@@ -0,0 +1,149 @@
+"""
+Validasi file gambar upload sebelum di-decode.
+
+content_type dan nama file berasal dari klien, jadi tidak dipercaya.
+Format ditentukan dari magic bytes, lalu hanya header gambar yang dibaca
+(Image.open bersifat lazy) untuk mengetahui dimensinya. Gambar yang
+terlalu besar ditolak sebelum satu piksel pun di-decode, sehingga PNG
+10MB yang mengembang menjadi ratusan MB (decompression bomb) tidak pernah
+dimuat.
+
+Batasnya adalah jumlah piksel yang benar-benar di-decode: JPEG di-decode
+dalam draft mode (skala 1/2..1/8, lihat utils.bukaGambar), sehingga foto
+ponsel 48 MP tetap diterima, sedangkan PNG/WebP di-decode penuh.
+
+Memori puncak per gambar kira-kira:
+    ukuran upload di memori (<= FILE_UPLOAD_MAX_MEMORY_SIZE, sisanya
+    di file sementara) + GAMBAR_PIKSEL_MAKS x 7 byte (decode <= 4 byte
+    per piksel + konversi RGB 3 byte per piksel) + buffer input model.
+Dengan nilai bawaan (12 MP) sekitar 84 MB untuk PNG RGBA terburuk, dan
+jauh lebih kecil untuk JPEG.
+"""
+
+from PIL import Image
+from django.conf import settings
+
+
+class GambarTidakValid(ValueError):
+    """File upload bukan gambar yang boleh diproses."""
+
+
+class InfoGambar:
+    """
+    Hasil pembacaan header gambar.
+
+    Args:
+        format: Format PIL ('JPEG', 'PNG', atau 'WEBP').
+        lebar: Lebar asli (piksel).
+        tinggi: Tinggi asli (piksel).
+        pikselDecode: Jumlah piksel yang akan di-decode (setelah draft).
+    """
+
+    __slots__ = ('format', 'lebar', 'tinggi', 'pikselDecode')
+
+    def __init__(self, format, lebar, tinggi, pikselDecode):
+        self.format = format
+        self.lebar = lebar
+        self.tinggi = tinggi
+        self.pikselDecode = pikselDecode
+
+
+def tebakFormat(awalFile):
+    """
+    Menentukan format gambar dari magic bytes.
+
+    Args:
+        awalFile: Minimal 12 byte pertama file.
+
+    Returns:
+        str: 'JPEG', 'PNG', 'WEBP', atau None jika tidak dikenal.
+    """
+    if awalFile[:3] == b'\xff\xd8\xff':
+        return 'JPEG'
+    if awalFile[:8] == b'\x89PNG\r\n\x1a\n':
+        return 'PNG'
+    if awalFile[:4] == b'RIFF' and awalFile[8:12] == b'WEBP':
+        return 'WEBP'
+    return None
+
+
+def _pesanTerlaluBesar(lebar=None, tinggi=None):
+    dimensi = f' ({lebar}x{tinggi})' if lebar else ''
+    return (
+        f'Resolusi gambar terlalu besar{dimensi}. '
+        f'Maksimal {settings.GAMBAR_PIKSEL_MAKS // 1_000_000} megapiksel.'
+    )
+
+
+def bukaHeaderGambar(fileGambar):
+    """
+    Membuka gambar tanpa men-decode pikselnya dan memeriksa ukurannya.
+
+    Draft mode JPEG sudah diterapkan, sehingga gambar.size adalah ukuran
+    yang akan di-decode oleh gambar.load().
+
+    Args:
+        fileGambar: File gambar (posisi baca di-reset ke awal).
+
+    Returns:
+        PIL.Image.Image: Gambar yang belum di-decode.
+
+    Raises:
+        GambarTidakValid: Jika format tidak dikenal atau gambar terlalu besar.
+    """
+    fileGambar.seek(0)
+    formatFile = tebakFormat(fileGambar.read(16))
+    fileGambar.seek(0)
+    if formatFile is None:
+        raise GambarTidakValid('File bukan gambar JPEG, PNG, atau WebP.')
+
+    try:
+        # Hanya plugin format hasil sniffing yang boleh mem-parse file
+        gambar = Image.open(fileGambar, formats=[formatFile])
+    except Image.DecompressionBombError:
+        raise GambarTidakValid(_pesanTerlaluBesar())
+    except (OSError, SyntaxError):
+        raise GambarTidakValid('File gambar rusak atau tidak dapat dibaca.')
+
+    lebar, tinggi = gambar.size
+    if lebar <= 0 or tinggi <= 0:
+        raise GambarTidakValid('Dimensi gambar tidak valid.')
+
+    # JPEG: decode pada skala 1/2, 1/4, atau 1/8 yang masih >= ukuran input
+    gambar.draft('RGB', settings.UKURAN_GAMBAR_INPUT)
+    pikselDecode = gambar.size[0] * gambar.size[1]
+    if pikselDecode > settings.GAMBAR_PIKSEL_MAKS:
+        raise GambarTidakValid(_pesanTerlaluBesar(lebar, tinggi))
+
+    gambar.infoGambar = InfoGambar(formatFile, lebar, tinggi, pikselDecode)
+    return gambar
+
+
+def periksaGambar(fileGambar):
+    """
+    Memvalidasi file upload hanya dari header-nya (tanpa decode).
+
+    Hasilnya disimpan di atribut file, sehingga pemeriksaan berulang
+    untuk file yang sama tidak membaca header lagi.
+
+    Args:
+        fileGambar: File gambar yang diupload.
+
+    Returns:
+        InfoGambar
+
+    Raises:
+        GambarTidakValid: Jika file tidak boleh diproses.
+    """
+    infoTersimpan = getattr(fileGambar, '_infoGambar', None)
+    if infoTersimpan is not None:
+        return infoTersimpan
+
+    # Gambar tidak di-close: close() ikut menutup file upload
+    info = bukaHeaderGambar(fileGambar).infoGambar
+    fileGambar.seek(0)
+    try:
+        fileGambar._infoGambar = info
+    except AttributeError:
+        pass
+    return info
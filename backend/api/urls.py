@@ -9,9 +9,12 @@ from .views import (
     # Authentication
     RegisterView, LoginView, LogoutView, ProfileView,
     # Detection
-    PrediksiView, RiwayatDeteksiView, DetailRiwayatView,
+    PrediksiView, PrediksiBatchView, PrediksiAsyncView,
+    RiwayatDeteksiView, EksporRiwayatView, DetailRiwayatView,
+    # Statistics
+    StatistikView, StatistikGlobalView,
     # Info
-    KesehatanView, DaftarKelasView, DaftarPenyakitView, DetailPenyakitView
+    KesehatanView, MetrikView, DaftarKelasView, DaftarPenyakitView, DetailPenyakitView
 )
 
 app_name = 'api'
@@ -29,13 +32,23 @@ urlpatterns = [
     # DETECTION ENDPOINTS
     # ==========================================================================
     path('predict/', PrediksiView.as_view(), name='prediksi'),
+    path('predict/batch/', PrediksiBatchView.as_view(), name='prediksi-batch'),
+    path('predict/async/', PrediksiAsyncView.as_view(), name='prediksi-async'),
     path('history/', RiwayatDeteksiView.as_view(), name='riwayat'),
+    path('history/export/', EksporRiwayatView.as_view(), name='ekspor-riwayat'),
     path('history/<int:pk>/', DetailRiwayatView.as_view(), name='detail-riwayat'),
     
+    # ==========================================================================
+    # STATISTICS ENDPOINTS
+    # ==========================================================================
+    path('stats/', StatistikView.as_view(), name='statistik'),
+    path('stats/global/', StatistikGlobalView.as_view(), name='statistik-global'),
+    
     # ==========================================================================
     # INFO ENDPOINTS
     # ==========================================================================
     path('health/', KesehatanView.as_view(), name='kesehatan'),
+    path('metrics/', MetrikView.as_view(), name='metrik'),
     path('classes/', DaftarKelasView.as_view(), name='daftar-kelas'),
     path('diseases/', DaftarPenyakitView.as_view(), name='daftar-penyakit'),
     path('diseases/<int:pk>/', DetailPenyakitView.as_view(), name='detail-penyakit'),
@@ -1,80 +1,525 @@
 """
 Utilitas untuk inferensi model AI ChiliGuard.
 
-Modul ini berisi fungsi-fungsi untuk memuat model TensorFlow
-dan melakukan klasifikasi gambar daun cabai.
+Modul ini berisi fungsi-fungsi untuk memuat model (lewat backend
+inferensi di backends.py) dan melakukan klasifikasi gambar daun cabai.
 """
 
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import numpy as np
 from PIL import Image
-from io import BytesIO
 from django.conf import settings
 
+from .cascade import (
+    TAHAP_CEPAT, TAHAP_PENUH, kaskadeAktif, muatModelCepat, penandaKonfigurasi,
+    prediksiKaskade, versiModelCepat
+)
+from .metrics import ukurTahap
+from .prediction_cache import dapatkanCachePrediksi, dapatkanVersiModel, hitungHashGambar
+from .upload_validation import bukaHeaderGambar
+
 # Variabel global untuk menyimpan model (dimuat sekali saat startup)
 _modelTerlatih = None
 
+# Kunci agar model tidak dimuat dua kali saat permintaan pertama datang bersamaan
+_kunciModel = threading.Lock()
+
+# Catatan waktu muat dan pemanasan model (detik)
+statusModel = {
+    'dimuat': False,
+    'waktuMuat': None,
+    'waktuPemanasan': None,
+}
+
+# Penjadwal micro-batching (dibuat saat pertama kali dibutuhkan)
+_penjadwalBatch = None
+
+# Pool proses worker inferensi (hanya jika INFERENSI_POOL_AKTIF)
+_poolInferensi = None
+
+
+def dapatkanJalurModel(namaBackend=None, varianKuantisasi=None):
+    """
+    Mendapatkan path file model untuk backend inferensi tertentu.
+    
+    Args:
+        namaBackend: 'keras', 'tflite', atau 'onnx'. Default: settings.MODEL_BACKEND
+            (beserta settings.MODEL_KUANTISASI).
+        varianKuantisasi: Varian TFLite terkuantisasi ('dinamis', 'float16',
+            'int8'), atau None untuk model float32.
+        
+    Returns:
+        str: Path ke file model.
+    """
+    if namaBackend is None:
+        namaBackend = settings.MODEL_BACKEND
+        varianKuantisasi = settings.MODEL_KUANTISASI
+    if namaBackend == 'tflite':
+        if varianKuantisasi:
+            jalurDasar = os.path.splitext(settings.MODEL_TFLITE_PATH)[0]
+            return f'{jalurDasar}_{varianKuantisasi}.tflite'
+        return settings.MODEL_TFLITE_PATH
+    if namaBackend == 'onnx':
+        return settings.MODEL_ONNX_PATH
+    return settings.MODEL_PATH
+
 
 def muatModel():
     """
-    Memuat model TensorFlow dari file .keras.
+    Memuat model dengan backend inferensi dari settings.MODEL_BACKEND.
     Model hanya dimuat sekali dan disimpan dalam variabel global.
     
     Returns:
-        Model TensorFlow yang sudah dimuat, atau None jika file tidak ditemukan.
+        BackendInferensi yang sudah dimuat, atau None jika file tidak ditemukan.
     """
     global _modelTerlatih
     
+    if settings.MODEL_REGISTRI_AKTIF:
+        return _modelDariRegistri()
+    
     if _modelTerlatih is not None:
         return _modelTerlatih
     
-    jalurModel = settings.MODEL_PATH
+    with _kunciModel:
+        # Cek ulang: thread lain mungkin sudah selesai memuat
+        if _modelTerlatih is not None:
+            return _modelTerlatih
+        
+        jalurModel = dapatkanJalurModel()
+        
+        if not os.path.exists(jalurModel):
+            print(f"[PERINGATAN] File model tidak ditemukan di: {jalurModel}")
+            print("[INFO] Letakkan file model.keras di folder api/ml_models/")
+            return None
+        
+        try:
+            from .backends import dapatkanKelasBackend
+            waktuMulai = time.perf_counter()
+            kelasBackend = dapatkanKelasBackend(settings.MODEL_BACKEND)
+            _modelTerlatih = kelasBackend(jalurModel, settings.MODEL_JUMLAH_THREAD)
+            statusModel['dimuat'] = True
+            statusModel['waktuMuat'] = time.perf_counter() - waktuMulai
+            print(f"[SUKSES] Model berhasil dimuat dari: {jalurModel} "
+                  f"(backend {kelasBackend.nama}, {statusModel['waktuMuat']:.2f} detik)")
+            return _modelTerlatih
+        except Exception as kesalahan:
+            print(f"[ERROR] Gagal memuat model: {kesalahan}")
+            return None
+
+
+def buatModelDariVersi(versiModel):
+    """
+    Membuat backend (atau pool inferensi) untuk satu versi registri model.
     
-    if not os.path.exists(jalurModel):
-        print(f"[PERINGATAN] File model tidak ditemukan di: {jalurModel}")
-        print("[INFO] Letakkan file model.keras di folder api/ml_models/")
-        return None
+    Dipanggil oleh PengelolaModel; pool baru langsung dijalankan agar
+    worker-nya sudah memuat model sebelum menggantikan pool lama.
     
-    try:
-        from tensorflow import keras
-        _modelTerlatih = keras.models.load_model(jalurModel)
-        print(f"[SUKSES] Model berhasil dimuat dari: {jalurModel}")
-        return _modelTerlatih
-    except Exception as kesalahan:
-        print(f"[ERROR] Gagal memuat model: {kesalahan}")
-        return None
+    Args:
+        versiModel: VersiModel dari registri.
+        
+    Returns:
+        BackendInferensi atau PoolInferensi.
+    """
+    from .backends import dapatkanKelasBackend
+    
+    if settings.INFERENSI_POOL_AKTIF:
+        from .worker_pool import PoolInferensi
+        pool = PoolInferensi(
+            jumlahWorker=settings.INFERENSI_POOL_UKURAN,
+            namaBackend=versiModel.backend,
+            jalurModel=versiModel.jalurModel,
+            ukuranInput=versiModel.ukuranInput,
+            jumlahThread=settings.INFERENSI_POOL_THREAD_PER_WORKER,
+            pinCpu=settings.INFERENSI_POOL_PIN_CPU,
+            jumlahPemanasan=settings.MODEL_JUMLAH_PEMANASAN,
+            timeout=settings.INFERENSI_POOL_TIMEOUT,
+        )
+        waktuMulai = time.perf_counter()
+        pool.mulai()
+        model = pool
+    else:
+        waktuMulai = time.perf_counter()
+        model = dapatkanKelasBackend(versiModel.backend)(
+            versiModel.jalurModel, settings.MODEL_JUMLAH_THREAD
+        )
+    statusModel['dimuat'] = True
+    statusModel['waktuMuat'] = time.perf_counter() - waktuMulai
+    return model
+
+
+def _modelDariRegistri():
+    """Model aktif dari registri (backend, atau pool jika pool aktif)."""
+    from .model_registry import dapatkanPengelolaModel
+    aktif = dapatkanPengelolaModel().aktif()
+    return aktif[1] if aktif else None
+
+
+@contextmanager
+def pakaiModelAktif():
+    """
+    Meminjam versi dan model penuh aktif sebagai satu snapshot.
+    
+    Versi yang dicatat di riwayat dan dipakai sebagai kunci cache selalu
+    berasal dari model yang benar-benar menjawab, meski registri berganti
+    versi di tengah permintaan.
+    
+    Yields:
+        tuple: (versiModel, model), atau None jika model belum tersedia
+            (mode demo). versiModel adalah nama versi registri jika
+            MODEL_REGISTRI_AKTIF, selain itu penanda dari path, ukuran,
+            dan waktu modifikasi file model.
+    """
+    if settings.MODEL_REGISTRI_AKTIF:
+        from .model_registry import dapatkanPengelolaModel
+        with dapatkanPengelolaModel().pakai() as aktif:
+            yield (aktif[0].versi, aktif[1]) if aktif else None
+        return
+    
+    if not modelTersedia():
+        yield None
+        return
+    model = dapatkanPoolInferensi() if settings.INFERENSI_POOL_AKTIF else muatModel()
+    yield dapatkanVersiModel(dapatkanJalurModel()), model
+
+
+def dapatkanPoolInferensi():
+    """
+    Mendapatkan pool proses worker inferensi (dibuat sekali per proses).
+    
+    Returns:
+        PoolInferensi: Pool yang menjalankan model di proses terpisah.
+    """
+    global _poolInferensi
+    
+    if settings.MODEL_REGISTRI_AKTIF:
+        return _modelDariRegistri()
+    
+    if _poolInferensi is None:
+        with _kunciModel:
+            if _poolInferensi is None:
+                from .worker_pool import PoolInferensi
+                _poolInferensi = PoolInferensi(
+                    jumlahWorker=settings.INFERENSI_POOL_UKURAN,
+                    namaBackend=settings.MODEL_BACKEND,
+                    jalurModel=dapatkanJalurModel(),
+                    ukuranInput=settings.UKURAN_GAMBAR_INPUT,
+                    jumlahThread=settings.INFERENSI_POOL_THREAD_PER_WORKER,
+                    pinCpu=settings.INFERENSI_POOL_PIN_CPU,
+                    jumlahPemanasan=settings.MODEL_JUMLAH_PEMANASAN,
+                    timeout=settings.INFERENSI_POOL_TIMEOUT,
+                )
+    return _poolInferensi
 
 
-def prosesGambar(fileGambar):
+def modelTersedia():
     """
-    Memproses gambar untuk input ke model.
+    Memeriksa apakah model siap dipakai untuk prediksi.
+    
+    Saat pool inferensi aktif, model dimuat di proses worker, jadi proses
+    ini cukup memeriksa keberadaan file model.
+    
+    Returns:
+        bool: True jika prediksi dapat dijalankan (bukan mode demo).
+    """
+    if settings.MODEL_REGISTRI_AKTIF:
+        return _modelDariRegistri() is not None
+    if settings.INFERENSI_POOL_AKTIF:
+        return os.path.exists(dapatkanJalurModel())
+    return muatModel() is not None
+
+
+def panaskanModel(jumlahPemanasan=None):
+    """
+    Memuat model dan menjalankan beberapa batch dummy untuk memicu
+    graph tracing, sehingga permintaan pertama tidak menanggung biayanya.
     
     Args:
-        fileGambar: File gambar yang diupload (InMemoryUploadedFile).
+        jumlahPemanasan: Jumlah putaran pemanasan per ukuran batch.
+            Default: settings.MODEL_JUMLAH_PEMANASAN.
         
     Returns:
-        numpy.ndarray: Array gambar yang sudah diproses (1, 224, 224, 3).
+        bool: True jika model berhasil dimuat dan dipanaskan.
+    """
+    if not modelTersedia():
+        return False
+    
+    if settings.INFERENSI_POOL_AKTIF and not settings.MODEL_REGISTRI_AKTIF:
+        # Setiap worker memuat dan memanaskan modelnya sendiri saat start
+        waktuMulai = time.perf_counter()
+        dapatkanPoolInferensi().mulai()
+        statusModel['dimuat'] = True
+        statusModel['waktuMuat'] = time.perf_counter() - waktuMulai
+    
+    if jumlahPemanasan is None:
+        jumlahPemanasan = settings.MODEL_JUMLAH_PEMANASAN
+    
+    # Panaskan ukuran batch 1 dan, jika batching aktif, ukuran batch maksimal
+    daftarUkuranBatch = [1]
+    if settings.INFERENSI_BATCH_AKTIF and settings.INFERENSI_BATCH_MAKS > 1:
+        daftarUkuranBatch.append(settings.INFERENSI_BATCH_MAKS)
+    
+    lebar, tinggi = settings.UKURAN_GAMBAR_INPUT
+    waktuMulai = time.perf_counter()
+    modelCepat = muatModelCepat() if settings.KASKADE_AKTIF else None
+    for ukuranBatch in daftarUkuranBatch:
+        arrayDummy = np.zeros((ukuranBatch, tinggi, lebar, 3), dtype=np.float32)
+        for _ in range(jumlahPemanasan):
+            prediksiBatch(arrayDummy)
+            if modelCepat is not None:
+                modelCepat.prediksi(arrayDummy)
+    statusModel['waktuPemanasan'] = time.perf_counter() - waktuMulai
+    
+    print(f"[SUKSES] Pemanasan model selesai "
+          f"({statusModel['waktuPemanasan']:.2f} detik)")
+    return True
+
+
+def dapatkanResampler():
+    """
+    Mendapatkan filter resize dari settings.PRAPROSES_RESAMPLER.
+    
+    Returns:
+        Image.Resampling: Filter resize PIL (mis. BILINEAR, LANCZOS).
+    """
+    return getattr(Image.Resampling, settings.PRAPROSES_RESAMPLER.upper())
+
+
+def bukaGambar(fileGambar):
     """
-    # Baca gambar dari file upload
-    kontenGambar = fileGambar.read()
-    gambar = Image.open(BytesIO(kontenGambar))
+    Men-decode file upload menjadi gambar RGB.
+    
+    JPEG besar di-decode langsung pada skala yang diperkecil (draft mode),
+    sehingga foto 12+ MP tidak pernah di-decode penuh. Ukuran decode
+    diperiksa dari header dulu (lihat upload_validation.py).
+    
+    Args:
+        fileGambar: File gambar yang diupload.
+        
+    Returns:
+        PIL.Image.Image: Gambar RGB yang sudah di-decode.
+    
+    Raises:
+        GambarTidakValid: Jika format tidak diizinkan atau gambar terlalu besar.
+    """
+    # Buka langsung dari file upload (atau file sementara untuk upload
+    # besar), tanpa menyalin ke BytesIO
+    gambar = bukaHeaderGambar(fileGambar)
+    gambar.load()
     
     # Konversi ke RGB jika perlu (handle RGBA, grayscale, dll)
     if gambar.mode != 'RGB':
         gambar = gambar.convert('RGB')
     
-    # Resize ke ukuran yang dibutuhkan model
+    return gambar
+
+
+def ubahUkuranGambar(gambar):
+    """
+    Mengubah ukuran gambar ke settings.UKURAN_GAMBAR_INPUT.
+    
+    reducing_gap memakai pengecilan box cepat dulu untuk gambar yang
+    jauh lebih besar dari ukuran input.
+    """
     ukuranInput = settings.UKURAN_GAMBAR_INPUT
-    gambar = gambar.resize(ukuranInput, Image.Resampling.LANCZOS)
+    if gambar.size == tuple(ukuranInput):
+        return gambar
+    return gambar.resize(ukuranInput, dapatkanResampler(), reducing_gap=3.0)
+
+
+def normalisasiGambar(gambar, bufferTujuan=None):
+    """
+    Menormalisasi piksel ke range 0-1 langsung ke buffer float32.
     
-    # Konversi ke array numpy dan normalisasi
-    arrayGambar = np.array(gambar, dtype=np.float32)
-    arrayGambar = arrayGambar / 255.0  # Normalisasi ke range 0-1
+    Args:
+        gambar: Gambar RGB berukuran settings.UKURAN_GAMBAR_INPUT.
+        bufferTujuan: Array float32 (1, 224, 224, 3) opsional untuk diisi.
+            Jika None, buffer baru dialokasikan.
+        
+    Returns:
+        numpy.ndarray: Array gambar (1, 224, 224, 3).
+    """
+    if bufferTujuan is None:
+        lebar, tinggi = settings.UKURAN_GAMBAR_INPUT
+        bufferTujuan = np.empty((1, tinggi, lebar, 3), dtype=np.float32)
     
-    # Tambahkan dimensi batch
-    arrayGambar = np.expand_dims(arrayGambar, axis=0)
+    # uint8 -> float32 dalam satu langkah, tanpa salinan perantara
+    np.multiply(np.asarray(gambar), np.float32(1.0 / 255.0), out=bufferTujuan[0])
     
-    return arrayGambar
+    return bufferTujuan
+
+
+def prosesGambar(fileGambar, bufferTujuan=None):
+    """
+    Memproses gambar untuk input ke model (decode, resize, normalisasi).
+    
+    Args:
+        fileGambar: File gambar yang diupload (InMemoryUploadedFile).
+        bufferTujuan: Array float32 (1, 224, 224, 3) opsional untuk diisi.
+            Jika None, buffer baru dialokasikan.
+        
+    Returns:
+        numpy.ndarray: Array gambar yang sudah diproses (1, 224, 224, 3).
+    """
+    with ukurTahap('decode'):
+        gambar = bukaGambar(fileGambar)
+    with ukurTahap('resize'):
+        gambar = ubahUkuranGambar(gambar)
+    with ukurTahap('normalisasi'):
+        return normalisasiGambar(gambar, bufferTujuan)
+
+
+def prediksiBatch(arrayBatch, model=None):
+    """
+    Menjalankan satu forward pass untuk sekumpulan gambar.
+    
+    Args:
+        arrayBatch: Array gambar yang sudah diproses (N, 224, 224, 3).
+        model: Model dari pakaiModelAktif(). Default: model aktif saat ini.
+        
+    Returns:
+        numpy.ndarray: Probabilitas setiap kelas (N, jumlah_kelas).
+    """
+    if model is not None:
+        return model.prediksi(arrayBatch)
+    
+    with pakaiModelAktif() as modelAktif:
+        return modelAktif[1].prediksi(arrayBatch)
+
+
+def dapatkanPenjadwalBatch():
+    """
+    Mendapatkan penjadwal micro-batching (dibuat sekali per proses).
+    
+    Returns:
+        PenjadwalBatch: Penjadwal yang menggabungkan permintaan bersamaan.
+    """
+    global _penjadwalBatch
+    
+    if _penjadwalBatch is None:
+        from .batching import PenjadwalBatch
+        _penjadwalBatch = PenjadwalBatch(
+            prediksiBatch,
+            ukuranBatchMaks=settings.INFERENSI_BATCH_MAKS,
+            waktuTungguMaks=settings.INFERENSI_BATCH_TUNGGU_MS / 1000.0,
+        )
+    return _penjadwalBatch
+
+
+def prediksiGambar(arrayGambar, model=None):
+    """
+    Memprediksi satu gambar, lewat penjadwal batch jika diaktifkan.
+    
+    Args:
+        arrayGambar: Array gambar yang sudah diproses (1, 224, 224, 3).
+        model: Model dari pakaiModelAktif(). Default: model aktif saat ini.
+        
+    Returns:
+        numpy.ndarray: Probabilitas setiap kelas (jumlah_kelas,).
+    """
+    if settings.INFERENSI_BATCH_AKTIF:
+        return dapatkanPenjadwalBatch().prediksi(arrayGambar, model)
+    return prediksiBatch(arrayGambar, model)[0]
+
+
+def susunHasilKlasifikasi(probabilitas, tahap=TAHAP_PENUH, versiModel=''):
+    """
+    Menyusun hasil klasifikasi dari vektor probabilitas model.
+    
+    Args:
+        probabilitas: Array probabilitas untuk satu gambar (jumlah_kelas,).
+        tahap: Tahap kaskade yang menjawab ('cepat' atau 'penuh').
+        versiModel: Versi model penuh yang menjawab (lihat pakaiModelAktif); untuk
+            tahap 'cepat' diganti versi model cepat.
+        
+    Returns:
+        dict: Hasil klasifikasi dengan format yang sama seperti klasifikasiGambar.
+    """
+    # Cari indeks dengan probabilitas tertinggi
+    indeksTertinggi = int(np.argmax(probabilitas))
+    nilaiKepercayaan = float(probabilitas[indeksTertinggi])
+    kelasTedeteksi = settings.DAFTAR_KELAS_PENYAKIT[indeksTertinggi]
+    
+    # Buat list semua prediksi
+    semuaPrediksi = [
+        {
+            'kelas': settings.DAFTAR_KELAS_PENYAKIT[i],
+            'kepercayaan': float(probabilitas[i])
+        }
+        for i in range(len(settings.DAFTAR_KELAS_PENYAKIT))
+    ]
+    
+    # Urutkan berdasarkan kepercayaan (tertinggi dulu)
+    semuaPrediksi.sort(key=lambda x: x['kepercayaan'], reverse=True)
+    
+    return {
+        'sukses': True,
+        'kelas': kelasTedeteksi,
+        'kepercayaan': nilaiKepercayaan,
+        'semuaPrediksi': semuaPrediksi,
+        'tahap': tahap,
+        'versiModel': versiModelCepat() if tahap == TAHAP_CEPAT else versiModel,
+        'pesan': 'Klasifikasi berhasil'
+    }
+
+
+def _hasilModeDemo():
+    """Hasil dummy saat file model belum tersedia."""
+    return {
+        'sukses': True,
+        'kelas': 'Healthy Leaf',
+        'kepercayaan': 0.95,
+        'semuaPrediksi': [
+            {'kelas': kelas, 'kepercayaan': 0.0}
+            for kelas in settings.DAFTAR_KELAS_PENYAKIT
+        ],
+        'tahap': 'demo',
+        'versiModel': '',
+        'pesan': 'Mode demo - model belum dimuat'
+    }
+
+
+def _hasilGagal(kesalahan):
+    """Hasil klasifikasi untuk gambar yang gagal diproses."""
+    return {
+        'sukses': False,
+        'kelas': None,
+        'kepercayaan': 0.0,
+        'semuaPrediksi': [],
+        'tahap': None,
+        'versiModel': '',
+        'pesan': f'Kesalahan saat klasifikasi: {str(kesalahan)}'
+    }
+
+
+def _kunciCachePrediksi(fileGambar, versiModel):
+    """
+    Membuat kunci cache (versi model, hash gambar) untuk file upload.
+    
+    Versi model mencakup konfigurasi kaskade jika kaskade aktif.
+    
+    Returns:
+        tuple: (versiModel, hashGambar), atau None jika cache dimatikan.
+    """
+    if not settings.CACHE_PREDIKSI_AKTIF:
+        return None
+    return versiModel + penandaKonfigurasi(), hitungHashGambar(fileGambar)
+
+
+def _hasilDariCache(semuaPrediksi, versiModel):
+    """Menyusun hasil klasifikasi dari semuaPrediksi yang tersimpan di cache."""
+    return {
+        'sukses': True,
+        'kelas': semuaPrediksi[0]['kelas'],
+        'kepercayaan': semuaPrediksi[0]['kepercayaan'],
+        'semuaPrediksi': semuaPrediksi,
+        'tahap': 'cache',
+        'versiModel': versiModel,
+        'pesan': 'Klasifikasi berhasil (cache)'
+    }
 
 
 def klasifikasiGambar(fileGambar):
@@ -89,68 +534,134 @@ def klasifikasiGambar(fileGambar):
             {
                 'kelas': nama kelas penyakit,
                 'kepercayaan': nilai kepercayaan (0-1),
-                'semuaPrediksi': list semua prediksi dengan confidence
+                'semuaPrediksi': list semua prediksi dengan confidence,
+                'tahap': yang menjawab ('cepat'/'penuh' jika kaskade
+                    aktif, 'cache', atau 'demo'),
+                'versiModel': versi model yang menjawab
             }
     """
-    # Muat model
-    model = muatModel()
-    
-    if model is None:
-        # Mode demo: kembalikan hasil dummy jika model belum tersedia
-        return {
-            'sukses': True,
-            'kelas': 'Healthy Leaf',
-            'kepercayaan': 0.95,
-            'semuaPrediksi': [
-                {'kelas': kelas, 'kepercayaan': 0.0}
-                for kelas in settings.DAFTAR_KELAS_PENYAKIT
-            ],
-            'pesan': 'Mode demo - model belum dimuat'
-        }
-    
+    # Pinjam model; versi dan model berasal dari snapshot yang sama
+    with pakaiModelAktif() as modelAktif:
+        if modelAktif is None:
+            # Mode demo: kembalikan hasil dummy jika model belum tersedia
+            return _hasilModeDemo()
+        return _klasifikasiDenganModel(fileGambar, *modelAktif)
+
+
+def _klasifikasiDenganModel(fileGambar, versiModel, model):
+    """Isi klasifikasiGambar untuk satu snapshot (versiModel, model)."""
     try:
+        # Gambar yang sama persis sudah pernah diprediksi dengan model ini?
+        with ukurTahap('cache'):
+            kunciCache = _kunciCachePrediksi(fileGambar, versiModel)
+            if kunciCache is not None:
+                semuaPrediksi = dapatkanCachePrediksi().ambil(*kunciCache)
+            else:
+                semuaPrediksi = None
+        if semuaPrediksi is not None:
+            return _hasilDariCache(semuaPrediksi, versiModel)
+        
         # Proses gambar
         gambarInput = prosesGambar(fileGambar)
         
-        # Lakukan prediksi
-        hasilPrediksi = model.predict(gambarInput, verbose=0)
-        
-        # Ambil probabilitas untuk setiap kelas
-        probabilitas = hasilPrediksi[0]
-        
-        # Cari indeks dengan probabilitas tertinggi
-        indeksTertinggi = np.argmax(probabilitas)
-        nilaiKepercayaan = float(probabilitas[indeksTertinggi])
-        kelasTedeteksi = settings.DAFTAR_KELAS_PENYAKIT[indeksTertinggi]
+        # Lakukan prediksi (digabung dengan permintaan lain jika batching aktif)
+        with ukurTahap('prediksi'):
+            if kaskadeAktif():
+                # Model penuh hanya untuk gambar yang tidak yakin dijawab model cepat
+                daftarProbabilitas, daftarTahap = prediksiKaskade(
+                    gambarInput, lambda arrayGambar: prediksiGambar(arrayGambar, model)[np.newaxis]
+                )
+                probabilitas, tahap = daftarProbabilitas[0], daftarTahap[0]
+            else:
+                probabilitas, tahap = prediksiGambar(gambarInput, model), TAHAP_PENUH
         
-        # Buat list semua prediksi
-        semuaPrediksi = [
-            {
-                'kelas': settings.DAFTAR_KELAS_PENYAKIT[i],
-                'kepercayaan': float(probabilitas[i])
-            }
-            for i in range(len(settings.DAFTAR_KELAS_PENYAKIT))
-        ]
-        
-        # Urutkan berdasarkan kepercayaan (tertinggi dulu)
-        semuaPrediksi.sort(key=lambda x: x['kepercayaan'], reverse=True)
-        
-        return {
-            'sukses': True,
-            'kelas': kelasTedeteksi,
-            'kepercayaan': nilaiKepercayaan,
-            'semuaPrediksi': semuaPrediksi,
-            'pesan': 'Klasifikasi berhasil'
-        }
+        hasil = susunHasilKlasifikasi(probabilitas, tahap, versiModel)
+        if kunciCache is not None:
+            dapatkanCachePrediksi().simpan(*kunciCache, hasil['semuaPrediksi'])
+        return hasil
         
     except Exception as kesalahan:
-        return {
-            'sukses': False,
-            'kelas': None,
-            'kepercayaan': 0.0,
-            'semuaPrediksi': [],
-            'pesan': f'Kesalahan saat klasifikasi: {str(kesalahan)}'
-        }
+        return _hasilGagal(kesalahan)
+
+
+def klasifikasiBanyakGambar(daftarFile):
+    """
+    Melakukan klasifikasi banyak gambar sekaligus.
+    
+    Gambar di-decode secara paralel, lalu diprediksi dalam batch berukuran
+    settings.INFERENSI_BATCH_MAKS. Kegagalan satu gambar tidak menggagalkan
+    gambar lainnya.
+    
+    Args:
+        daftarFile: List file gambar.
+        
+    Returns:
+        list: Hasil klasifikasi per gambar (urutan sama dengan daftarFile),
+            masing-masing dengan format yang sama seperti klasifikasiGambar.
+    """
+    with pakaiModelAktif() as modelAktif:
+        if modelAktif is None:
+            return [_hasilModeDemo() for _ in daftarFile]
+        return _klasifikasiBanyakDenganModel(daftarFile, *modelAktif)
+
+
+def _klasifikasiBanyakDenganModel(daftarFile, versiModel, model):
+    """Isi klasifikasiBanyakGambar untuk satu snapshot (versiModel, model)."""
+    cache = dapatkanCachePrediksi()
+    
+    # Satu buffer untuk semua gambar; setiap worker menulis ke barisnya sendiri
+    lebar, tinggi = settings.UKURAN_GAMBAR_INPUT
+    arraySemua = np.empty((len(daftarFile), tinggi, lebar, 3), dtype=np.float32)
+    
+    def prosesAman(indeks):
+        fileGambar = daftarFile[indeks]
+        try:
+            kunciCache = _kunciCachePrediksi(fileGambar, versiModel)
+            if kunciCache is not None:
+                semuaPrediksi = cache.ambil(*kunciCache)
+                if semuaPrediksi is not None:
+                    return _hasilDariCache(semuaPrediksi, versiModel), kunciCache
+            prosesGambar(fileGambar, arraySemua[indeks:indeks + 1])
+            return None, kunciCache
+        except Exception as kesalahan:
+            return _hasilGagal(kesalahan), None
+    
+    # Decode paralel: PIL melepas GIL saat decode dan resize
+    with ThreadPoolExecutor(max_workers=settings.PREDIKSI_BATCH_JUMLAH_WORKER) as executor:
+        hasilProses = list(executor.map(prosesAman, range(len(daftarFile))))
+    
+    daftarHasil = [None] * len(daftarFile)
+    indeksValid = []
+    for indeks, (hasilLangsung, _) in enumerate(hasilProses):
+        if hasilLangsung is not None:
+            # Hasil dari cache, atau gambar gagal diproses
+            daftarHasil[indeks] = hasilLangsung
+        else:
+            indeksValid.append(indeks)
+    
+    ukuranBatch = max(1, settings.INFERENSI_BATCH_MAKS)
+    for mulai in range(0, len(indeksValid), ukuranBatch):
+        potongan = indeksValid[mulai:mulai + ukuranBatch]
+        try:
+            arrayBatch = arraySemua[potongan]
+            if kaskadeAktif():
+                probabilitasBatch, daftarTahap = prediksiKaskade(
+                    arrayBatch, lambda arrayEskalasi: prediksiBatch(arrayEskalasi, model)
+                )
+            else:
+                probabilitasBatch = prediksiBatch(arrayBatch, model)
+                daftarTahap = [TAHAP_PENUH] * len(potongan)
+            for posisi, indeks in enumerate(potongan):
+                hasil = susunHasilKlasifikasi(probabilitasBatch[posisi], daftarTahap[posisi], versiModel)
+                kunciCache = hasilProses[indeks][1]
+                if kunciCache is not None:
+                    cache.simpan(*kunciCache, hasil['semuaPrediksi'])
+                daftarHasil[indeks] = hasil
+        except Exception as kesalahan:
+            for indeks in potongan:
+                daftarHasil[indeks] = _hasilGagal(kesalahan)
+    
+    return daftarHasil
 
 
 def dapatkanInfoPenyakit(namaKelas):
@@ -5,17 +5,62 @@ Endpoint API untuk klasifikasi gambar daun cabai,
 autentikasi pengguna, dan riwayat deteksi.
 """
 
+import asyncio
+import base64
+import binascii
+import math
+import contextvars
+import os
+import re
+import tempfile
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from asgiref.sync import sync_to_async
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, AllowAny
 from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import APIException, Throttled
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from django.conf import settings
 from django.contrib.auth import authenticate
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
+from django.db import transaction
+from django.db.models import Q
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date_safe
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 
-from .utils import klasifikasiGambar, dapatkanInfoPenyakit
-from .models import Penyakit, RiwayatDeteksi, ProfilPengguna
+from .utils import (
+    klasifikasiGambar, klasifikasiBanyakGambar, dapatkanInfoPenyakit, statusModel
+)
+from .prediction_cache import dapatkanCachePrediksi
+from .cascade import statistikKaskade
+from .model_registry import dapatkanPengelolaModel
+from .admission import AntreanPenuh, THROTTLE_PREDIKSI, dapatkanKontrolMasuk
+from .authentication import dapatkanCacheToken
+from .disease_catalog import dapatkanKatalogPenyakit
+from .history_export import kompresGzip, streamCSV, streamNDJSON
+from .statistics import perbaruiStatistik, susunStatistik
+from .thumbnails import jadwalkanThumbnail
+from .upload_validation import GambarTidakValid, periksaGambar
+from .write_behind import EntriRiwayat, dapatkanPenulisRiwayat
+from .metrics import (
+    catatLabel, mulaiPengukuran, registri, renderMetrikTambahan,
+    selesaiPengukuran, ukurTahap
+)
+from .models import RiwayatDeteksi, ProfilPengguna, StatistikHarian
 from .serializers import (
     RegisterSerializer, LoginSerializer, UserSerializer,
     RiwayatDeteksiSerializer, PenyakitSerializer
@@ -149,11 +194,324 @@ class ProfileView(APIView):
         }, status=status.HTTP_200_OK)
 
 
+# Executor terbatas untuk decode dan inferensi dari PrediksiAsyncView
+_executorPrediksi = None
+
+
+def dapatkanExecutorPrediksi():
+    """
+    Mendapatkan executor untuk pekerjaan CPU dari view async (dibuat sekali).
+    
+    Returns:
+        ThreadPoolExecutor: Executor dengan PREDIKSI_ASYNC_JUMLAH_WORKER thread.
+    """
+    global _executorPrediksi
+    
+    if _executorPrediksi is None:
+        _executorPrediksi = ThreadPoolExecutor(
+            max_workers=settings.PREDIKSI_ASYNC_JUMLAH_WORKER,
+            thread_name_prefix='chiliguard-prediksi'
+        )
+    return _executorPrediksi
+
+
+async def aambilInfoPenyakit(kelasTedeteksi):
+    """Versi async dari ambilInfoPenyakit."""
+    return await dapatkanKatalogPenyakit().aambil(kelasTedeteksi)
+
+
+def _parseRequestPrediksi(request):
+    # Autentikasi dan parsing multipart memakai kelas DRF yang sama dengan
+    # PrediksiView, agar token/session dan CSRF diperlakukan identik.
+    requestDRF = Request(
+        request,
+        parsers=[MultiPartParser(), FormParser()],
+        authenticators=[kelas() for kelas in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    for kelasThrottle in THROTTLE_PREDIKSI:
+        throttle = kelasThrottle()
+        if not throttle.allow_request(requestDRF, None):
+            raise Throttled(throttle.wait())
+    return requestDRF.user, requestDRF.FILES.get('image')
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class PrediksiAsyncView(View):
+    """
+    Varian async dari PrediksiView untuk deployment ASGI.
+    
+    POST /api/predict/async/
+    
+    Decode dan inferensi dijalankan di executor terbatas, sedangkan
+    penyimpanan RiwayatDeteksi memakai async ORM, sehingga
+    satu proses dapat melayani banyak upload lambat sekaligus. Format
+    request dan response sama dengan PrediksiView.
+    """
+    
+    http_method_names = ['post', 'options']
+    
+    async def post(self, request, *args, **kwargs):
+        token = mulaiPengukuran()
+        if token is None:
+            return await self._prediksi(request)
+        
+        respons = None
+        try:
+            with ukurTahap('total'):
+                respons = await self._prediksi(request)
+        finally:
+            selesaiPengukuran(token, respons)
+        return respons
+    
+    async def _prediksi(self, request):
+        try:
+            with ukurTahap('parse'):
+                user, fileGambar = await sync_to_async(_parseRequestPrediksi)(request)
+        except APIException as kesalahan:
+            respons = JsonResponse({'detail': kesalahan.detail}, status=kesalahan.status_code)
+            if getattr(kesalahan, 'wait', None):
+                respons['Retry-After'] = '%d' % math.ceil(kesalahan.wait)
+            return respons
+        
+        if not fileGambar:
+            return JsonResponse(
+                {
+                    'sukses': False,
+                    'pesan': 'File gambar tidak ditemukan. Kirim file dengan key "image".'
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        pesanKesalahan = validasiFileGambar(fileGambar)
+        if pesanKesalahan:
+            return JsonResponse(
+                {
+                    'sukses': False,
+                    'pesan': pesanKesalahan
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        catatLabel('ukuranFile', fileGambar.size)
+        
+        # Decode + inferensi di luar event loop (konteks disalin agar
+        # tahap decode/prediksi tercatat di pengukuran request ini)
+        loop = asyncio.get_running_loop()
+        try:
+            async with dapatkanKontrolMasuk().amasuk():
+                hasilKlasifikasi = await loop.run_in_executor(
+                    dapatkanExecutorPrediksi(), contextvars.copy_context().run,
+                    klasifikasiGambar, fileGambar
+                )
+        except AntreanPenuh as kesalahan:
+            return responsServerSibuk(kesalahan, JsonResponse)
+        
+        if not hasilKlasifikasi['sukses']:
+            return JsonResponse(
+                {
+                    'sukses': False,
+                    'pesan': hasilKlasifikasi['pesan']
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        kelasTedeteksi = hasilKlasifikasi['kelas']
+        catatLabel('kelas', kelasTedeteksi)
+        with ukurTahap('katalog'):
+            infoPenyakit, idPenyakit = await aambilInfoPenyakit(kelasTedeteksi)
+        
+        if user.is_authenticated:
+            fileGambar.seek(0)
+            with ukurTahap('tulisDB'):
+                # Baca file, tulis blob, fsync tumpahan, dan insert semuanya
+                # blocking, jadi dijalankan di luar event loop
+                if settings.RIWAYAT_WRITE_BEHIND_AKTIF:
+                    await sync_to_async(antreRiwayatDeteksi)(
+                        user, fileGambar, hasilKlasifikasi, idPenyakit
+                    )
+                else:
+                    await sync_to_async(simpanRiwayatDeteksi)(
+                        user, fileGambar, hasilKlasifikasi, idPenyakit
+                    )
+        
+        dataResponse = susunResponsPrediksi(
+            hasilKlasifikasi, infoPenyakit, user.is_authenticated
+        )
+        return JsonResponse(
+            dataResponse,
+            status=status.HTTP_200_OK,
+            json_dumps_params={'ensure_ascii': False}
+        )
+
+
 # =============================================================================
 # DETECTION VIEWS
 # =============================================================================
 
-class PrediksiView(APIView):
+# Ukuran file gambar yang diterima endpoint prediksi (format dan resolusi
+# diperiksa di upload_validation.py)
+UKURAN_FILE_MAKS = 10 * 1024 * 1024  # 10MB
+
+# Kelas yang dianggap tanaman sehat
+KELAS_SEHAT = ['Healthy Fruit', 'Healthy Leaf']
+
+
+def validasiFileGambar(fileGambar):
+    """
+    Memvalidasi ukuran, format, dan resolusi file gambar yang diupload.
+    
+    Format dibaca dari magic bytes (content_type dari klien tidak
+    dipercaya) dan resolusi dari header saja, tanpa decode.
+    
+    Returns:
+        str: Pesan kesalahan, atau None jika file valid.
+    """
+    if fileGambar.size > UKURAN_FILE_MAKS:
+        return 'Ukuran file terlalu besar. Maksimal 10MB.'
+    
+    try:
+        periksaGambar(fileGambar)
+    except GambarTidakValid as kesalahan:
+        return str(kesalahan)
+    
+    return None
+
+
+def ambilInfoPenyakit(kelasTedeteksi):
+    """
+    Mengambil informasi penyakit dari katalog (database, fallback ke utils).
+    
+    Katalog di-cache per proses, jadi pemanggilan ini tidak melakukan
+    query kecuali katalog baru saja diinvalidasi.
+    
+    Returns:
+        tuple: (infoPenyakit dict, id Penyakit atau None)
+    """
+    return dapatkanKatalogPenyakit().ambil(kelasTedeteksi)
+
+
+def simpanRiwayatDeteksi(user, fileGambar, hasilKlasifikasi, idPenyakit):
+    """
+    Menyimpan riwayat deteksi langsung ke database.
+    
+    Referensi blob gambar diambil saat file disimpan, jadi penyimpanan
+    file dan insert berada dalam satu transaksi: jika insert gagal,
+    jumlah referensi blob ikut dibatalkan.
+    
+    Returns:
+        RiwayatDeteksi: Riwayat yang baru dibuat.
+    """
+    kelasTedeteksi = hasilKlasifikasi['kelas']
+    fileGambar.seek(0)
+    with transaction.atomic():
+        return RiwayatDeteksi.objects.create(
+            user=user,
+            gambar=fileGambar,
+            penyakit_id=idPenyakit,
+            nama_kelas=kelasTedeteksi,
+            kepercayaan=hasilKlasifikasi['kepercayaan'],
+            status_sehat=kelasTedeteksi in KELAS_SEHAT,
+            versi_model=hasilKlasifikasi['versiModel'],
+        )
+
+
+def antreRiwayatDeteksi(user, fileGambar, hasilKlasifikasi, idPenyakit):
+    """
+    Memasukkan riwayat deteksi ke antrean write-behind.
+    
+    Isi file dibaca sekarang, karena file upload sementara dihapus
+    setelah request selesai.
+    """
+    kelasTedeteksi = hasilKlasifikasi['kelas']
+    fileGambar.seek(0)
+    dapatkanPenulisRiwayat().tambah(EntriRiwayat(
+        idUser=user.pk,
+        idPenyakit=idPenyakit,
+        namaKelas=kelasTedeteksi,
+        kepercayaan=hasilKlasifikasi['kepercayaan'],
+        statusSehat=kelasTedeteksi in KELAS_SEHAT,
+        namaFile=fileGambar.name,
+        isiGambar=fileGambar.read(),
+        versiModel=hasilKlasifikasi['versiModel'],
+    ))
+
+
+def responsServerSibuk(kesalahan, kelasRespons=Response):
+    """
+    Response 503 untuk request inferensi yang ditolak admission control.
+    
+    Args:
+        kesalahan: AntreanPenuh dari KontrolMasuk.
+        kelasRespons: Response (view DRF) atau JsonResponse (view Django).
+    """
+    respons = kelasRespons(
+        {
+            'sukses': False,
+            'pesan': 'Server sedang sibuk. Silakan coba lagi beberapa saat lagi.'
+        },
+        status=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    respons['Retry-After'] = str(kesalahan.retryAfter)
+    return respons
+
+
+def susunResponsPrediksi(hasilKlasifikasi, infoPenyakit, tersimpan):
+    """
+    Menyusun body response prediksi untuk satu gambar.
+    
+    Returns:
+        dict: Data response dengan format PrediksiView.
+    """
+    kelasTedeteksi = hasilKlasifikasi['kelas']
+    return {
+        'sukses': True,
+        'kelas': kelasTedeteksi,
+        'namaIndonesia': infoPenyakit.get('namaIndonesia', kelasTedeteksi),
+        'kepercayaan': round(hasilKlasifikasi['kepercayaan'], 4),
+        'persentaseKepercayaan': round(hasilKlasifikasi['kepercayaan'] * 100, 2),
+        'statusSehat': kelasTedeteksi in KELAS_SEHAT,
+        'deskripsi': infoPenyakit.get('deskripsi', ''),
+        'gejala': infoPenyakit.get('gejala', []),
+        'penangananOrganik': infoPenyakit.get('penangananOrganik', []),
+        'penangananKimia': infoPenyakit.get('penangananKimia', []),
+        'pencegahan': infoPenyakit.get('pencegahan', []),
+        'semuaPrediksi': hasilKlasifikasi.get('semuaPrediksi', [])[:5],
+        'tahapModel': hasilKlasifikasi.get('tahap'),
+        'versiModel': hasilKlasifikasi.get('versiModel', ''),
+        'tersimpan': tersimpan,
+    }
+
+
+class PengukuranTahapMixin:
+    """
+    Mengukur durasi tahap-tahap request (auth, parse, ..., serialisasi).
+    
+    Hasilnya dikirim di header Server-Timing dan masuk ke histogram
+    /api/metrics/ jika settings.INSTRUMENTASI_AKTIF aktif.
+    """
+    
+    def dispatch(self, request, *args, **kwargs):
+        token = mulaiPengukuran()
+        if token is None:
+            return super().dispatch(request, *args, **kwargs)
+        
+        respons = None
+        try:
+            with ukurTahap('total'):
+                respons = super().dispatch(request, *args, **kwargs)
+                # Render di sini agar serialisasi JSON ikut terukur
+                with ukurTahap('serialisasi'):
+                    respons.render()
+        finally:
+            selesaiPengukuran(token, respons)
+        return respons
+    
+    def perform_authentication(self, request):
+        with ukurTahap('auth'):
+            super().perform_authentication(request)
+
+
+class PrediksiView(PengukuranTahapMixin, APIView):
     """
     Endpoint untuk melakukan prediksi penyakit dari gambar daun cabai.
     
@@ -165,10 +523,12 @@ class PrediksiView(APIView):
     
     parser_classes = (MultiPartParser, FormParser)
     permission_classes = [AllowAny]
+    throttle_classes = THROTTLE_PREDIKSI
     
     def post(self, request, *args, **kwargs):
         # Validasi file gambar
-        fileGambar = request.FILES.get('image')
+        with ukurTahap('parse'):
+            fileGambar = request.FILES.get('image')
         
         if not fileGambar:
             return Response(
@@ -179,30 +539,25 @@ class PrediksiView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Validasi tipe file
-        tipeFileValid = ['image/jpeg', 'image/png', 'image/jpg', 'image/webp']
-        if fileGambar.content_type not in tipeFileValid:
+        # Validasi tipe dan ukuran file (max 10MB)
+        pesanKesalahan = validasiFileGambar(fileGambar)
+        if pesanKesalahan:
             return Response(
                 {
                     'sukses': False,
-                    'pesan': f'Tipe file tidak valid. Gunakan: {", ".join(tipeFileValid)}'
+                    'pesan': pesanKesalahan
                 },
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Validasi ukuran file (max 10MB)
-        ukuranMaksimal = 10 * 1024 * 1024  # 10MB
-        if fileGambar.size > ukuranMaksimal:
-            return Response(
-                {
-                    'sukses': False,
-                    'pesan': 'Ukuran file terlalu besar. Maksimal 10MB.'
-                },
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        catatLabel('ukuranFile', fileGambar.size)
         
-        # Lakukan klasifikasi
-        hasilKlasifikasi = klasifikasiGambar(fileGambar)
+        # Lakukan klasifikasi (dibatasi admission control)
+        try:
+            with dapatkanKontrolMasuk().masuk():
+                hasilKlasifikasi = klasifikasiGambar(fileGambar)
+        except AntreanPenuh as kesalahan:
+            return responsServerSibuk(kesalahan)
         
         if not hasilKlasifikasi['sukses']:
             return Response(
@@ -215,77 +570,464 @@ class PrediksiView(APIView):
         
         # Dapatkan informasi penyakit
         kelasTedeteksi = hasilKlasifikasi['kelas']
+        catatLabel('kelas', kelasTedeteksi)
         
         # Coba ambil dari database, fallback ke utils jika tidak ada
-        try:
-            penyakitDB = Penyakit.objects.get(nama=kelasTedeteksi)
-            infoPenyakit = {
-                'namaIndonesia': penyakitDB.nama_indonesia,
-                'deskripsi': penyakitDB.deskripsi,
-                'gejala': penyakitDB.gejala,
-                'penangananOrganik': penyakitDB.penanganan_organik,
-                'penangananKimia': penyakitDB.penanganan_kimia,
-                'pencegahan': penyakitDB.pencegahan,
-            }
-        except Penyakit.DoesNotExist:
-            infoPenyakit = dapatkanInfoPenyakit(kelasTedeteksi)
-            penyakitDB = None
-        
-        # Tentukan status kesehatan
-        statusSehat = kelasTedeteksi in ['Healthy Fruit', 'Healthy Leaf']
+        with ukurTahap('katalog'):
+            infoPenyakit, idPenyakit = ambilInfoPenyakit(kelasTedeteksi)
         
         # Simpan ke riwayat jika user login
         if request.user.is_authenticated:
             # Reset file pointer
             fileGambar.seek(0)
             
-            riwayat = RiwayatDeteksi.objects.create(
-                user=request.user,
-                gambar=fileGambar,
-                penyakit=penyakitDB,
-                nama_kelas=kelasTedeteksi,
-                kepercayaan=hasilKlasifikasi['kepercayaan'],
-                status_sehat=statusSehat
-            )
+            with ukurTahap('tulisDB'):
+                if settings.RIWAYAT_WRITE_BEHIND_AKTIF:
+                    # Ditulis per batch oleh thread latar belakang
+                    antreRiwayatDeteksi(request.user, fileGambar, hasilKlasifikasi, idPenyakit)
+                else:
+                    simpanRiwayatDeteksi(request.user, fileGambar, hasilKlasifikasi, idPenyakit)
         
         # Susun response
-        dataResponse = {
-            'sukses': True,
-            'kelas': kelasTedeteksi,
-            'namaIndonesia': infoPenyakit.get('namaIndonesia', kelasTedeteksi),
-            'kepercayaan': round(hasilKlasifikasi['kepercayaan'], 4),
-            'persentaseKepercayaan': round(hasilKlasifikasi['kepercayaan'] * 100, 2),
-            'statusSehat': statusSehat,
-            'deskripsi': infoPenyakit.get('deskripsi', ''),
-            'gejala': infoPenyakit.get('gejala', []),
-            'penangananOrganik': infoPenyakit.get('penangananOrganik', []),
-            'penangananKimia': infoPenyakit.get('penangananKimia', []),
-            'pencegahan': infoPenyakit.get('pencegahan', []),
-            'semuaPrediksi': hasilKlasifikasi.get('semuaPrediksi', [])[:5],
-            'tersimpan': request.user.is_authenticated,
-        }
+        dataResponse = susunResponsPrediksi(
+            hasilKlasifikasi, infoPenyakit, request.user.is_authenticated
+        )
         
         return Response(dataResponse, status=status.HTTP_200_OK)
 
 
+class PrediksiBatchView(APIView):
+    """
+    Endpoint untuk prediksi banyak gambar dalam satu request.
+    
+    POST /api/predict/batch/
+    
+    Kirim beberapa file dengan key "images", atau satu file zip dengan
+    key "archive". Setiap gambar mendapat hasil dengan format yang sama
+    seperti PrediksiView; gambar yang gagal tidak menggagalkan batch.
+    """
+    
+    parser_classes = (MultiPartParser, FormParser)
+    permission_classes = [AllowAny]
+    throttle_classes = THROTTLE_PREDIKSI
+    
+    def post(self, request, *args, **kwargs):
+        daftarFile = list(request.FILES.getlist('images'))
+        
+        arsip = request.FILES.get('archive')
+        if arsip:
+            try:
+                daftarFile.extend(bacaArsipGambar(
+                    arsip, settings.PREDIKSI_BATCH_MAKS_GAMBAR - len(daftarFile)
+                ))
+            except ArsipTidakValid as kesalahan:
+                return Response(
+                    {
+                        'sukses': False,
+                        'pesan': str(kesalahan)
+                    },
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            except KESALAHAN_ARSIP:
+                return Response(
+                    {
+                        'sukses': False,
+                        'pesan': 'File arsip tidak valid. Gunakan format zip.'
+                    },
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        if not daftarFile:
+            return Response(
+                {
+                    'sukses': False,
+                    'pesan': 'File gambar tidak ditemukan. Kirim file dengan key "images" atau zip dengan key "archive".'
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        batasGambar = settings.PREDIKSI_BATCH_MAKS_GAMBAR
+        if len(daftarFile) > batasGambar:
+            return Response(
+                {
+                    'sukses': False,
+                    'pesan': f'Terlalu banyak gambar. Maksimal {batasGambar} gambar per request.'
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Validasi per gambar; yang tidak valid tidak ikut diklasifikasi
+        daftarHasil = [None] * len(daftarFile)
+        indeksValid = []
+        for indeks, fileGambar in enumerate(daftarFile):
+            pesanKesalahan = validasiFileGambar(fileGambar)
+            if pesanKesalahan:
+                daftarHasil[indeks] = {'sukses': False, 'pesan': pesanKesalahan}
+            else:
+                indeksValid.append(indeks)
+        
+        try:
+            with dapatkanKontrolMasuk().masuk():
+                hasilKlasifikasi = klasifikasiBanyakGambar([daftarFile[i] for i in indeksValid])
+        except AntreanPenuh as kesalahan:
+            return responsServerSibuk(kesalahan)
+        
+        simpanRiwayat = request.user.is_authenticated
+        daftarRiwayat = []
+        for indeks, hasil in zip(indeksValid, hasilKlasifikasi):
+            if not hasil['sukses']:
+                daftarHasil[indeks] = {'sukses': False, 'pesan': hasil['pesan']}
+                continue
+            
+            kelasTedeteksi = hasil['kelas']
+            infoPenyakit, idPenyakit = ambilInfoPenyakit(kelasTedeteksi)
+            
+            if simpanRiwayat:
+                fileGambar = daftarFile[indeks]
+                fileGambar.seek(0)
+                daftarRiwayat.append(RiwayatDeteksi(
+                    user=request.user,
+                    gambar=fileGambar,
+                    penyakit_id=idPenyakit,
+                    nama_kelas=kelasTedeteksi,
+                    kepercayaan=hasil['kepercayaan'],
+                    status_sehat=kelasTedeteksi in KELAS_SEHAT,
+                    versi_model=hasil['versiModel'],
+                ))
+            
+            daftarHasil[indeks] = susunResponsPrediksi(hasil, infoPenyakit, simpanRiwayat)
+        
+        if daftarRiwayat:
+            # Referensi blob diambil saat file disimpan; batalkan jika insert gagal
+            with transaction.atomic():
+                RiwayatDeteksi.objects.bulk_create(daftarRiwayat)
+            # bulk_create tidak mengirim post_save
+            perbaruiStatistik(daftarRiwayat)
+            jadwalkanThumbnail(riwayat.pk for riwayat in daftarRiwayat)
+        
+        for fileGambar, hasil in zip(daftarFile, daftarHasil):
+            hasil['namaFile'] = fileGambar.name
+        
+        return Response({
+            'sukses': True,
+            'jumlah': len(daftarHasil),
+            'jumlahBerhasil': sum(1 for hasil in daftarHasil if hasil['sukses']),
+            'hasil': daftarHasil,
+        }, status=status.HTTP_200_OK)
+
+
+# Kesalahan saat membaca zip: arsip rusak, entri terenkripsi
+# (RuntimeError), metode kompresi tidak didukung (NotImplementedError),
+# atau stream deflate rusak/terpotong
+KESALAHAN_ARSIP = (zipfile.BadZipFile, RuntimeError, NotImplementedError, zlib.error, EOFError)
+
+EKSTENSI_KE_TIPE = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.webp': 'image/webp',
+}
+
+
+class ArsipTidakValid(ValueError):
+    """Arsip zip batch ditolak karena melewati batas jumlah atau ukuran."""
+
+
+def bacaArsipGambar(arsip, batasGambar):
+    """
+    Membaca gambar dari arsip zip.
+    
+    Entri yang bukan gambar dilewati. Jumlah entri gambar diperiksa dari
+    daftar isi zip sebelum apa pun diekstrak. Ukuran setiap entri dibatasi
+    UKURAN_FILE_MAKS, dan total hasil ekstraksi dibatasi
+    PREDIKSI_BATCH_UKURAN_ARSIP_MAKS, baik dari header maupun selama
+    diekstrak. Entri diekstrak bertahap ke file sementara (di memori
+    hanya sampai FILE_UPLOAD_MAX_MEMORY_SIZE), bukan dibaca utuh ke memori.
+    
+    Args:
+        arsip: File zip yang diupload.
+        batasGambar: Jumlah gambar maksimal yang masih boleh diambil.
+    
+    Returns:
+        list: File gambar dengan content_type dan size terisi.
+    
+    Raises:
+        ArsipTidakValid: Jika jumlah gambar atau total ukurannya melewati batas.
+        zipfile.BadZipFile dan KESALAHAN_ARSIP lain: Jika arsip rusak.
+    """
+    batasTotal = settings.PREDIKSI_BATCH_UKURAN_ARSIP_MAKS
+    pesanTerlaluBesar = (
+        f'Total ukuran gambar dalam arsip terlalu besar. '
+        f'Maksimal {batasTotal // (1024 * 1024)}MB.'
+    )
+    
+    daftarFile = []
+    with zipfile.ZipFile(arsip) as berkasZip:
+        daftarEntri = []
+        for info in berkasZip.infolist():
+            if info.is_dir():
+                continue
+            namaFile = os.path.basename(info.filename)
+            tipeFile = EKSTENSI_KE_TIPE.get(os.path.splitext(namaFile)[1].lower())
+            if not namaFile or namaFile.startswith('.') or tipeFile is None:
+                continue
+            daftarEntri.append((info, namaFile, tipeFile))
+        
+        if len(daftarEntri) > batasGambar:
+            raise ArsipTidakValid(
+                f'Terlalu banyak gambar. Maksimal '
+                f'{settings.PREDIKSI_BATCH_MAKS_GAMBAR} gambar per request.'
+            )
+        # Entri di atas UKURAN_FILE_MAKS tidak diekstrak, jadi tidak dihitung
+        if sum(info.file_size for info, _, _ in daftarEntri
+               if info.file_size <= UKURAN_FILE_MAKS) > batasTotal:
+            raise ArsipTidakValid(pesanTerlaluBesar)
+        
+        sisaTotal = batasTotal
+        try:
+            for info, namaFile, tipeFile in daftarEntri:
+                if info.file_size > UKURAN_FILE_MAKS:
+                    fileGambar = ContentFile(b'', name=namaFile)
+                    fileGambar.size = info.file_size
+                else:
+                    fileGambar = ekstrakEntriArsip(
+                        berkasZip, info, namaFile, min(UKURAN_FILE_MAKS, sisaTotal)
+                    )
+                fileGambar.content_type = tipeFile
+                daftarFile.append(fileGambar)
+                
+                if info.file_size <= UKURAN_FILE_MAKS:
+                    # Ukuran di header bisa dipalsukan: total dihitung dari
+                    # byte yang benar-benar diekstrak
+                    if fileGambar.size > sisaTotal:
+                        raise ArsipTidakValid(pesanTerlaluBesar)
+                    sisaTotal -= fileGambar.size
+        except BaseException:
+            for fileGambar in daftarFile:
+                fileGambar.close()
+            raise
+    
+    return daftarFile
+
+
+def ekstrakEntriArsip(berkasZip, info, namaFile, batasUkuran=UKURAN_FILE_MAKS):
+    """
+    Mengekstrak satu entri zip secara bertahap ke file sementara.
+    
+    Ukuran di header zip bisa dipalsukan, jadi ekstraksi berhenti begitu
+    melewati batasUkuran; size hasilnya lalu ditolak pemanggil atau
+    validasiFileGambar.
+    
+    Args:
+        batasUkuran: Jumlah byte maksimal yang diekstrak (lebih satu potongan).
+    
+    Returns:
+        File: File gambar (SpooledTemporaryFile) dengan size terisi.
+    """
+    berkasSementara = tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+    )
+    ukuran = 0
+    with berkasZip.open(info) as entri:
+        while ukuran <= batasUkuran:
+            potongan = entri.read(64 * 1024)
+            if not potongan:
+                break
+            berkasSementara.write(potongan)
+            ukuran += len(potongan)
+    berkasSementara.seek(0)
+    
+    fileGambar = File(berkasSementara, name=namaFile)
+    fileGambar.size = ukuran
+    return fileGambar
+
+
+def enkodeCursorRiwayat(riwayat):
+    """Membuat cursor halaman berikutnya dari baris terakhir halaman ini."""
+    nilai = f'{riwayat.created_at.isoformat()}|{riwayat.pk}'
+    return base64.urlsafe_b64encode(nilai.encode()).decode().rstrip('=')
+
+
+def dekodeCursorRiwayat(cursor):
+    """
+    Membaca cursor dari enkodeCursorRiwayat.
+    
+    Returns:
+        tuple: (created_at, id) baris terakhir halaman sebelumnya.
+    
+    Raises:
+        ValueError: Jika cursor tidak valid.
+    """
+    try:
+        nilai = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        waktu, idRiwayat = nilai.split('|')
+        return datetime.fromisoformat(waktu), int(idRiwayat)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Cursor tidak valid.')
+
+
+def awalHari(tanggal):
+    """Awal hari (00:00) di zona waktu aktif, sebagai datetime aware."""
+    return timezone.make_aware(datetime.combine(tanggal, datetime.min.time()))
+
+
+def filterRiwayat(riwayat, parameter):
+    """
+    Menerapkan filter query kelas, sehat, dari, dan sampai pada riwayat.
+    
+    Args:
+        riwayat: QuerySet RiwayatDeteksi.
+        parameter: Query params request.
+    
+    Returns:
+        QuerySet: Riwayat yang sudah difilter.
+    
+    Raises:
+        ValueError: Jika nilai parameter tidak valid.
+    """
+    if parameter.get('kelas'):
+        riwayat = riwayat.filter(nama_kelas=parameter['kelas'])
+    
+    if parameter.get('sehat'):
+        if parameter['sehat'].lower() not in ('true', 'false'):
+            raise ValueError('Parameter sehat harus "true" atau "false".')
+        riwayat = riwayat.filter(status_sehat=parameter['sehat'].lower() == 'true')
+    
+    # Rentang tanggal diubah ke datetime agar indeks created_at terpakai
+    if parameter.get('dari'):
+        riwayat = riwayat.filter(
+            created_at__gte=awalHari(date.fromisoformat(parameter['dari']))
+        )
+    if parameter.get('sampai'):
+        riwayat = riwayat.filter(
+            created_at__lt=awalHari(date.fromisoformat(parameter['sampai']) + timedelta(days=1))
+        )
+    return riwayat
+
+
 class RiwayatDeteksiView(APIView):
     """
     Endpoint untuk melihat riwayat deteksi pengguna.
     
     GET /api/history/
+    
+    Pagination keyset atas (created_at, id), sehingga setiap halaman
+    berbiaya sama berapa pun jumlah riwayat pengguna. Parameter query:
+        batas: Jumlah riwayat per halaman (default 50, maksimal 100).
+        cursor: Nilai "berikutnya" dari halaman sebelumnya.
+        kelas: Filter nama kelas (mis. "Leaf Curl").
+        sehat: Filter status, "true" atau "false".
+        dari, sampai: Filter rentang tanggal (YYYY-MM-DD, inklusif).
     """
     permission_classes = [IsAuthenticated]
     
+    BATAS_DEFAULT = 50
+    BATAS_MAKS = 100
+    
     def get(self, request):
-        riwayat = RiwayatDeteksi.objects.filter(user=request.user)[:50]
-        serializer = RiwayatDeteksiSerializer(riwayat, many=True)
+        parameter = request.query_params
+        
+        try:
+            batas = int(parameter.get('batas', self.BATAS_DEFAULT))
+            batas = min(max(batas, 1), self.BATAS_MAKS)
+            
+            riwayat = filterRiwayat(
+                RiwayatDeteksi.objects.filter(user=request.user), parameter
+            )
+            
+            if parameter.get('cursor'):
+                waktu, idRiwayat = dekodeCursorRiwayat(parameter['cursor'])
+                riwayat = riwayat.filter(
+                    Q(created_at__lt=waktu) | Q(created_at=waktu, id__lt=idRiwayat)
+                )
+        except ValueError as kesalahan:
+            return Response({
+                'sukses': False,
+                'pesan': f'Parameter tidak valid: {kesalahan}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Satu baris ekstra untuk mengetahui apakah masih ada halaman berikutnya
+        halaman = list(
+            riwayat.select_related('user', 'penyakit')
+            .order_by('-created_at', '-id')[:batas + 1]
+        )
+        adaBerikutnya = len(halaman) > batas
+        halaman = halaman[:batas]
+        
+        serializer = RiwayatDeteksiSerializer(halaman, many=True)
         return Response({
             'sukses': True,
-            'jumlah': riwayat.count(),
+            'jumlah': len(halaman),
+            'berikutnya': enkodeCursorRiwayat(halaman[-1]) if adaBerikutnya else None,
             'riwayat': serializer.data
         }, status=status.HTTP_200_OK)
 
 
+class TanpaNegosiasiKonten(BaseContentNegotiation):
+    """Mengabaikan header Accept (mis. text/csv) pada endpoint non-JSON."""
+    
+    def select_parser(self, request, parsers):
+        return parsers[0]
+    
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class EksporRiwayatView(APIView):
+    """
+    Endpoint untuk mengunduh seluruh riwayat deteksi pengguna.
+    
+    GET /api/history/export/
+    
+    Response di-stream langsung dari database (lihat history_export.py),
+    sehingga memori konstan berapa pun jumlah riwayatnya. Parameter query:
+        tipe: "csv" (default) atau "ndjson".
+        gzip: "true" untuk mengompres file (.gz).
+        kelas, sehat, dari, sampai: Filter sama seperti /api/history/.
+    """
+    permission_classes = [IsAuthenticated]
+    content_negotiation_class = TanpaNegosiasiKonten
+    
+    TIPE_EKSPOR = {
+        'csv': (streamCSV, 'text/csv; charset=utf-8'),
+        'ndjson': (streamNDJSON, 'application/x-ndjson; charset=utf-8'),
+    }
+    
+    def get(self, request):
+        parameter = request.query_params
+        try:
+            tipe = parameter.get('tipe', 'csv').lower()
+            if tipe not in self.TIPE_EKSPOR:
+                raise ValueError(f'Parameter tipe harus salah satu dari: {", ".join(self.TIPE_EKSPOR)}.')
+            pakaiGzip = parameter.get('gzip', 'false').lower()
+            if pakaiGzip not in ('true', 'false'):
+                raise ValueError('Parameter gzip harus "true" atau "false".')
+            pakaiGzip = pakaiGzip == 'true'
+            
+            riwayat = filterRiwayat(
+                RiwayatDeteksi.objects.filter(user=request.user), parameter
+            ).order_by('-created_at', '-id')
+        except ValueError as kesalahan:
+            return Response({
+                'sukses': False,
+                'pesan': f'Parameter tidak valid: {kesalahan}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        buatStream, tipeKonten = self.TIPE_EKSPOR[tipe]
+        isi = buatStream(riwayat, request.build_absolute_uri('/'))
+        namaFile = f'riwayat-{request.user.username}-{timezone.localdate().isoformat()}.{tipe}'
+        if pakaiGzip:
+            isi = kompresGzip(isi)
+            tipeKonten = 'application/gzip'
+            namaFile += '.gz'
+        
+        respons = StreamingHttpResponse(isi, content_type=tipeKonten)
+        respons['Content-Disposition'] = f'attachment; filename="{namaFile}"'
+        # Agar proxy (mis. nginx) meneruskan potongan tanpa menampung semuanya
+        respons['X-Accel-Buffering'] = 'no'
+        return respons
+
+
 class DetailRiwayatView(APIView):
     """
     Endpoint untuk melihat detail satu riwayat deteksi.
@@ -297,7 +1039,9 @@ class DetailRiwayatView(APIView):
     
     def get(self, request, pk):
         try:
-            riwayat = RiwayatDeteksi.objects.get(pk=pk, user=request.user)
+            riwayat = RiwayatDeteksi.objects.select_related('user', 'penyakit').get(
+                pk=pk, user=request.user
+            )
             serializer = RiwayatDeteksiSerializer(riwayat)
             return Response({
                 'sukses': True,
@@ -324,6 +1068,71 @@ class DetailRiwayatView(APIView):
             }, status=status.HTTP_404_NOT_FOUND)
 
 
+# =============================================================================
+# STATISTICS VIEWS
+# =============================================================================
+
+class StatistikView(APIView):
+    """
+    Endpoint statistik deteksi pengguna yang sedang login.
+    
+    GET /api/stats/
+    
+    Dibaca dari rollup StatistikHarian, sehingga waktunya bergantung pada
+    panjang periode, bukan jumlah riwayat. Parameter query:
+        dari, sampai: Periode (YYYY-MM-DD, inklusif). Default 12 minggu
+            terakhir, maksimal PERIODE_MAKS_HARI hari.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    PERIODE_DEFAULT_HARI = 84
+    PERIODE_MAKS_HARI = 731
+    
+    def dapatkanRollup(self, request):
+        return StatistikHarian.objects.filter(user=request.user)
+    
+    def get(self, request):
+        parameter = request.query_params
+        try:
+            sampai = (
+                date.fromisoformat(parameter['sampai']) if parameter.get('sampai')
+                else timezone.localdate()
+            )
+            dari = (
+                date.fromisoformat(parameter['dari']) if parameter.get('dari')
+                else sampai - timedelta(days=self.PERIODE_DEFAULT_HARI - 1)
+            )
+            if dari > sampai:
+                raise ValueError('Tanggal "dari" harus sebelum "sampai".')
+            if (sampai - dari).days >= self.PERIODE_MAKS_HARI:
+                raise ValueError(f'Periode maksimal {self.PERIODE_MAKS_HARI} hari.')
+        except ValueError as kesalahan:
+            return Response({
+                'sukses': False,
+                'pesan': f'Parameter tidak valid: {kesalahan}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'sukses': True,
+            **susunStatistik(self.dapatkanRollup(request), dari, sampai)
+        }, status=status.HTTP_200_OK)
+
+
+class StatistikGlobalView(StatistikView):
+    """
+    Endpoint statistik deteksi seluruh pengguna (untuk penyuluh).
+    
+    GET /api/stats/global/
+    
+    Parameter sama dengan StatistikView. Hanya untuk akun staf (is_staff),
+    karena berisi agregat deteksi semua petani.
+    """
+    permission_classes = [IsAdminUser]
+    
+    def dapatkanRollup(self, request):
+        return StatistikHarian.objects.all()
+
+
 # =============================================================================
 # INFO VIEWS
 # =============================================================================
@@ -340,11 +1149,121 @@ class KesehatanView(APIView):
                 'status': 'aktif',
                 'pesan': 'ChiliGuard API berjalan dengan baik',
                 'versi': '1.0.0',
+                'model': {
+                    'dimuat': statusModel['dimuat'],
+                    'waktuMuatDetik': statusModel['waktuMuat'],
+                    'waktuPemanasanDetik': statusModel['waktuPemanasan'],
+                    'registri': (
+                        dapatkanPengelolaModel().statistik()
+                        if settings.MODEL_REGISTRI_AKTIF else None
+                    ),
+                },
+                'kaskade': statistikKaskade.statistik(),
+                'cachePrediksi': dapatkanCachePrediksi().statistik(),
+                'cacheToken': dapatkanCacheToken().statistik(),
+                'admisi': dapatkanKontrolMasuk().statistik(),
+                'antreanRiwayat': (
+                    dapatkanPenulisRiwayat().statistik()
+                    if settings.RIWAYAT_WRITE_BEHIND_AKTIF else None
+                ),
             },
             status=status.HTTP_200_OK
         )
 
 
+class MetrikView(APIView):
+    """
+    Endpoint metrik dalam format teks Prometheus.
+    
+    GET /api/metrics/
+    
+    Berisi histogram latensi per tahap, per kelas, dan per ukuran file
+    (jika INSTRUMENTASI_AKTIF), serta statistik model dan cache prediksi.
+    Hanya untuk akun staf (is_staff), karena memperlihatkan beban dan isi
+    layanan; scraper Prometheus memakai header Authorization: Token <token>.
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request, *args, **kwargs):
+        statistikCache = dapatkanCachePrediksi().statistik()
+        statistikAdmisi = dapatkanKontrolMasuk().statistik()
+        statistikTahap = statistikKaskade.statistik()
+        isi = registri.renderPrometheus() + renderMetrikTambahan([
+            ('chiliguard_model_dimuat', 'gauge',
+             'Model sudah dimuat di proses ini', int(statusModel['dimuat'])),
+            ('chiliguard_kaskade_cepat_total', 'counter',
+             'Jumlah gambar yang dijawab model cepat', statistikTahap['cepat']),
+            ('chiliguard_kaskade_penuh_total', 'counter',
+             'Jumlah gambar yang dieskalasi ke model penuh', statistikTahap['penuh']),
+            ('chiliguard_cache_prediksi_hit_total', 'counter',
+             'Jumlah hit cache prediksi', statistikCache['hit']),
+            ('chiliguard_cache_prediksi_miss_total', 'counter',
+             'Jumlah miss cache prediksi', statistikCache['miss']),
+            ('chiliguard_cache_prediksi_ukuran', 'gauge',
+             'Jumlah entri cache prediksi', statistikCache['ukuran']),
+            ('chiliguard_admisi_berjalan', 'gauge',
+             'Jumlah inferensi yang sedang berjalan', statistikAdmisi['berjalan']),
+            ('chiliguard_admisi_menunggu', 'gauge',
+             'Jumlah request prediksi yang menunggu slot', statistikAdmisi['menunggu']),
+            ('chiliguard_admisi_ditolak_total', 'counter',
+             'Jumlah request prediksi yang ditolak (503)', statistikAdmisi['ditolak']),
+        ])
+        return HttpResponse(isi, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# Pola Accept-Encoding yang menerima gzip
+POLA_GZIP = re.compile(r'\bgzip\b')
+
+
+def responsKatalog(request, payload):
+    """
+    Mengirim payload katalog dengan validator ETag/Last-Modified.
+    
+    Menjawab 304 jika If-None-Match (atau If-Modified-Since) cocok, dan
+    mengirim body gzip yang sudah dikompres jika klien menerimanya.
+    
+    Args:
+        request: Request dari klien.
+        payload: PayloadJSON dari katalog penyakit.
+    
+    Returns:
+        HttpResponse
+    """
+    pakaiGzip = bool(POLA_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+    # Setiap encoding adalah representasi berbeda, jadi ETag-nya juga berbeda
+    etag = payload.etag[:-1] + '-gzip"' if pakaiGzip else payload.etag
+    
+    ifNoneMatch = request.META.get('HTTP_IF_NONE_MATCH')
+    if ifNoneMatch is not None:
+        # Perbandingan lemah (RFC 9110): proxy bisa menambahkan awalan W/
+        daftarEtag = {tag.strip().removeprefix('W/') for tag in ifNoneMatch.split(',')}
+        tidakBerubah = '*' in daftarEtag or etag in daftarEtag
+    else:
+        ifModifiedSince = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        tidakBerubah = (
+            ifModifiedSince is not None and payload.terakhirDiubah is not None
+            and int(payload.terakhirDiubah.timestamp()) <= ifModifiedSince
+        )
+    
+    if tidakBerubah:
+        respons = HttpResponseNotModified()
+    else:
+        respons = HttpResponse(
+            payload.isiGzip if pakaiGzip else payload.isi,
+            content_type='application/json'
+        )
+        if pakaiGzip:
+            respons['Content-Encoding'] = 'gzip'
+    
+    respons['ETag'] = etag
+    if payload.terakhirDiubah is not None:
+        respons['Last-Modified'] = http_date(payload.terakhirDiubah.timestamp())
+    # Selalu validasi ulang; body hanya diunduh ulang jika katalog berubah
+    respons['Cache-Control'] = 'no-cache'
+    patch_vary_headers(respons, ['Accept-Encoding'])
+    return respons
+
+
 class DaftarKelasView(APIView):
     """
     Endpoint untuk mendapatkan daftar semua kelas penyakit yang dapat dideteksi.
@@ -352,14 +1271,16 @@ class DaftarKelasView(APIView):
     permission_classes = [AllowAny]
     
     def get(self, request, *args, **kwargs):
+        payload = dapatkanKatalogPenyakit().payload('kelas', self._buatData)
+        return responsKatalog(request, payload)
+    
+    @staticmethod
+    def _buatData(daftarPenyakit):
         # Coba ambil dari database dulu
-        penyakitDB = Penyakit.objects.all()
-        
-        if penyakitDB.exists():
-            daftarKelas = PenyakitSerializer(penyakitDB, many=True).data
+        if daftarPenyakit:
+            daftarKelas = PenyakitSerializer(daftarPenyakit, many=True).data
         else:
             # Fallback ke settings jika database kosong
-            from django.conf import settings
             daftarKelas = []
             for kelas in settings.DAFTAR_KELAS_PENYAKIT:
                 infoPenyakit = dapatkanInfoPenyakit(kelas)
@@ -369,14 +1290,11 @@ class DaftarKelasView(APIView):
                     'deskripsi': infoPenyakit.get('deskripsi', ''),
                 })
         
-        return Response(
-            {
-                'sukses': True,
-                'jumlahKelas': len(daftarKelas),
-                'daftarKelas': daftarKelas,
-            },
-            status=status.HTTP_200_OK
-        )
+        return {
+            'sukses': True,
+            'jumlahKelas': len(daftarKelas),
+            'daftarKelas': daftarKelas,
+        }
 
 
 class DaftarPenyakitView(APIView):
@@ -386,13 +1304,16 @@ class DaftarPenyakitView(APIView):
     permission_classes = [AllowAny]
     
     def get(self, request):
-        penyakit = Penyakit.objects.all()
-        serializer = PenyakitSerializer(penyakit, many=True)
-        return Response({
+        payload = dapatkanKatalogPenyakit().payload('penyakit', self._buatData)
+        return responsKatalog(request, payload)
+    
+    @staticmethod
+    def _buatData(daftarPenyakit):
+        return {
             'sukses': True,
-            'jumlah': penyakit.count(),
-            'penyakit': serializer.data
-        }, status=status.HTTP_200_OK)
+            'jumlah': len(daftarPenyakit),
+            'penyakit': PenyakitSerializer(daftarPenyakit, many=True).data
+        }
 
 
 class DetailPenyakitView(APIView):
@@ -402,15 +1323,19 @@ class DetailPenyakitView(APIView):
     permission_classes = [AllowAny]
     
     def get(self, request, pk):
-        try:
-            penyakit = Penyakit.objects.get(pk=pk)
-            serializer = PenyakitSerializer(penyakit)
-            return Response({
-                'sukses': True,
-                'penyakit': serializer.data
-            }, status=status.HTTP_200_OK)
-        except Penyakit.DoesNotExist:
+        def buatData(daftarPenyakit):
+            for penyakit in daftarPenyakit:
+                if penyakit.pk == pk:
+                    return {
+                        'sukses': True,
+                        'penyakit': PenyakitSerializer(penyakit).data
+                    }
+            return None
+        
+        payload = dapatkanKatalogPenyakit().payload(f'penyakit:{pk}', buatData)
+        if payload is None:
             return Response({
                 'sukses': False,
                 'pesan': 'Penyakit tidak ditemukan.'
             }, status=status.HTTP_404_NOT_FOUND)
+        return responsKatalog(request, payload)
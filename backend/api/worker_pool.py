@@ -0,0 +1,314 @@
+"""
+Pool proses worker untuk inferensi model ChiliGuard.
+
+Setiap worker adalah proses terpisah yang memuat backend inferensinya
+sendiri, sehingga forward pass tidak memblokir thread HTTP maupun GIL
+proses Django. Array gambar dikirim lewat multiprocessing.shared_memory;
+yang melewati antrean hanya nama blok memori dan bentuk array.
+"""
+
+import atexit
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+
+def _aturCpuWorker(daftarCpu, jumlahThread):
+    if daftarCpu and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, daftarCpu)
+    if jumlahThread:
+        # Harus diatur sebelum TensorFlow/ONNX Runtime diimpor
+        for namaVariabel in ('OMP_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS'):
+            os.environ[namaVariabel] = str(jumlahThread)
+        os.environ.setdefault('TF_NUM_INTEROP_THREADS', '1')
+
+
+def _bukaBlokMemori(namaBlok):
+    # Hanya induk yang melacak (dan menghapus) blok. Sebelum Python 3.13,
+    # membuka blok ikut mendaftarkannya ke resource tracker bersama, sehingga
+    # tracker mengira blok bocor saat proses keluar.
+    try:
+        return shared_memory.SharedMemory(name=namaBlok, track=False)
+    except TypeError:
+        blokMemori = shared_memory.SharedMemory(name=namaBlok)
+        resource_tracker.unregister(blokMemori._name, 'shared_memory')
+        return blokMemori
+
+
+def _loopWorker(idWorker, antreanTugas, antreanHasil, konfigurasi):
+    """Loop utama proses worker: muat model, panaskan, lalu layani tugas."""
+    _aturCpuWorker(konfigurasi['daftarCpu'], konfigurasi['jumlahThread'])
+
+    from api.backends import dapatkanKelasBackend
+
+    try:
+        kelasBackend = dapatkanKelasBackend(konfigurasi['namaBackend'])
+        backend = kelasBackend(konfigurasi['jalurModel'], konfigurasi['jumlahThread'])
+        tinggi, lebar = konfigurasi['ukuranInput']
+        arrayDummy = np.zeros((1, tinggi, lebar, 3), dtype=np.float32)
+        for _ in range(konfigurasi['jumlahPemanasan']):
+            backend.prediksi(arrayDummy)
+    except Exception as kesalahan:
+        antreanHasil.put(('gagal', idWorker, f'Worker {idWorker} gagal memuat model: {kesalahan}'))
+        return
+
+    antreanHasil.put(('siap', idWorker, None))
+
+    while True:
+        tugas = antreanTugas.get()
+        if tugas is None:
+            break
+
+        idTugas, namaBlok, bentuk = tugas
+        try:
+            # Hanya induk yang membuat dan menghapus (unlink) blok
+            blokMemori = _bukaBlokMemori(namaBlok)
+            try:
+                probabilitas = np.array(backend.prediksi(
+                    np.ndarray(bentuk, dtype=np.float32, buffer=blokMemori.buf)
+                ), dtype=np.float32)
+            finally:
+                blokMemori.close()
+            antreanHasil.put(('hasil', idTugas, probabilitas))
+        except Exception as kesalahan:
+            antreanHasil.put(('error', idTugas, str(kesalahan)))
+
+
+class PoolInferensi:
+    """
+    Pool N proses worker yang masing-masing memegang satu model.
+
+    Args:
+        jumlahWorker: Jumlah proses worker.
+        namaBackend: Backend inferensi ('keras', 'tflite', 'onnx').
+        jalurModel: Path file model untuk backend tersebut.
+        ukuranInput: (lebar, tinggi) input model.
+        jumlahThread: Thread CPU per worker (None = default runtime).
+        pinCpu: Kunci setiap worker ke sekumpulan core CPU sendiri.
+        jumlahPemanasan: Jumlah forward pass dummy saat worker start.
+        timeout: Batas waktu (detik) menunggu hasil satu tugas.
+    """
+
+    def __init__(self, jumlahWorker, namaBackend, jalurModel, ukuranInput,
+                 jumlahThread=None, pinCpu=False, jumlahPemanasan=1, timeout=30.0):
+        self.jumlahWorker = max(1, int(jumlahWorker))
+        self.namaBackend = namaBackend
+        self.jalurModel = jalurModel
+        lebar, tinggi = ukuranInput
+        self.ukuranInput = (tinggi, lebar)
+        self.jumlahThread = jumlahThread
+        self.pinCpu = pinCpu
+        self.jumlahPemanasan = jumlahPemanasan
+        self.timeout = timeout
+
+        # TensorFlow tidak aman di-fork; worker selalu dibuat dengan spawn
+        self._konteks = multiprocessing.get_context('spawn')
+        self._antreanTugas = None
+        self._antreanHasil = None
+        self._daftarProses = []
+        self._tugasMenunggu = {}
+        self._penghitungId = itertools.count()
+        self._kunci = threading.Lock()
+        self._kondisiSiap = threading.Condition()
+        self._jumlahSiap = 0
+        self._kesalahanStart = None
+        self._pid = None
+        self._berhenti = None
+        self._threadHasil = None
+        # Pool yang sudah dihentikan tidak pernah dijalankan ulang
+        self._ditutup = False
+        # Handler atexit didaftarkan sekali, dan dilepas saat dihentikan
+        # agar pool yang sudah pensiun tidak tertahan sampai proses keluar
+        self._atexitTerdaftar = False
+
+    def _daftarCpuWorker(self, idWorker):
+        if not self.pinCpu or not hasattr(os, 'sched_getaffinity'):
+            return None
+        semuaCpu = sorted(os.sched_getaffinity(0))
+        jumlahPerWorker = self.jumlahThread or max(1, len(semuaCpu) // self.jumlahWorker)
+        mulai = (idWorker * jumlahPerWorker) % len(semuaCpu)
+        return [semuaCpu[(mulai + i) % len(semuaCpu)] for i in range(jumlahPerWorker)]
+
+    def _mulaiWorker(self, idWorker):
+        konfigurasi = {
+            'namaBackend': self.namaBackend,
+            'jalurModel': self.jalurModel,
+            'ukuranInput': self.ukuranInput,
+            'jumlahThread': self.jumlahThread,
+            'jumlahPemanasan': self.jumlahPemanasan,
+            'daftarCpu': self._daftarCpuWorker(idWorker),
+        }
+        proses = self._konteks.Process(
+            target=_loopWorker,
+            args=(idWorker, self._antreanTugas, self._antreanHasil, konfigurasi),
+            name=f'chiliguard-inferensi-{idWorker}',
+            daemon=True,
+        )
+        proses.start()
+        return proses
+
+    def mulai(self):
+        """
+        Menjalankan semua worker dan menunggu model selesai dimuat.
+
+        Raises:
+            RuntimeError: Jika ada worker yang gagal memuat model, atau
+                pool sudah dihentikan.
+        """
+        with self._kunci:
+            if self._ditutup:
+                raise RuntimeError('Pool inferensi sudah dihentikan')
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._kesalahanStart = None
+            self._jumlahSiap = 0
+            self._antreanTugas = self._konteks.Queue()
+            self._antreanHasil = self._konteks.Queue()
+            self._tugasMenunggu = {}
+            self._daftarProses = [self._mulaiWorker(i) for i in range(self.jumlahWorker)]
+            self._berhenti = threading.Event()
+            self._threadHasil = threading.Thread(
+                target=self._loopHasil, args=(self._berhenti,),
+                name='chiliguard-pool-hasil', daemon=True,
+            )
+            self._threadHasil.start()
+            if not self._atexitTerdaftar:
+                atexit.register(self.hentikan)
+                self._atexitTerdaftar = True
+
+        with self._kondisiSiap:
+            while self._jumlahSiap < self.jumlahWorker and not self._kesalahanStart:
+                self._kondisiSiap.wait(timeout=1.0)
+                for idWorker, proses in enumerate(self._daftarProses):
+                    if not proses.is_alive() and not self._kesalahanStart:
+                        self._kesalahanStart = (
+                            f'Worker {idWorker} berhenti sebelum siap (exit {proses.exitcode})'
+                        )
+        if self._kesalahanStart:
+            # Start yang gagal boleh dicoba lagi oleh prediksi() berikutnya
+            self._hentikanWorker()
+            raise RuntimeError(self._kesalahanStart)
+
+    def _loopHasil(self, berhenti):
+        while not berhenti.is_set():
+            try:
+                jenis, idPesan, isi = self._antreanHasil.get(timeout=1.0)
+            except queue.Empty:
+                self._periksaWorker()
+                continue
+            except (EOFError, OSError):
+                return
+
+            if jenis in ('siap', 'gagal'):
+                with self._kondisiSiap:
+                    if jenis == 'gagal':
+                        self._kesalahanStart = isi
+                    else:
+                        self._jumlahSiap += 1
+                    self._kondisiSiap.notify_all()
+                continue
+
+            with self._kunci:
+                future = self._tugasMenunggu.pop(idPesan, None)
+            if future is None:
+                continue
+            if jenis == 'hasil':
+                future.set_result(isi)
+            else:
+                future.set_exception(RuntimeError(isi))
+
+    def _periksaWorker(self):
+        # Worker yang mati (mis. kehabisan memori) diganti worker baru;
+        # tugas yang sedang dikerjakannya akan berakhir dengan timeout.
+        # Selama start, worker yang mati ditangani mulai() sebagai kegagalan.
+        if self._pid != os.getpid() or self._jumlahSiap < self.jumlahWorker or self._ditutup:
+            return
+        for idWorker, proses in enumerate(self._daftarProses):
+            if not proses.is_alive() and proses.exitcode != 0:
+                print(f"[PERINGATAN] Worker inferensi {idWorker} berhenti "
+                      f"(exit {proses.exitcode}), memulai ulang")
+                self._daftarProses[idWorker] = self._mulaiWorker(idWorker)
+
+    def prediksi(self, arrayBatch):
+        """
+        Mengirim satu batch ke worker dan menunggu hasilnya.
+
+        Args:
+            arrayBatch: Array gambar float32 (N, H, W, 3).
+
+        Returns:
+            numpy.ndarray: Probabilitas setiap kelas (N, jumlah_kelas).
+
+        Raises:
+            RuntimeError: Jika pool sudah dihentikan (mis. diganti versi
+                model baru); pool tidak dijalankan ulang.
+        """
+        if self._ditutup:
+            raise RuntimeError('Pool inferensi sudah dihentikan')
+        if self._pid != os.getpid():
+            self.mulai()
+
+        arrayBatch = np.ascontiguousarray(arrayBatch, dtype=np.float32)
+        blokMemori = shared_memory.SharedMemory(create=True, size=arrayBatch.nbytes)
+        try:
+            np.ndarray(arrayBatch.shape, dtype=np.float32, buffer=blokMemori.buf)[:] = arrayBatch
+
+            future = Future()
+            idTugas = next(self._penghitungId)
+            with self._kunci:
+                if self._ditutup:
+                    raise RuntimeError('Pool inferensi sudah dihentikan')
+                self._tugasMenunggu[idTugas] = future
+            self._antreanTugas.put((idTugas, blokMemori.name, arrayBatch.shape))
+
+            try:
+                return future.result(timeout=self.timeout)
+            finally:
+                with self._kunci:
+                    self._tugasMenunggu.pop(idTugas, None)
+        finally:
+            blokMemori.close()
+            blokMemori.unlink()
+
+    def hentikan(self):
+        """
+        Menghentikan semua worker dengan rapi.
+
+        Setelah dihentikan, pool bersifat final: prediksi() dan mulai()
+        gagal dengan RuntimeError, dan tugas yang masih menunggu hasil
+        langsung digagalkan.
+        """
+        with self._kunci:
+            self._ditutup = True
+            if self._atexitTerdaftar:
+                atexit.unregister(self.hentikan)
+                self._atexitTerdaftar = False
+        self._hentikanWorker()
+
+    def _hentikanWorker(self):
+        if self._pid != os.getpid():
+            return
+        for _ in self._daftarProses:
+            self._antreanTugas.put(None)
+        for proses in self._daftarProses:
+            proses.join(timeout=5)
+            if proses.is_alive():
+                proses.terminate()
+        self._daftarProses = []
+
+        self._berhenti.set()
+        if self._threadHasil is not threading.current_thread():
+            self._threadHasil.join(timeout=5)
+        with self._kunci:
+            tugasMenunggu, self._tugasMenunggu = self._tugasMenunggu, {}
+            self._pid = None
+        for future in tugasMenunggu.values():
+            if not future.done():
+                future.set_exception(RuntimeError('Pool inferensi dihentikan'))
@@ -0,0 +1,458 @@
+"""
+Penulisan riwayat deteksi secara write-behind.
+
+Saat RIWAYAT_WRITE_BEHIND_AKTIF, view prediksi tidak menunggu file
+gambar ditulis dan baris RiwayatDeteksi di-insert. Riwayat dimasukkan ke
+antrean terbatas dalam proses, lalu thread latar belakang menuliskannya
+per batch (file gambar lalu satu bulk_create).
+
+Jika antrean penuh atau database gagal, riwayat ditulis ke direktori
+tumpahan (RIWAYAT_TUMPAHAN_DIR) secara durable dan dimasukkan kembali
+saat penulis sempat. Saat proses berhenti, antrean dikuras terlebih
+dahulu; sisa yang tidak sempat ditulis ditumpahkan ke disk.
+
+Direktori tumpahan dipakai bersama semua worker. Sebelum dimuat ulang,
+setiap file tumpahan diklaim dengan os.rename, sehingga satu tumpahan
+hanya diproses satu worker. Jika bulk_create gagal, riwayat dicoba satu
+per satu; riwayat yang terus gagal (mis. user sudah dihapus) dipindahkan
+ke subdirektori karantina setelah RIWAYAT_TUMPAHAN_MAKS_PERCOBAAN kali,
+agar tidak menahan tumpahan lain.
+"""
+
+import atexit
+import json
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import InterfaceError, OperationalError, close_old_connections, transaction
+from django.utils import timezone
+
+
+NAMA_DIREKTORI_KARANTINA = 'karantina'
+
+
+def _prosesHidup(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class EntriRiwayat:
+    """Satu riwayat deteksi yang menunggu ditulis."""
+
+    __slots__ = (
+        'idUser', 'idPenyakit', 'namaKelas', 'kepercayaan', 'statusSehat',
+        'waktuDibuat', 'namaFile', 'isiGambar', 'jalurTumpahan', 'versiModel', 'percobaan',
+    )
+
+    def __init__(self, idUser, idPenyakit, namaKelas, kepercayaan, statusSehat,
+                 namaFile, isiGambar, waktuDibuat=None, jalurTumpahan=None, versiModel='',
+                 percobaan=0):
+        self.idUser = idUser
+        self.idPenyakit = idPenyakit
+        self.namaKelas = namaKelas
+        self.kepercayaan = kepercayaan
+        self.statusSehat = statusSehat
+        self.namaFile = namaFile
+        self.isiGambar = isiGambar
+        self.waktuDibuat = waktuDibuat or timezone.now()
+        self.jalurTumpahan = jalurTumpahan
+        self.versiModel = versiModel
+        # Jumlah penulisan yang gagal bukan karena database tidak terjangkau
+        self.percobaan = percobaan
+
+    def metadata(self):
+        return {
+            'idUser': self.idUser,
+            'idPenyakit': self.idPenyakit,
+            'namaKelas': self.namaKelas,
+            'kepercayaan': self.kepercayaan,
+            'statusSehat': self.statusSehat,
+            'namaFile': self.namaFile,
+            'waktuDibuat': self.waktuDibuat.isoformat(),
+            'versiModel': self.versiModel,
+            'percobaan': self.percobaan,
+        }
+
+
+class PenulisRiwayat:
+    """
+    Antrean write-behind untuk RiwayatDeteksi.
+
+    Args:
+        kapasitas: Jumlah entri maksimal di antrean memori.
+        kapasitasByte: Total byte gambar maksimal di antrean memori.
+        ukuranBatch: Jumlah riwayat maksimal per bulk_create.
+        intervalFlush: Waktu tunggu maksimal (detik) sebelum batch ditulis.
+        direktoriTumpahan: Direktori untuk riwayat yang ditumpahkan ke disk.
+        maksPercobaan: Jumlah kegagalan sebelum riwayat dikarantina.
+    """
+
+    def __init__(self, kapasitas=1000, kapasitasByte=256 * 1024 * 1024, ukuranBatch=50,
+                 intervalFlush=0.2, direktoriTumpahan=None, maksPercobaan=3):
+        self.kapasitas = max(1, int(kapasitas))
+        self.kapasitasByte = kapasitasByte
+        self.ukuranBatch = max(1, int(ukuranBatch))
+        self.intervalFlush = intervalFlush
+        self.direktoriTumpahan = str(direktoriTumpahan)
+        self.direktoriKarantina = os.path.join(self.direktoriTumpahan, NAMA_DIREKTORI_KARANTINA)
+        self.maksPercobaan = max(1, int(maksPercobaan))
+        self._antrean = queue.Queue(maxsize=self.kapasitas)
+        self._kunci = threading.Lock()
+        self._byteAntre = 0
+        self._berhenti = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._cekTumpahanTerakhir = 0.0
+        self.jumlahTertulis = 0
+        self.jumlahTumpah = 0
+        self.jumlahKarantina = 0
+
+    def tambah(self, entri):
+        """
+        Memasukkan satu riwayat ke antrean (tidak pernah memblokir lama).
+
+        Jika antrean penuh, riwayat langsung ditumpahkan ke disk.
+        """
+        self._pastikanBerjalan()
+        ukuran = len(entri.isiGambar)
+        with self._kunci:
+            muat = self._byteAntre + ukuran <= self.kapasitasByte
+            if muat:
+                self._byteAntre += ukuran
+        if muat:
+            try:
+                self._antrean.put_nowait(entri)
+                return
+            except queue.Full:
+                with self._kunci:
+                    self._byteAntre -= ukuran
+        self._tumpahkan([entri])
+
+    def _pastikanBerjalan(self):
+        # Thread tidak ikut ter-copy saat fork, jadi setiap proses memulai
+        # thread penulisnya sendiri
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._kunci:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._antrean = queue.Queue(maxsize=self.kapasitas)
+                self._byteAntre = 0
+                self._berhenti = threading.Event()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._loop, name='chiliguard-penulis-riwayat', daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.hentikan)
+
+    def _ambilBatch(self):
+        batch = []
+        try:
+            batch.append(self._antrean.get(timeout=self.intervalFlush))
+        except queue.Empty:
+            return batch
+
+        batasWaktu = time.monotonic() + self.intervalFlush
+        while len(batch) < self.ukuranBatch:
+            sisaWaktu = batasWaktu - time.monotonic()
+            try:
+                if sisaWaktu <= 0:
+                    batch.append(self._antrean.get_nowait())
+                else:
+                    batch.append(self._antrean.get(timeout=sisaWaktu))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while not (self._berhenti.is_set() and self._antrean.empty()):
+            batch = self._ambilBatch()
+            if batch:
+                with self._kunci:
+                    self._byteAntre -= sum(len(entri.isiGambar) for entri in batch)
+                self._tulis(batch)
+            elif not self._berhenti.is_set():
+                self._muatUlangTumpahan()
+
+    def _tulis(self, batch):
+        """
+        Menulis satu batch; jika bulk_create gagal, riwayat dicoba satu per satu.
+
+        Returns:
+            bool: True jika semua riwayat dalam batch tertulis.
+        """
+        daftarGagal = []
+        close_old_connections()
+        try:
+            try:
+                self._simpanBatch(batch)
+            except Exception as kesalahan:
+                if len(batch) == 1:
+                    daftarGagal.append((batch[0], kesalahan))
+                else:
+                    print(f"[PERINGATAN] Gagal menulis {len(batch)} riwayat sekaligus, "
+                          f"dicoba satu per satu: {kesalahan}")
+                    for entri in batch:
+                        try:
+                            self._simpanBatch([entri])
+                        except Exception as kesalahanEntri:
+                            daftarGagal.append((entri, kesalahanEntri))
+        finally:
+            close_old_connections()
+
+        entriGagal = {id(entri) for entri, _ in daftarGagal}
+        berhasil = [entri for entri in batch if id(entri) not in entriGagal]
+        for entri in berhasil:
+            self._hapusTumpahan(entri)
+        with self._kunci:
+            self.jumlahTertulis += len(berhasil)
+        for entri, kesalahan in daftarGagal:
+            self._tanganiGagal(entri, kesalahan)
+        return not daftarGagal
+
+    def _simpanBatch(self, batch):
+        from .models import RiwayatDeteksi
+        from .statistics import perbaruiStatistik
+        from .thumbnails import jadwalkanThumbnail
+
+        fieldGambar = RiwayatDeteksi._meta.get_field('gambar')
+        # File disimpan di dalam transaksi: referensi blob yang diambil
+        # storage ikut dibatalkan jika insert gagal
+        with transaction.atomic():
+            daftarRiwayat = []
+            for entri in batch:
+                namaGambar = fieldGambar.storage.save(
+                    fieldGambar.generate_filename(None, entri.namaFile),
+                    ContentFile(entri.isiGambar),
+                    max_length=fieldGambar.max_length,
+                )
+                daftarRiwayat.append(RiwayatDeteksi(
+                    user_id=entri.idUser,
+                    gambar=namaGambar,
+                    penyakit_id=entri.idPenyakit,
+                    nama_kelas=entri.namaKelas,
+                    kepercayaan=entri.kepercayaan,
+                    status_sehat=entri.statusSehat,
+                    versi_model=entri.versiModel,
+                ))
+
+            RiwayatDeteksi.objects.bulk_create(daftarRiwayat)
+            # bulk_create mengisi created_at dengan waktu flush; kembalikan
+            # waktu prediksi untuk riwayat yang tertunda lama (mis. tumpahan)
+            for riwayat, entri in zip(daftarRiwayat, batch):
+                if abs((riwayat.created_at - entri.waktuDibuat).total_seconds()) > 1:
+                    RiwayatDeteksi.objects.filter(pk=riwayat.pk).update(
+                        created_at=entri.waktuDibuat
+                    )
+                    riwayat.created_at = entri.waktuDibuat
+            perbaruiStatistik(daftarRiwayat)
+        jadwalkanThumbnail(riwayat.pk for riwayat in daftarRiwayat)
+
+    def _tanganiGagal(self, entri, kesalahan):
+        # Database tidak terjangkau bukan kesalahan riwayatnya; coba lagi nanti
+        # tanpa menghitung percobaan
+        if not isinstance(kesalahan, (OperationalError, InterfaceError)):
+            entri.percobaan += 1
+        if entri.percobaan >= self.maksPercobaan:
+            print(f"[ERROR] Riwayat gagal ditulis {entri.percobaan} kali, "
+                  f"dipindahkan ke karantina: {kesalahan}")
+            self._tulisFileTumpahan(self.direktoriKarantina, entri, {'kesalahan': str(kesalahan)})
+            with self._kunci:
+                self.jumlahKarantina += 1
+        else:
+            print(f"[PERINGATAN] Riwayat gagal ditulis, ditumpahkan ke disk: {kesalahan}")
+            # Nama baru menempatkan riwayat ini di belakang tumpahan lain
+            self._tumpahkan([entri])
+        self._hapusTumpahan(entri)
+
+    def _akhiranKlaim(self):
+        return f'.json.klaim-{socket.gethostname()}-{os.getpid()}'
+
+    def _hapusTumpahan(self, entri):
+        if entri.jalurTumpahan is None:
+            return
+        for jalur in (entri.jalurTumpahan + self._akhiranKlaim(), entri.jalurTumpahan + '.bin'):
+            try:
+                os.unlink(jalur)
+            except FileNotFoundError:
+                pass
+        entri.jalurTumpahan = None
+
+    def _tulisFileTumpahan(self, direktori, entri, metadataTambahan=None):
+        os.makedirs(direktori, exist_ok=True)
+        # Nama diawali waktu agar tumpahan dimuat ulang sesuai urutan
+        jalurDasar = os.path.join(direktori, f'{time.time_ns():020d}-{uuid.uuid4().hex}')
+        metadata = {**entri.metadata(), **(metadataTambahan or {})}
+        # Gambar ditulis dulu; metadata (.json) menandai entri lengkap
+        for akhiran, isi in (('.bin', entri.isiGambar), ('.json', json.dumps(metadata).encode())):
+            jalurSementara = jalurDasar + akhiran + '.tmp'
+            with open(jalurSementara, 'wb') as berkas:
+                berkas.write(isi)
+                berkas.flush()
+                os.fsync(berkas.fileno())
+            os.replace(jalurSementara, jalurDasar + akhiran)
+
+    def _tumpahkan(self, daftarEntri):
+        for entri in daftarEntri:
+            self._tulisFileTumpahan(self.direktoriTumpahan, entri)
+        with self._kunci:
+            self.jumlahTumpah += sum(1 for entri in daftarEntri if entri.jalurTumpahan is None)
+
+    def _klaimTumpahan(self, daftarNama):
+        """
+        Mengklaim tumpahan dengan os.rename (atomik); tumpahan yang sudah
+        diklaim worker lain dilewati. Klaim milik proses yang sudah mati di
+        host ini dikembalikan agar dapat diklaim ulang.
+
+        Returns:
+            list: Path dasar tumpahan yang berhasil diklaim.
+        """
+        prefiksKlaim = f'.json.klaim-{socket.gethostname()}-'
+        daftarMetadata = []
+        for nama in daftarNama:
+            if nama.endswith('.json'):
+                daftarMetadata.append(nama)
+                continue
+            dasar, pemisah, pid = nama.rpartition(prefiksKlaim)
+            if pemisah and pid.isdigit() and not _prosesHidup(int(pid)):
+                try:
+                    os.rename(os.path.join(self.direktoriTumpahan, nama),
+                              os.path.join(self.direktoriTumpahan, dasar + '.json'))
+                    daftarMetadata.append(dasar + '.json')
+                except FileNotFoundError:
+                    pass
+
+        daftarMetadata.sort()
+        daftarKlaim = []
+        for namaMetadata in daftarMetadata:
+            if len(daftarKlaim) >= self.ukuranBatch:
+                break
+            jalurDasar = os.path.join(self.direktoriTumpahan, namaMetadata[:-len('.json')])
+            try:
+                os.rename(jalurDasar + '.json', jalurDasar + self._akhiranKlaim())
+            except FileNotFoundError:
+                continue
+            daftarKlaim.append(jalurDasar)
+        return daftarKlaim
+
+    def _muatUlangTumpahan(self, paksa=False):
+        sekarang = time.monotonic()
+        if not paksa and sekarang - self._cekTumpahanTerakhir < 5.0:
+            return
+        self._cekTumpahanTerakhir = sekarang
+
+        try:
+            daftarNama = os.listdir(self.direktoriTumpahan)
+        except FileNotFoundError:
+            return
+        self._tulisTumpahan(self._klaimTumpahan(daftarNama))
+
+    def _tulisTumpahan(self, daftarKlaim):
+        batch = []
+        for jalurDasar in daftarKlaim:
+            jalurKlaim = jalurDasar + self._akhiranKlaim()
+            try:
+                with open(jalurKlaim, 'rb') as berkas:
+                    metadata = json.load(berkas)
+                with open(jalurDasar + '.bin', 'rb') as berkas:
+                    isiGambar = berkas.read()
+                entri = EntriRiwayat(
+                    metadata['idUser'], metadata['idPenyakit'], metadata['namaKelas'],
+                    metadata['kepercayaan'], metadata['statusSehat'], metadata['namaFile'],
+                    isiGambar, waktuDibuat=datetime.fromisoformat(metadata['waktuDibuat']),
+                    jalurTumpahan=jalurDasar, versiModel=metadata.get('versiModel', ''),
+                    percobaan=metadata.get('percobaan', 0),
+                )
+            except (OSError, ValueError, KeyError) as kesalahan:
+                print(f"[ERROR] Tumpahan rusak dipindahkan ke karantina: {jalurDasar} ({kesalahan})")
+                self._karantinaFile(jalurDasar, jalurKlaim)
+                continue
+            batch.append(entri)
+        if batch and self._tulis(batch):
+            print(f"[INFO] {len(batch)} riwayat tumpahan berhasil ditulis ke database")
+
+    def _karantinaFile(self, jalurDasar, jalurKlaim):
+        os.makedirs(self.direktoriKarantina, exist_ok=True)
+        jalurTujuan = os.path.join(self.direktoriKarantina, os.path.basename(jalurDasar))
+        for jalurAsal, akhiran in ((jalurKlaim, '.json'), (jalurDasar + '.bin', '.bin')):
+            try:
+                os.replace(jalurAsal, jalurTujuan + akhiran)
+            except FileNotFoundError:
+                pass
+        with self._kunci:
+            self.jumlahKarantina += 1
+
+    def hentikan(self, timeout=10.0):
+        """
+        Menguras antrean sebelum proses berhenti.
+
+        Args:
+            timeout: Waktu maksimal (detik) menunggu antrean ditulis; sisanya
+                ditumpahkan ke disk.
+        """
+        if self._pid != os.getpid() or self._thread is None:
+            return
+        self._berhenti.set()
+        self._thread.join(timeout=timeout)
+
+        sisa = []
+        while True:
+            try:
+                sisa.append(self._antrean.get_nowait())
+            except queue.Empty:
+                break
+        if sisa:
+            print(f"[PERINGATAN] {len(sisa)} riwayat belum tertulis saat berhenti, ditumpahkan ke disk")
+            self._tumpahkan(sisa)
+
+    def statistik(self):
+        """
+        Returns:
+            dict: Jumlah antre, byte antre, tertulis, tumpah, dan karantina.
+        """
+        with self._kunci:
+            return {
+                'antre': self._antrean.qsize(),
+                'byteAntre': self._byteAntre,
+                'tertulis': self.jumlahTertulis,
+                'tumpah': self.jumlahTumpah,
+                'karantina': self.jumlahKarantina,
+            }
+
+
+_penulisRiwayat = None
+
+
+def dapatkanPenulisRiwayat():
+    """
+    Mendapatkan penulis write-behind proses ini (dibuat sekali).
+
+    Returns:
+        PenulisRiwayat
+    """
+    global _penulisRiwayat
+
+    if _penulisRiwayat is None:
+        _penulisRiwayat = PenulisRiwayat(
+            kapasitas=settings.RIWAYAT_ANTREAN_MAKS,
+            kapasitasByte=settings.RIWAYAT_ANTREAN_MAKS_MB * 1024 * 1024,
+            ukuranBatch=settings.RIWAYAT_FLUSH_UKURAN,
+            intervalFlush=settings.RIWAYAT_FLUSH_INTERVAL_MS / 1000,
+            direktoriTumpahan=settings.RIWAYAT_TUMPAHAN_DIR,
+            maksPercobaan=settings.RIWAYAT_TUMPAHAN_MAKS_PERCOBAAN,
+        )
+    return _penulisRiwayat
@@ -172,6 +172,23 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Upload di atas batas ini ditulis ke file sementara (TemporaryUploadedFile)
+# dan dibaca bertahap, bukan disimpan utuh di memori
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv('FILE_UPLOAD_MAX_MEMORY_SIZE', str(2 * 1024 * 1024)))
+
+# Jumlah piksel maksimal yang di-decode per gambar (setelah draft JPEG).
+# Memori decode puncak per gambar kira-kira GAMBAR_PIKSEL_MAKS x 7 byte;
+# gambar di atas batas ditolak dari header-nya, sebelum di-decode.
+GAMBAR_PIKSEL_MAKS = int(os.getenv('GAMBAR_PIKSEL_MAKS', str(12_000_000)))
+
+# Thumbnail WebP riwayat deteksi (sisi terpanjang dalam piksel), dibuat
+# di thread latar belakang setelah riwayat tersimpan
+THUMBNAIL_AKTIF = os.getenv('THUMBNAIL_AKTIF', 'True') == 'True'
+THUMBNAIL_UKURAN_KECIL = int(os.getenv('THUMBNAIL_UKURAN_KECIL', '160'))
+THUMBNAIL_UKURAN_SEDANG = int(os.getenv('THUMBNAIL_UKURAN_SEDANG', '480'))
+THUMBNAIL_KUALITAS = int(os.getenv('THUMBNAIL_KUALITAS', '80'))
+THUMBNAIL_JUMLAH_WORKER = int(os.getenv('THUMBNAIL_JUMLAH_WORKER', '2'))
+
 
 # =============================================================================
 # KONFIGURASI REST FRAMEWORK
@@ -179,7 +196,7 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.TokenAuthenticationCache',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -190,8 +207,20 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.JSONParser',
     ],
+    # Rate limit endpoint prediksi (lihat api/admission.py)
+    'DEFAULT_THROTTLE_RATES': {
+        'prediksi_anon': os.getenv('PREDIKSI_RATE_ANON', '30/min'),
+        'prediksi_user': os.getenv('PREDIKSI_RATE_USER', '120/min'),
+    },
 }
 
+# Cache token -> user untuk TokenAuthenticationCache (dikosongkan saat
+# logout / user diubah). Hanya aktif jika AUTH_TOKEN_CACHE_ALIAS diisi alias
+# CACHES yang dipakai bersama semua worker (mis. Redis), agar logout
+# langsung berlaku di semua worker.
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', '60'))
+AUTH_TOKEN_CACHE_ALIAS = os.getenv('AUTH_TOKEN_CACHE_ALIAS', '')
+
 
 # =============================================================================
 # KONFIGURASI MODEL ML
@@ -200,6 +229,28 @@ REST_FRAMEWORK = {
 # Path ke file model .h5
 MODEL_PATH = os.path.join(BASE_DIR, 'api', 'ml_models', 'chiligard_model_v1.keras')
 
+# Runtime inferensi: 'keras' (default), 'tflite', atau 'onnx'
+# File .tflite/.onnx dibuat dengan: python manage.py convert_model
+MODEL_BACKEND = os.getenv('MODEL_BACKEND', 'keras')
+MODEL_TFLITE_PATH = os.path.splitext(MODEL_PATH)[0] + '.tflite'
+MODEL_ONNX_PATH = os.path.splitext(MODEL_PATH)[0] + '.onnx'
+
+# Varian TFLite terkuantisasi untuk MODEL_BACKEND='tflite':
+# '' (float32), 'dinamis', 'float16', atau 'int8'
+# File varian dibuat dengan: python manage.py quantize_model
+MODEL_KUANTISASI = os.getenv('MODEL_KUANTISASI', '')
+
+# Jumlah thread CPU per runtime inferensi (kosong = default runtime)
+MODEL_JUMLAH_THREAD = int(os.getenv('MODEL_JUMLAH_THREAD', '0')) or None
+
+# Registri model: versi model di MODEL_REGISTRI_DIR (<versi>/model.<ekstensi>
+# + metadata.json). Jika aktif, MODEL_PATH dan MODEL_BACKEND diabaikan; versi
+# aktif diganti dengan python manage.py model_registry aktifkan <versi>, dan
+# setiap worker memuatnya di latar belakang (dicek tiap N detik) tanpa restart.
+MODEL_REGISTRI_AKTIF = os.getenv('MODEL_REGISTRI_AKTIF', 'False') == 'True'
+MODEL_REGISTRI_DIR = os.getenv('MODEL_REGISTRI_DIR', os.path.join(BASE_DIR, 'api', 'ml_models', 'registri'))
+MODEL_REGISTRI_INTERVAL_CEK = float(os.getenv('MODEL_REGISTRI_INTERVAL_CEK', '10'))
+
 # Kelas penyakit yang dapat dideteksi
 # Label kelas sesuai urutan indeks model (0-8)
 DAFTAR_KELAS_PENYAKIT = [
@@ -217,6 +268,103 @@ DAFTAR_KELAS_PENYAKIT = [
 # Ukuran input gambar untuk model
 UKURAN_GAMBAR_INPUT = (224, 224)
 
+# Filter resize praproses: 'lanczos' (default, sama dengan saat model dilatih),
+# atau 'bicubic'/'bilinear' yang lebih cepat. Bandingkan kecepatan & kecocokan
+# top-1 dulu dengan: python manage.py benchmark_preprocessing
+PRAPROSES_RESAMPLER = os.getenv('PRAPROSES_RESAMPLER', 'lanczos')
+
+# Muat dan panaskan model saat proses start (aktifkan hanya di worker web,
+# agar perintah manage.py seperti migrate tetap cepat)
+MODEL_MUAT_SAAT_START = os.getenv('MODEL_MUAT_SAAT_START', 'False') == 'True'
+MODEL_JUMLAH_PEMANASAN = int(os.getenv('MODEL_JUMLAH_PEMANASAN', '3'))
+
+# Micro-batching: permintaan prediksi yang datang bersamaan digabung
+# menjadi satu forward pass (maksimal INFERENSI_BATCH_MAKS gambar,
+# menunggu paling lama INFERENSI_BATCH_TUNGGU_MS milidetik)
+INFERENSI_BATCH_AKTIF = os.getenv('INFERENSI_BATCH_AKTIF', 'False') == 'True'
+INFERENSI_BATCH_MAKS = int(os.getenv('INFERENSI_BATCH_MAKS', '16'))
+INFERENSI_BATCH_TUNGGU_MS = float(os.getenv('INFERENSI_BATCH_TUNGGU_MS', '5'))
+
+# Pool proses worker inferensi: model dijalankan di N proses terpisah,
+# array gambar dikirim lewat shared memory. Setiap worker memakai
+# INFERENSI_POOL_THREAD_PER_WORKER thread dan, jika PIN_CPU aktif,
+# dikunci ke core CPU sendiri (mis. 8 worker x 4 thread di mesin 32 core).
+INFERENSI_POOL_AKTIF = os.getenv('INFERENSI_POOL_AKTIF', 'False') == 'True'
+INFERENSI_POOL_UKURAN = int(os.getenv('INFERENSI_POOL_UKURAN', '2'))
+INFERENSI_POOL_THREAD_PER_WORKER = int(os.getenv('INFERENSI_POOL_THREAD_PER_WORKER', '0')) or None
+INFERENSI_POOL_PIN_CPU = os.getenv('INFERENSI_POOL_PIN_CPU', 'False') == 'True'
+INFERENSI_POOL_TIMEOUT = float(os.getenv('INFERENSI_POOL_TIMEOUT', '30'))
+
+# Kaskade dua tahap: model cepat menjawab dulu; model penuh (MODEL_PATH)
+# hanya dipanggil jika kepercayaan top-1 model cepat < ambang atau kelasnya
+# ada di KASKADE_KELAS_PANTAU (dipisah koma, mis. 'Leaf Curl,Veinal Mottle').
+# Model cepat harus memakai DAFTAR_KELAS_PENYAKIT dan UKURAN_GAMBAR_INPUT
+# yang sama. Evaluasi dengan: python manage.py evaluate_cascade
+KASKADE_AKTIF = os.getenv('KASKADE_AKTIF', 'False') == 'True'
+MODEL_CEPAT_BACKEND = os.getenv('MODEL_CEPAT_BACKEND', 'tflite')
+MODEL_CEPAT_PATH = os.getenv(
+    'MODEL_CEPAT_PATH',
+    os.path.join(BASE_DIR, 'api', 'ml_models', f'chiligard_model_cepat.{MODEL_CEPAT_BACKEND}')
+)
+KASKADE_AMBANG_KEPERCAYAAN = float(os.getenv('KASKADE_AMBANG_KEPERCAYAAN', '0.9'))
+KASKADE_KELAS_PANTAU = [
+    kelas.strip() for kelas in os.getenv('KASKADE_KELAS_PANTAU', '').split(',') if kelas.strip()
+]
+
+# Cache hasil prediksi berdasarkan hash konten gambar (LRU dalam proses).
+# Isi CACHE_PREDIKSI_ALIAS dengan alias di CACHES untuk berbagi cache antar-worker.
+CACHE_PREDIKSI_AKTIF = os.getenv('CACHE_PREDIKSI_AKTIF', 'True') == 'True'
+CACHE_PREDIKSI_KAPASITAS = int(os.getenv('CACHE_PREDIKSI_KAPASITAS', '1024'))
+CACHE_PREDIKSI_ALIAS = os.getenv('CACHE_PREDIKSI_ALIAS', '')
+CACHE_PREDIKSI_TTL = int(os.getenv('CACHE_PREDIKSI_TTL', '86400'))
+
+# Katalog penyakit di-cache per proses dan dikosongkan lewat sinyal model.
+# Isi KATALOG_CACHE_ALIAS dengan alias di CACHES agar perubahan di satu
+# worker juga memuat ulang katalog worker lain (dicek tiap N detik).
+KATALOG_CACHE_ALIAS = os.getenv('KATALOG_CACHE_ALIAS', '')
+KATALOG_INTERVAL_CEK_VERSI = float(os.getenv('KATALOG_INTERVAL_CEK_VERSI', '5'))
+
+# Endpoint prediksi batch (/api/predict/batch/)
+PREDIKSI_BATCH_MAKS_GAMBAR = int(os.getenv('PREDIKSI_BATCH_MAKS_GAMBAR', '50'))
+# Total ukuran gambar hasil ekstraksi zip per request (byte)
+PREDIKSI_BATCH_UKURAN_ARSIP_MAKS = int(os.getenv('PREDIKSI_BATCH_UKURAN_ARSIP_MAKS', str(100 * 1024 * 1024)))
+PREDIKSI_BATCH_JUMLAH_WORKER = int(os.getenv('PREDIKSI_BATCH_JUMLAH_WORKER', '4'))
+
+# Endpoint prediksi async (/api/predict/async/, untuk ASGI): jumlah thread
+# maksimal untuk decode + inferensi per proses
+PREDIKSI_ASYNC_JUMLAH_WORKER = int(os.getenv('PREDIKSI_ASYNC_JUMLAH_WORKER', '4'))
+
+# Admission control inferensi per proses: maksimal ADMISI_MAKS_BERJALAN
+# prediksi bersamaan, ADMISI_MAKS_ANTRE request menunggu paling lama
+# ADMISI_BATAS_TUNGGU detik; sisanya dijawab 503 dengan Retry-After.
+ADMISI_MAKS_BERJALAN = int(os.getenv('ADMISI_MAKS_BERJALAN', '4'))
+ADMISI_MAKS_ANTRE = int(os.getenv('ADMISI_MAKS_ANTRE', '16'))
+ADMISI_BATAS_TUNGGU = float(os.getenv('ADMISI_BATAS_TUNGGU', '5'))
+ADMISI_RETRY_AFTER = int(os.getenv('ADMISI_RETRY_AFTER', '5'))
+
+# Write-behind riwayat deteksi: response prediksi tidak menunggu penulisan
+# gambar dan insert RiwayatDeteksi. Riwayat ditulis per batch oleh thread
+# latar belakang; jika antrean penuh atau database gagal, riwayat disimpan
+# sementara di RIWAYAT_TUMPAHAN_DIR dan ditulis ulang kemudian. Riwayat yang
+# gagal ditulis RIWAYAT_TUMPAHAN_MAKS_PERCOBAAN kali (mis. user sudah
+# dihapus) dipindahkan ke RIWAYAT_TUMPAHAN_DIR/karantina.
+RIWAYAT_WRITE_BEHIND_AKTIF = os.getenv('RIWAYAT_WRITE_BEHIND_AKTIF', 'False') == 'True'
+RIWAYAT_ANTREAN_MAKS = int(os.getenv('RIWAYAT_ANTREAN_MAKS', '1000'))
+RIWAYAT_ANTREAN_MAKS_MB = int(os.getenv('RIWAYAT_ANTREAN_MAKS_MB', '256'))
+RIWAYAT_FLUSH_UKURAN = int(os.getenv('RIWAYAT_FLUSH_UKURAN', '50'))
+RIWAYAT_FLUSH_INTERVAL_MS = float(os.getenv('RIWAYAT_FLUSH_INTERVAL_MS', '200'))
+RIWAYAT_TUMPAHAN_DIR = os.getenv('RIWAYAT_TUMPAHAN_DIR', str(BASE_DIR / 'antrean_riwayat'))
+RIWAYAT_TUMPAHAN_MAKS_PERCOBAAN = int(os.getenv('RIWAYAT_TUMPAHAN_MAKS_PERCOBAAN', '3'))
+
+# Kebijakan retensi bawaan untuk python manage.py prune_history
+# (0 = nonaktif). Jalankan command tersebut secara berkala (cron).
+RIWAYAT_RETENSI_HARI = int(os.getenv('RIWAYAT_RETENSI_HARI', '0'))
+RIWAYAT_MAKS_PER_USER = int(os.getenv('RIWAYAT_MAKS_PER_USER', '0'))
+
+# Instrumentasi waktu per tahap prediksi: header Server-Timing dan
+# histogram latensi di /api/metrics/ (format Prometheus)
+INSTRUMENTASI_AKTIF = os.getenv('INSTRUMENTASI_AKTIF', 'False') == 'True'
+
 
 # =============================================================================
 # DEFAULT AUTO FIELD